@@ -4,7 +4,7 @@ from .models import Category, Article, Comment, Like
 # Register your models here.
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ('name', 'slug')
+    list_display = ('name', 'slug', 'articles_count')
     list_filter = ('name',)
     search_fields = ('name',)
     prepopulated_fields = {'slug': ('name',)}
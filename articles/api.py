@@ -0,0 +1,203 @@
+"""
+API JSON en lecture seule sur les articles, catégories, commentaires et likes.
+
+- Les lignes sont lues avec `.values()` : aucune instance de modèle n'est
+  construite, seules les colonnes demandées sont sélectionnées.
+- `?fields=title,slug,likes_count` restreint les champs renvoyés (parmi ceux
+  de `*_FIELDS`) ; sans paramètre, les champs par défaut sont renvoyés.
+- Les listes sont paginées par curseur (`?cursor=`, `?limit=`), du plus
+  récent au plus ancien ; `next_cursor` vaut null sur la dernière page.
+- `/api/articles/?slugs=a,b,c` résout jusqu'à `MAX_BULK_SLUGS` articles en
+  une seule requête, dans l'ordre demandé ; les slugs inconnus sont listés
+  dans `missing`.
+"""
+from functools import wraps
+
+from django.http import JsonResponse
+
+from blog.replicas import read_from_replica
+
+from .cache import cache_anonymous_page, detail_scope, last_changed, list_scope
+from .models import Article, Category, Comment, Like
+from .pagination import paginate_by_cursor
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+MAX_BULK_SLUGS = 100
+
+# Nom public du champ -> chemin ORM passé à `.values()`
+ARTICLE_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'excerpt': 'excerpt',
+    'content': 'content',
+    'content_html': 'content_html',
+    'author': 'author__username',
+    'category': 'category__slug',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+    'likes_count': 'likes_count',
+    'comments_count': 'comments_count',
+}
+# Le contenu complet n'est renvoyé que sur demande explicite
+ARTICLE_DEFAULT_FIELDS = [name for name in ARTICLE_FIELDS if name not in ('content', 'content_html')]
+
+CATEGORY_FIELDS = {'id': 'id', 'name': 'name', 'slug': 'slug', 'articles_count': 'articles_count'}
+
+COMMENT_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'content': 'content',
+    'created_at': 'created_at',
+}
+
+LIKE_FIELDS = {
+    'id': 'id',
+    'user': 'user__username',
+    'created_at': 'created_at',
+}
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _error(message, status=400):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _split(value):
+    return [part.strip() for part in value.split(',') if part.strip()]
+
+
+def _selected_fields(request, available, default=None):
+    """Champs demandés par ?fields=, validés contre la liste `available`"""
+    requested = _split(request.GET.get('fields', ''))
+    if not requested:
+        return list(default or available)
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise BadRequest(f"Champ(s) inconnu(s) : {', '.join(unknown)}")
+    return requested
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise BadRequest("Le paramètre limit doit être un entier.")
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def _rows(queryset, available, fields, extra=()):
+    """
+    Lignes `.values()` limitées aux colonnes nécessaires. `extra` ajoute des
+    colonnes internes (ex. clé de pagination) qui ne sont pas renvoyées.
+    """
+    paths = {available[name] for name in fields} | set(extra)
+    return queryset.values(*paths)
+
+
+def _serialize(rows, available, fields):
+    return [{name: row[available[name]] for name in fields} for row in rows]
+
+
+def _paginated(request, queryset, available, fields):
+    rows = _rows(queryset, available, fields, extra=('id', 'created_at'))
+    page = paginate_by_cursor(rows, request.GET.get('cursor'), _limit(request))
+    return JsonResponse({
+        'results': _serialize(page, available, fields),
+        'next_cursor': page.next_cursor,
+        'previous_cursor': page.previous_cursor,
+    })
+
+
+def _api_view(view_func):
+    """Traduit les paramètres invalides en réponse 400 JSON"""
+    @wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view_func(request, *args, **kwargs)
+        except BadRequest as exc:
+            return _error(str(exc))
+    return wrapper
+
+
+def _article_list_scope(request):
+    if request.GET.get('slugs'):
+        return list_scope()
+    return list_scope(request.GET.get('category', ''))
+
+
+@read_from_replica(lambda request: last_changed(_article_list_scope(request)))
+@cache_anonymous_page(_article_list_scope)
+@_api_view
+def article_list(request):
+    """Articles du plus récent au plus ancien (?category=), ou lot d'articles (?slugs=a,b,c)"""
+    fields = _selected_fields(request, ARTICLE_FIELDS, ARTICLE_DEFAULT_FIELDS)
+    articles = Article.objects.all()
+
+    slugs = _split(request.GET.get('slugs', ''))
+    if slugs:
+        if len(slugs) > MAX_BULK_SLUGS:
+            raise BadRequest(f"{MAX_BULK_SLUGS} slugs au maximum par requête.")
+        rows = _rows(articles.filter(slug__in=slugs), ARTICLE_FIELDS, fields, extra=('slug',))
+        by_slug = {row['slug']: row for row in rows}
+        return JsonResponse({
+            'results': _serialize([by_slug[slug] for slug in slugs if slug in by_slug], ARTICLE_FIELDS, fields),
+            'missing': [slug for slug in slugs if slug not in by_slug],
+        })
+
+    category_slug = request.GET.get('category', '')
+    if category_slug:
+        articles = articles.filter(category__slug=category_slug)
+    return _paginated(request, articles, ARTICLE_FIELDS, fields)
+
+
+@read_from_replica(lambda request, slug: last_changed(detail_scope(slug)))
+@cache_anonymous_page(lambda request, slug: detail_scope(slug))
+@_api_view
+def article_detail(request, slug):
+    fields = _selected_fields(request, ARTICLE_FIELDS)
+    row = _rows(Article.objects.filter(slug=slug), ARTICLE_FIELDS, fields).first()
+    if row is None:
+        return _error("Article introuvable.", status=404)
+    return JsonResponse(_serialize([row], ARTICLE_FIELDS, fields)[0])
+
+
+@read_from_replica(lambda request: last_changed(list_scope()))
+@cache_anonymous_page(lambda request: list_scope())
+@_api_view
+def category_list(request):
+    fields = _selected_fields(request, CATEGORY_FIELDS)
+    rows = _rows(Category.objects.order_by('name'), CATEGORY_FIELDS, fields)
+    return JsonResponse({'results': _serialize(rows, CATEGORY_FIELDS, fields)})
+
+
+def _article_id(slug):
+    return Article.objects.filter(slug=slug).values_list('id', flat=True).first()
+
+
+@read_from_replica(lambda request, slug: last_changed(detail_scope(slug)))
+@cache_anonymous_page(lambda request, slug: detail_scope(slug))
+@_api_view
+def comment_list(request, slug):
+    """Commentaires d'un article, du plus récent au plus ancien"""
+    fields = _selected_fields(request, COMMENT_FIELDS)
+    article_id = _article_id(slug)
+    if article_id is None:
+        return _error("Article introuvable.", status=404)
+    return _paginated(request, Comment.objects.filter(article_id=article_id), COMMENT_FIELDS, fields)
+
+
+@read_from_replica(lambda request, slug: last_changed(detail_scope(slug)))
+@cache_anonymous_page(lambda request, slug: detail_scope(slug))
+@_api_view
+def like_list(request, slug):
+    """Likes d'un article, du plus récent au plus ancien"""
+    fields = _selected_fields(request, LIKE_FIELDS)
+    article_id = _article_id(slug)
+    if article_id is None:
+        return _error("Article introuvable.", status=404)
+    return _paginated(request, Like.objects.filter(article_id=article_id), LIKE_FIELDS, fields)
@@ -0,0 +1,10 @@
+from django.urls import path
+from .api import article_list, article_detail, category_list, comment_list, like_list
+
+urlpatterns = [
+    path('articles/', article_list, name='api_article_list'),
+    path('articles/<slug:slug>/', article_detail, name='api_article_detail'),
+    path('articles/<slug:slug>/comments/', comment_list, name='api_comment_list'),
+    path('articles/<slug:slug>/likes/', like_list, name='api_like_list'),
+    path('categories/', category_list, name='api_category_list'),
+]
@@ -0,0 +1,97 @@
+"""
+Archives par année et par mois de publication (`Article.created_at`, en heure
+locale).
+
+- `ArchiveMonth` compte les articles de chaque mois. `record_article()` le
+  met à jour à chaque création ou suppression d'article (signaux), dans la
+  transaction de l'écriture ; `recompute_archive()` le reconstruit après des
+  insertions en masse.
+- `month_articles()` borne la liste au mois demandé par un intervalle sur
+  `created_at` : la pagination par curseur parcourt l'index
+  `article_created_idx` sans OFFSET, quelle que soit la profondeur.
+"""
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ArchiveMonth, Article
+
+
+def month_of(created_at):
+    """(année, mois) d'une date de publication, en heure locale"""
+    local = timezone.localtime(created_at)
+    return local.year, local.month
+
+
+def month_bounds(year, month):
+    """Début du mois et début du mois suivant, en heure locale"""
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(datetime(year + month // 12, month % 12 + 1, 1))
+    return start, end
+
+
+def record_article(created_at, delta):
+    """
+    Ajoute `delta` (1 ou -1) au compteur du mois de `created_at`. Un mois
+    vidé sort de la table.
+    """
+    year, month = month_of(created_at)
+    months = ArchiveMonth.objects.filter(year=year, month=month)
+    if delta < 0:
+        months.filter(articles_count__lte=-delta).delete()
+        months.update(articles_count=F('articles_count') + delta)
+    elif not months.update(articles_count=F('articles_count') + delta):
+        # Premier article du mois : transaction BEGIN IMMEDIATE en cours,
+        # aucune autre écriture ne peut créer la ligne entre-temps
+        ArchiveMonth.objects.create(year=year, month=month, articles_count=delta)
+
+
+def recompute_archive(batch_size=1000):
+    """Reconstruit le compte des articles par mois. Retourne le nombre de mois."""
+    with transaction.atomic():
+        counts = Counter(
+            month_of(created_at)
+            for created_at in Article.objects.values_list('created_at', flat=True).iterator(chunk_size=batch_size)
+        )
+        ArchiveMonth.objects.all().delete()
+        ArchiveMonth.objects.bulk_create(
+            [
+                ArchiveMonth(year=year, month=month, articles_count=total)
+                for (year, month), total in counts.items()
+            ],
+            batch_size=batch_size,
+        )
+    return len(counts)
+
+
+def archive_months(year=None):
+    """Mois ayant au moins un article, du plus récent au plus ancien"""
+    months = ArchiveMonth.objects.order_by('-year', '-month')
+    if year is not None:
+        months = months.filter(year=year)
+    return months
+
+
+def adjacent_months(year, month):
+    """Mois précédent et mois suivant ayant des articles (None en bout d'archive)"""
+    # Intervalle sur l'année puis exclusion du reste de l'année : l'index
+    # (année, mois) fournit aussi l'ordre, sans tri en mémoire
+    older = ArchiveMonth.objects.filter(year__lte=year).exclude(year=year, month__gte=month)
+    newer = ArchiveMonth.objects.filter(year__gte=year).exclude(year=year, month__lte=month)
+    return (
+        older.order_by('-year', '-month').first(),
+        newer.order_by('year', 'month').first(),
+    )
+
+
+def month_articles(year, month):
+    """Articles publiés pendant le mois, pour `paginate_by_cursor`"""
+    start, end = month_bounds(year, month)
+    return (
+        Article.objects.filter(created_at__gte=start, created_at__lt=end)
+        .select_related('category', 'author')
+        .defer('content', 'content_html')
+    )
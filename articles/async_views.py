@@ -0,0 +1,129 @@
+"""
+Versions asynchrones des vues de lecture les plus sollicitées, servies sous
+ASGI (voir ARTICLES_ASYNC_VIEWS). Elles produisent les mêmes pages que
+articles.views, mais lisent la base avec l'ORM asynchrone et rendent le
+Markdown dans un pool de threads borné : la requête n'occupe aucun thread
+pendant ses attentes.
+
+Les écritures (commentaire, like) restent des fonctions synchrones
+transactionnelles, appelées avec sync_to_async : l'ORM asynchrone de Django
+ne gère pas les transactions.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_POST
+
+from blog.replicas import read_from_replica
+from blog.sqlite import retry_on_locked
+
+from .cache import acategory_sidebar, cache_anonymous_page, detail_scope, last_changed, list_scope
+from .comments import add_comment
+from .conditional import aconditional_article_page, aconditional_list_page
+from .forms import CommentForm
+from .likes import toggle_like
+from .models import Article
+from .pagination import apaginate, apaginate_by_cursor
+from .related import arelated_articles
+from .search import search_articles
+from .views import COMMENTS_PER_PAGE
+
+
+async def _auser(request):
+    # Le template lit `user` : il est résolu ici pour qu'aucune requête
+    # synchrone ne soit déclenchée pendant le rendu
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+@read_from_replica(lambda request: last_changed(list_scope(request.GET.get('category', ''))))
+@aconditional_list_page
+@cache_anonymous_page(lambda request: list_scope(request.GET.get('category', '')))
+async def article_list(request):
+    await _auser(request)
+    query = request.GET.get('q', '')
+    category_slug = request.GET.get('category', '')
+    articles = (
+        Article.objects.select_related('category', 'author')
+        .defer('content', 'content_html')
+        .order_by('-created_at', '-id')
+    )
+
+    if category_slug:
+        articles = articles.filter(category__slug=category_slug)
+    if query:
+        # La première recherche vérifie la présence de l'index FTS5 (introspection synchrone)
+        articles = await sync_to_async(search_articles)(articles, query)
+
+    cursor = request.GET.get('cursor', '')
+    cursor_mode = bool(cursor) or request.GET.get('pagination') == 'cursor'
+    page_range = None
+    if cursor_mode:
+        page_obj = await apaginate_by_cursor(articles, cursor, 10)
+    else:
+        paginator, page_obj = await apaginate(articles, request.GET.get('page'), 10)
+        page_range = paginator.get_elided_page_range(page_obj.number)
+
+    categories = await acategory_sidebar()
+
+    return render(request, 'articles/article_list.html', {
+        'page_obj': page_obj,
+        'page_range': page_range,
+        'cursor_mode': cursor_mode,
+        'categories': categories,
+        'query': query,
+        'selected_category': category_slug,
+    })
+
+
+@read_from_replica(lambda request, slug: last_changed(detail_scope(slug)))
+@aconditional_article_page
+@cache_anonymous_page(lambda request, slug: detail_scope(slug))
+async def article_detail(request, slug):
+    user = await _auser(request)
+    try:
+        article = await Article.objects.select_related('author', 'category').aget(slug=slug)
+    except Article.DoesNotExist:
+        raise Http404("Aucun article ne correspond à la requête.")
+    await article.aensure_rendered()
+
+    if request.method == 'POST':
+        if not user.is_authenticated:
+            messages.error(request, "Vous devez être connecté pour commenter.")
+            return redirect('login')
+        form = CommentForm(request.POST)
+        if form.is_valid():
+            await sync_to_async(add_comment)(form, article, user)
+            messages.success(request, 'Commentaire ajouté avec succès !')
+            return redirect('article_detail', slug=article.slug)
+    else:
+        form = CommentForm()
+
+    comments_page = await apaginate_by_cursor(
+        article.comments.select_related('author'), request.GET.get('cursor'), COMMENTS_PER_PAGE
+    )
+    is_liked = await article.likes.filter(user=user).aexists() if user.is_authenticated else False
+
+    return render(request, 'articles/article_detail.html', {
+        'article': article,
+        'comments_page': comments_page,
+        'form': form,
+        'is_liked': is_liked,
+        'related_articles': await arelated_articles(article),
+    })
+
+
+@require_POST
+@retry_on_locked
+async def article_like_toggle(request, slug):
+    """Bascule le like en une transaction et renvoie le nouvel état en JSON"""
+    user = await request.auser()
+    if not user.is_authenticated:
+        return JsonResponse({'error': 'Authentification requise.'}, status=401)
+    article_id = await Article.objects.filter(slug=slug).values_list('pk', flat=True).afirst()
+    if article_id is None:
+        raise Http404("Article introuvable.")
+    liked, likes_count = await sync_to_async(toggle_like)(article_id, user)
+    return JsonResponse({'liked': liked, 'likes_count': likes_count})
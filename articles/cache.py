@@ -0,0 +1,283 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+
+from .models import Category
+
+# Durée de vie des pages en cache (secondes)
+PAGE_CACHE_TIMEOUT = getattr(settings, 'ARTICLES_PAGE_CACHE_TIMEOUT', 300)
+
+# Paramètres GET qui distinguent deux pages en cache
+LIST_PARAMS = ('page', 'category', 'q', 'cursor', 'pagination', 'format', 'fields', 'slugs', 'limit')
+
+EPOCH_KEY = 'pages:epoch'
+SIDEBAR_SCOPE = 'categories'
+HITS_KEY = 'pages:stats:hits'
+MISSES_KEY = 'pages:stats:misses'
+
+# Les succès et échecs du cache sont comptés en mémoire et reportés dans le
+# cache partagé par lots : une page servie depuis le cache ne prend pas le
+# verrou d'écriture à chaque requête
+STATS_FLUSH_SIZE = 100
+STATS_FLUSH_INTERVAL = 10.0
+
+_pending_stats = Counter()
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+async def acache(func, *args, **kwargs):
+    """
+    Appelle `func` (qui lit ou écrit le cache) depuis du code asynchrone. Le
+    cache est un fichier SQLite partagé (blog.cache) : une écriture peut
+    attendre le verrou plusieurs secondes, elle est donc faite dans un thread,
+    jamais sur la boucle d'événements.
+    """
+    return await sync_to_async(func, thread_sensitive=False)(*args, **kwargs)
+
+
+def _scope_key(scope):
+    return f'pages:version:{scope}'
+
+
+def list_scope(category_slug=None):
+    """Portée d'invalidation d'une liste : toute l'archive ou une catégorie"""
+    return f'category:{category_slug}' if category_slug else 'all'
+
+
+def detail_scope(slug):
+    return f'article:{slug}'
+
+
+def _changed_key(key):
+    return f'{key}:changed'
+
+
+def scope_versions(*scopes):
+    """
+    Versions courantes des portées demandées (plus l'époque globale). Une
+    version absente est initialisée à l'horloge pour ne jamais retomber sur
+    une valeur déjà utilisée par des pages encore en cache.
+    """
+    keys = [EPOCH_KEY] + [_scope_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def _bump(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+    cache.set(_changed_key(key), time.time(), None)
+
+
+def last_changed(*scopes):
+    """
+    Horodatage de la dernière invalidation des portées demandées (ou de
+    l'époque globale). Inconnu, il est initialisé à maintenant : les clients
+    revalident une fois, puis la date reste stable.
+    """
+    keys = [_changed_key(key) for key in [EPOCH_KEY] + [_scope_key(scope) for scope in scopes]]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, time.time(), None)
+            found[key] = cache.get(key)
+    return max(found.values())
+
+
+def invalidate_scopes(*scopes):
+    for scope in set(scopes):
+        _bump(_scope_key(scope))
+
+
+def invalidate_all():
+    """Invalide toutes les pages (ex. : renommage d'une catégorie du menu)"""
+    _bump(EPOCH_KEY)
+
+
+def invalidate_article(slug, category_slugs=()):
+    """Invalide la page de l'article, l'archive complète et ses listes de catégorie"""
+    scopes = [detail_scope(slug), list_scope()]
+    scopes += [list_scope(category_slug) for category_slug in category_slugs if category_slug]
+    invalidate_scopes(*scopes)
+
+
+def _sidebar_key():
+    versions = '.'.join(str(version) for version in scope_versions(SIDEBAR_SCOPE))
+    return f'sidebar:categories:{versions}'
+
+
+def _sidebar_queryset():
+    return Category.objects.order_by('name').values('name', 'slug', 'articles_count')
+
+
+def category_sidebar():
+    """
+    Catégories et nombre d'articles de chacune, pour la barre latérale des
+    listes. En cache jusqu'au prochain changement des compteurs : aucune
+    requête une fois le cache chaud.
+    """
+    key = _sidebar_key()
+    categories = cache.get(key)
+    if categories is None:
+        categories = list(_sidebar_queryset())
+        cache.set(key, categories, None)
+    return categories
+
+
+async def acategory_sidebar():
+    """Version asynchrone de `category_sidebar` (cache lu et écrit via `acache`)"""
+    key = await acache(_sidebar_key)
+    categories = await acache(cache.get, key)
+    if categories is None:
+        categories = [category async for category in _sidebar_queryset()]
+        await acache(cache.set, key, categories, None)
+    return categories
+
+
+def invalidate_category_counts():
+    """
+    Les nombres d'articles par catégorie ont changé : la barre latérale et
+    toutes les listes qui l'affichent sont invalidées, pas les pages d'articles
+    """
+    slugs = Category.objects.values_list('slug', flat=True)
+    invalidate_scopes(SIDEBAR_SCOPE, list_scope(), *[list_scope(slug) for slug in slugs])
+
+
+def page_cache_key(request, scope):
+    versions = '.'.join(str(version) for version in scope_versions(scope))
+    params = '&'.join(f'{name}={request.GET.get(name, "")}' for name in LIST_PARAMS)
+    digest = hashlib.md5(f'{request.path}?{params}'.encode('utf-8')).hexdigest()
+    return f'pages:{scope}:{versions}:{digest}'
+
+
+def flush_page_cache_stats():
+    """Reporte dans le cache partagé les compteurs accumulés par ce processus"""
+    global _last_flush
+    with _pending_lock:
+        pending = dict(_pending_stats)
+        _pending_stats.clear()
+        _last_flush = time.monotonic()
+    for key, delta in pending.items():
+        if not cache.add(key, delta, None):
+            try:
+                cache.incr(key, delta)
+            except ValueError:
+                cache.set(key, delta, None)
+
+
+def page_cache_stats():
+    flush_page_cache_stats()
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    hits = stats.get(HITS_KEY, 0)
+    misses = stats.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / total, 4) if total else None,
+    }
+
+
+def _count(key):
+    with _pending_lock:
+        _pending_stats[key] += 1
+        due = (
+            sum(_pending_stats.values()) >= STATS_FLUSH_SIZE
+            or time.monotonic() - _last_flush >= STATS_FLUSH_INTERVAL
+        )
+    if due:
+        flush_page_cache_stats()
+
+
+def _is_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    if request.user.is_authenticated:
+        return False
+    # Un message flash en attente serait figé dans la page en cache
+    return not len(get_messages(request))
+
+
+async def _ais_cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # auser() charge la session de façon asynchrone : les messages stockés en
+    # session sont ensuite lus sans requête
+    user = await request.auser()
+    if user.is_authenticated:
+        return False
+    return not len(get_messages(request))
+
+
+def _cached_response(key):
+    response = cache.get(key)
+    if response is not None:
+        _count(HITS_KEY)
+        response['X-Page-Cache'] = 'HIT'
+    else:
+        _count(MISSES_KEY)
+    return response
+
+
+def _lookup(request, scope):
+    key = page_cache_key(request, scope)
+    return key, _cached_response(key)
+
+
+def _store_response(key, response):
+    if (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+    ):
+        cache.set(key, response, PAGE_CACHE_TIMEOUT)
+    response['X-Page-Cache'] = 'MISS'
+    return response
+
+
+def cache_anonymous_page(scope_func):
+    """
+    Met en cache la réponse complète d'une vue pour les visiteurs anonymes.
+    `scope_func(request, **kwargs)` renvoie la portée d'invalidation de la page ;
+    les signaux de articles.signals incrémentent la version de cette portée
+    lorsque le contenu change, ce qui rend les anciennes entrées inaccessibles.
+
+    Les vues asynchrones sont prises en charge : les lectures et écritures du
+    cache passent alors par `acache`, hors de la boucle d'événements.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if not await _ais_cacheable_request(request):
+                    return await view_func(request, *args, **kwargs)
+                key, response = await acache(_lookup, request, scope_func(request, **kwargs))
+                if response is None:
+                    response = await acache(_store_response, key, await view_func(request, *args, **kwargs))
+                return response
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _is_cacheable_request(request):
+                return view_func(request, *args, **kwargs)
+            key, response = _lookup(request, scope_func(request, **kwargs))
+            if response is None:
+                response = _store_response(key, view_func(request, *args, **kwargs))
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,22 @@
+from django.db import transaction
+
+from blog.sqlite import retry_on_locked
+
+from .counters import adjust_counter
+from .trending import record_interaction
+
+
+@retry_on_locked
+def add_comment(form, article, user):
+    """
+    Enregistre le commentaire validé par `form` et met à jour les compteurs de
+    l'article dans une seule transaction, rejouée si la base reste verrouillée.
+    """
+    comment = form.save(commit=False)
+    comment.article = article
+    comment.author = user
+    with transaction.atomic():
+        comment.save()
+        adjust_counter(article.pk, 'comments_count', 1)
+        record_interaction(article.pk, 'comment', at=comment.created_at)
+    return comment
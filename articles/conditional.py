@@ -0,0 +1,160 @@
+"""
+Requêtes conditionnelles (If-None-Match / If-Modified-Since) sur les pages
+d'articles : les validateurs sont calculés avant la vue, et une page
+inchangée est servie en `304 Not Modified` sans requête ni rendu.
+
+Les validateurs reposent sur les portées d'invalidation de articles.cache,
+incrémentées par les signaux à chaque modification d'un article, d'un
+commentaire, d'un like ou d'une catégorie.
+"""
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import condition
+
+from .cache import acache, detail_scope, last_changed, list_scope, scope_versions
+from .models import Article
+
+
+def _applies(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # Un message flash en attente doit être affiché : la page est toujours rendue
+    return not len(get_messages(request))
+
+
+def _etag(*parts):
+    return hashlib.md5(':'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+def _last_modified(*scopes):
+    changed = last_changed(*scopes)
+    # Last-Modified est à la seconde près : une modification survenue dans la
+    # même seconde serait invisible pour If-Modified-Since, l'ETag seul s'applique
+    if time.time() - changed < 1:
+        return None
+    return datetime.fromtimestamp(changed, tz=timezone.utc)
+
+
+def _article_state(slug):
+    return Article.objects.filter(slug=slug).values_list('updated_at', 'likes_count', 'comments_count')
+
+
+def _article_etag(state, slug, user):
+    if state is None:
+        return None
+    updated_at, likes_count, comments_count = state
+    return _etag(
+        updated_at.isoformat(), likes_count, comments_count,
+        *scope_versions(detail_scope(slug)), user.pk,
+    )
+
+
+def article_etag(request, slug):
+    """
+    Date de modification et compteurs de l'article, version de sa portée de
+    cache et utilisateur (la page affiche son like et ses droits)
+    """
+    if not _applies(request):
+        return None
+    return _article_etag(_article_state(slug).first(), slug, request.user)
+
+
+def article_last_modified(request, slug):
+    if not _applies(request):
+        return None
+    return _last_modified(detail_scope(slug))
+
+
+def _list_category(request):
+    return request.GET.get('category', '')
+
+
+def list_etag(request):
+    """Version de la portée de la liste (archive complète ou catégorie) et utilisateur"""
+    if not _applies(request):
+        return None
+    return _etag(*scope_versions(list_scope(_list_category(request))), request.user.pk)
+
+
+def list_last_modified(request):
+    if not _applies(request):
+        return None
+    return _last_modified(list_scope(_list_category(request)))
+
+
+conditional_article_page = condition(etag_func=article_etag, last_modified_func=article_last_modified)
+conditional_list_page = condition(etag_func=list_etag, last_modified_func=list_last_modified)
+
+
+# Vues asynchrones ---------------------------------------------------------------
+#
+# `condition` de Django appelle les validateurs de façon synchrone : la requête
+# SQL de `article_etag` est interdite dans une vue asynchrone. Les validateurs
+# ci-dessous utilisent l'ORM asynchrone, et lisent le cache (fichier SQLite
+# partagé) hors de la boucle d'événements avec `acache`.
+
+async def _aapplies(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # Charge la session de façon asynchrone : les messages sont ensuite lus sans requête
+    await request.auser()
+    return not len(get_messages(request))
+
+
+async def aarticle_etag(request, slug):
+    if not await _aapplies(request):
+        return None
+    state = await _article_state(slug).afirst()
+    return await acache(_article_etag, state, slug, await request.auser())
+
+
+async def aarticle_last_modified(request, slug):
+    if not await _aapplies(request):
+        return None
+    return await acache(_last_modified, detail_scope(slug))
+
+
+async def alist_etag(request):
+    if not await _aapplies(request):
+        return None
+    user = await request.auser()
+    versions = await acache(scope_versions, list_scope(_list_category(request)))
+    return _etag(*versions, user.pk)
+
+
+async def alist_last_modified(request):
+    if not await _aapplies(request):
+        return None
+    return await acache(_last_modified, list_scope(_list_category(request)))
+
+
+def acondition(etag_func, last_modified_func):
+    """Équivalent de `condition` pour une vue et des validateurs asynchrones"""
+    def decorator(view_func):
+        @wraps(view_func)
+        async def inner(request, *args, **kwargs):
+            last_modified = await last_modified_func(request, *args, **kwargs)
+            last_modified = int(last_modified.timestamp()) if last_modified else None
+            etag = await etag_func(request, *args, **kwargs)
+            etag = quote_etag(etag) if etag is not None else None
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = await view_func(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                if last_modified and not response.has_header('Last-Modified'):
+                    response.headers['Last-Modified'] = http_date(last_modified)
+                if etag:
+                    response.headers.setdefault('ETag', etag)
+            return response
+        return inner
+    return decorator
+
+
+aconditional_article_page = acondition(etag_func=aarticle_etag, last_modified_func=aarticle_last_modified)
+aconditional_list_page = acondition(etag_func=alist_etag, last_modified_func=alist_last_modified)
@@ -0,0 +1,108 @@
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .cache import detail_scope, invalidate_scopes, list_scope
+from .models import Article, Category, Comment, Like
+
+COUNTER_FIELDS = Article.COUNTER_FIELDS
+
+
+def adjust_counter(article_id, field, delta):
+    """
+    Incrémente (ou décrémente) atomiquement un compteur d'article en base,
+    sans lire la valeur courante ni toucher à `updated_at`.
+    """
+    if field not in COUNTER_FIELDS:
+        raise ValueError(f"Compteur inconnu : {field}")
+    return Article.objects.filter(pk=article_id).update(
+        **{field: Greatest(F(field) + delta, 0)}
+    )
+
+
+def adjust_category_count(category_id, delta):
+    """Incrémente (ou décrémente) atomiquement le nombre d'articles d'une catégorie"""
+    if category_id is None:
+        return 0
+    return Category.objects.filter(pk=category_id).update(
+        articles_count=Greatest(F('articles_count') + delta, 0)
+    )
+
+
+def _count_subquery(model, field='article'):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{field: OuterRef('pk')})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        Value(0),
+    )
+
+
+def reconcile_counters(batch_size=1000):
+    """
+    Recalcule les compteurs à partir des tables Like et Comment, par lots de
+    clés primaires, et corrige les articles qui ont dérivé. Les pages en cache
+    de ces articles (page de l'article, archive et liste de sa catégorie) sont
+    invalidées après le commit.
+    Retourne (articles parcourus, articles corrigés).
+    """
+    queryset = (
+        Article.objects.order_by('id')
+        .select_related('category')
+        .only('id', 'slug', 'category__slug', *COUNTER_FIELDS)
+        .annotate(
+            actual_likes=_count_subquery(Like),
+            actual_comments=_count_subquery(Comment),
+        )
+    )
+    last_id = 0
+    scanned = fixed = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        scanned += len(batch)
+
+        drifted = []
+        for article in batch:
+            if (article.likes_count, article.comments_count) != (article.actual_likes, article.actual_comments):
+                article.likes_count = article.actual_likes
+                article.comments_count = article.actual_comments
+                drifted.append(article)
+        if drifted:
+            scopes = {list_scope()}
+            for article in drifted:
+                scopes.add(detail_scope(article.slug))
+                if article.category:
+                    scopes.add(list_scope(article.category.slug))
+            with transaction.atomic():
+                Article.objects.bulk_update(drifted, COUNTER_FIELDS)
+                transaction.on_commit(lambda scopes=scopes: invalidate_scopes(*scopes))
+            fixed += len(drifted)
+    return scanned, fixed
+
+
+def recompute_counters(queryset=None):
+    """
+    Recalcule les compteurs en une seule requête UPDATE ensembliste, sans
+    charger les articles (utilisé après des insertions en masse).
+    """
+    if queryset is None:
+        queryset = Article.objects.all()
+    return queryset.update(
+        likes_count=_count_subquery(Like),
+        comments_count=_count_subquery(Comment),
+    )
+
+
+def recompute_category_counts():
+    """
+    Recalcule le nombre d'articles de chaque catégorie en une requête UPDATE
+    (après des insertions en masse, ou pour corriger une dérive).
+    """
+    return Category.objects.update(articles_count=_count_subquery(Article, 'category'))
@@ -0,0 +1,219 @@
+"""
+Flux RSS/Atom (global et par catégorie) et sitemap de l'archive.
+
+Les réponses sont produites en flux (`StreamingHttpResponse`) : les articles
+sont lus par paquets avec `.iterator()` et écrits un à un, la mémoire ne
+dépend pas de la taille de l'archive. Le corps produit est ensuite mis en
+cache sous la version des portées de articles.cache : toute modification
+d'un article (ou d'une catégorie) le rend inaccessible.
+
+Le sitemap est un index qui pointe vers des sections de
+`SITEMAP_SECTION_SIZE` articles consécutifs (par id) : chaque section reste
+sous la limite de 50 000 URL du protocole et se met en cache séparément.
+"""
+import hashlib
+import io
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Max
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed, Rss201rev2Feed, rfc3339_date
+from django.utils.html import escape
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from blog.replicas import read_from_replica
+
+from .cache import last_changed, list_scope, scope_versions
+from .models import Article, Category
+
+# Nombre d'articles publiés dans un flux
+FEED_ITEMS = getattr(settings, 'ARTICLES_FEED_ITEMS', 30)
+
+# Nombre d'articles (plage d'id) par section du sitemap
+SITEMAP_SECTION_SIZE = getattr(settings, 'ARTICLES_SITEMAP_SECTION_SIZE', 10000)
+
+FEED_CACHE_TIMEOUT = getattr(settings, 'ARTICLES_FEED_CACHE_TIMEOUT', 3600)
+
+SITEMAP_CONTENT_TYPE = 'application/xml; charset=utf-8'
+
+# Repère écrit à la place des entrées : l'en-tête et la fin du flux sont
+# produits par feedgenerator, les entrées sont insérées une à une entre les deux
+_ITEMS_MARKER = '<!--items-->'
+
+
+class StreamingFeedMixin:
+    def latest_post_date(self):
+        return self.feed.get('updated') or super().latest_post_date()
+
+    def write_items(self, handler):
+        handler.ignorableWhitespace(_ITEMS_MARKER)
+
+    def stream(self, items):
+        """Écrit le flux morceau par morceau ; `items` produit les arguments de `add_item`"""
+        head, tail = self.writeString('utf-8').split(_ITEMS_MARKER)
+        yield head
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, 'utf-8', short_empty_elements=True)
+        for item in items:
+            self.items = []
+            self.add_item(**item)
+            super().write_items(handler)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        self.items = []
+        yield tail
+
+
+class StreamingRssFeed(StreamingFeedMixin, Rss201rev2Feed):
+    pass
+
+
+class StreamingAtomFeed(StreamingFeedMixin, Atom1Feed):
+    pass
+
+
+FEED_FORMATS = {'rss': StreamingRssFeed, 'atom': StreamingAtomFeed}
+
+
+def _cache_key(request, name, scope):
+    versions = '.'.join(str(version) for version in scope_versions(scope))
+    digest = hashlib.md5(f'{request.get_host()}:{name}'.encode('utf-8')).hexdigest()
+    return f'feeds:{scope}:{versions}:{digest}'
+
+
+def _cached_stream(key, chunks):
+    """Transmet les morceaux et met le corps complet en cache une fois le flux terminé"""
+    parts = []
+    for chunk in chunks:
+        parts.append(chunk)
+        yield chunk
+    cache.set(key, ''.join(parts).encode('utf-8'), FEED_CACHE_TIMEOUT)
+
+
+def _respond(request, name, scope, content_type, build):
+    """Réponse en cache si disponible, sinon flux produit par `build()` et mis en cache"""
+    key = _cache_key(request, name, scope)
+    body = cache.get(key)
+    if body is not None:
+        return HttpResponse(body, content_type=content_type)
+    return StreamingHttpResponse(_cached_stream(key, build()), content_type=content_type)
+
+
+def _feed_items(request, articles):
+    for article in articles.iterator(chunk_size=FEED_ITEMS):
+        link = request.build_absolute_uri(article.get_absolute_url())
+        yield {
+            'title': article.title,
+            'link': link,
+            'description': article.excerpt,
+            'unique_id': link,
+            'unique_id_is_permalink': True,
+            'author_name': article.author.username,
+            'pubdate': article.created_at,
+            'updateddate': article.updated_at,
+            'categories': [article.category.name] if article.category else (),
+        }
+
+
+@read_from_replica(lambda request, feed_format, category_slug=None: last_changed(list_scope(category_slug)))
+def article_feed(request, feed_format, category_slug=None):
+    """Derniers articles (de la catégorie `category_slug` le cas échéant), en RSS 2.0 ou Atom 1.0"""
+    feed_class = FEED_FORMATS.get(feed_format)
+    if feed_class is None:
+        raise Http404("Format de flux inconnu.")
+    scope = list_scope(category_slug)
+
+    def build():
+        articles = Article.objects.all()
+        title = 'Mon Blog'
+        link = reverse('article_list')
+        if category_slug:
+            category = get_object_or_404(Category, slug=category_slug)
+            articles = articles.filter(category=category)
+            title = f'Mon Blog — {category.name}'
+            link = f'{link}?category={category.slug}'
+        feed = feed_class(
+            title=title,
+            link=request.build_absolute_uri(link),
+            description='Derniers articles publiés',
+            language=settings.LANGUAGE_CODE,
+            feed_url=request.build_absolute_uri(),
+            updated=articles.aggregate(latest=Max('updated_at'))['latest'],
+        )
+        latest = (
+            articles.select_related('author', 'category')
+            .only(
+                'title', 'slug', 'excerpt', 'created_at', 'updated_at',
+                'author__username', 'category__name',
+            )
+            .order_by('-created_at', '-id')[:FEED_ITEMS]
+        )
+        return feed.stream(_feed_items(request, latest))
+
+    return _respond(request, f'feed:{feed_format}', scope, feed_class.content_type, build)
+
+
+def _sitemap_document(root, entries):
+    """Document sitemap dont les entrées sont produites morceau par morceau par `entries`"""
+    yield f'<?xml version="1.0" encoding="utf-8"?>\n<{root} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    yield from entries
+    yield f'</{root}>'
+
+
+@read_from_replica(lambda request: last_changed(list_scope()))
+def sitemap_index(request):
+    """Index des sections du sitemap, avec la date de dernière modification de chacune"""
+
+    def build():
+        sections = (
+            Article.objects.annotate(section=(F('id') - 1) / SITEMAP_SECTION_SIZE + 1)
+            .values('section')
+            .annotate(lastmod=Max('updated_at'))
+            .order_by('section')
+        )
+
+        def entries():
+            for row in sections.iterator():
+                loc = request.build_absolute_uri(reverse('sitemap_section', kwargs={'section': row['section']}))
+                yield (
+                    f'<sitemap><loc>{escape(loc)}</loc>'
+                    f'<lastmod>{rfc3339_date(row["lastmod"])}</lastmod></sitemap>'
+                )
+
+        return _sitemap_document('sitemapindex', entries())
+
+    return _respond(request, 'sitemap', list_scope(), SITEMAP_CONTENT_TYPE, build)
+
+
+@read_from_replica(lambda request, section: last_changed(list_scope()))
+def sitemap_section(request, section):
+    """URL des articles d'id compris entre (section - 1) × taille + 1 et section × taille"""
+    if section < 1:
+        raise Http404("Section de sitemap inconnue.")
+
+    def build():
+        first_id = (section - 1) * SITEMAP_SECTION_SIZE + 1
+        rows = (
+            Article.objects.filter(id__gte=first_id, id__lt=first_id + SITEMAP_SECTION_SIZE)
+            .order_by('id')
+            .values_list('slug', 'updated_at')
+        )
+        # Préfixe absolu calculé une fois : seul le slug varie d'une URL à l'autre
+        prefix, suffix = request.build_absolute_uri(
+            reverse('article_detail', kwargs={'slug': 'slug'})
+        ).rsplit('slug', 1)
+
+        def entries():
+            for slug, updated_at in rows.iterator(chunk_size=2000):
+                yield (
+                    f'<url><loc>{escape(prefix + slug + suffix)}</loc>'
+                    f'<lastmod>{rfc3339_date(updated_at)}</lastmod></url>'
+                )
+
+        return _sitemap_document('urlset', entries())
+
+    return _respond(request, f'sitemap:{section}', list_scope(), SITEMAP_CONTENT_TYPE, build)
@@ -0,0 +1,118 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# Largeurs maximales des variantes générées pour chaque image d'article
+IMAGE_VARIANTS = {
+    'thumbnail': 400,   # listes d'articles
+    'medium': 800,      # page de l'article
+    'full': 1600,       # écrans haute densité
+}
+
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """Pool de workers partagé ; sa file interne sert de file de tâches locale"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ARTICLES_IMAGE_WORKERS', 2),
+                thread_name_prefix='article-images',
+            )
+        return _executor
+
+
+def schedule_image_processing(article_id):
+    """
+    Planifie la génération des variantes après le commit de la transaction
+    courante : la requête se termine dès que l'original est enregistré.
+    """
+    if getattr(settings, 'ARTICLES_IMAGE_PROCESSING_EAGER', False):
+        transaction.on_commit(lambda: process_article_image(article_id))
+    else:
+        transaction.on_commit(lambda: _get_executor().submit(_run_task, article_id))
+
+
+def _run_task(article_id):
+    try:
+        process_article_image(article_id)
+    except Exception:
+        logger.exception("Échec du traitement de l'image de l'article %s", article_id)
+    finally:
+        # Les threads du pool ne passent pas par le cycle requête/réponse
+        close_old_connections()
+
+
+def _variant_name(article_id, name, extension):
+    return f'articles/images/variants/{article_id}/{name}.{extension}'
+
+
+def _encode(image, image_format, **params):
+    output = BytesIO()
+    image.save(output, format=image_format, **params)
+    return ContentFile(output.getvalue())
+
+
+def process_article_image(article_id):
+    """Génère les variantes JPEG et WebP de l'image de l'article et enregistre leurs dimensions"""
+    from .cache import invalidate_article
+    from .models import Article
+
+    article = (
+        Article.objects.select_related('category')
+        .only('id', 'slug', 'image', 'category__slug')
+        .filter(pk=article_id)
+        .first()
+    )
+    if article is None or not article.image:
+        return {}
+
+    storage = article.image.storage
+    with article.image.open('rb') as source:
+        original = Image.open(source)
+        original.load()
+    if original.mode not in ('RGB', 'L'):
+        original = original.convert('RGB')
+
+    variants = {}
+    for name, max_width in IMAGE_VARIANTS.items():
+        image = original.copy()
+        if image.width > max_width:
+            height = round(image.height * max_width / image.width)
+            image = image.resize((max_width, height), Image.LANCZOS)
+        files = {
+            'jpeg': _encode(image, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True),
+            'webp': _encode(image, 'WEBP', quality=WEBP_QUALITY, method=4),
+        }
+        variant = {'width': image.width, 'height': image.height}
+        for image_format, content in files.items():
+            path = _variant_name(article.pk, name, 'jpg' if image_format == 'jpeg' else 'webp')
+            if storage.exists(path):
+                storage.delete(path)
+            variant[image_format] = storage.save(path, content)
+        variants[name] = variant
+
+    # Une autre image a pu être téléversée entre-temps : on ne l'écrase pas
+    updated = Article.objects.filter(pk=article.pk, image=article.image.name).update(
+        image_width=original.width,
+        image_height=original.height,
+        image_variants=variants,
+    )
+    if updated:
+        invalidate_article(article.slug, [article.category.slug if article.category else None])
+    return variants
+
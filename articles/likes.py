@@ -0,0 +1,35 @@
+from django.db import IntegrityError, transaction
+
+from .counters import adjust_counter
+from .models import Article, Like
+from .trending import record_interaction
+
+
+def toggle_like(article_id, user):
+    """
+    Ajoute ou retire le like de `user` sur l'article dans une seule transaction.
+    Retourne (liked, likes_count) après l'opération.
+
+    Le like existant est supprimé s'il y en a un, sinon il est inséré. Un
+    double clic concurrent qui insère le même like se heurte à la contrainte
+    unique (article, user) et n'est pas compté deux fois.
+    """
+    with transaction.atomic():
+        like = Like.objects.filter(article_id=article_id, user=user).only('id', 'article_id', 'created_at').first()
+        if like is not None:
+            like.delete()
+            adjust_counter(article_id, 'likes_count', -1)
+            record_interaction(article_id, 'like', at=like.created_at, removed=True)
+            liked = False
+        else:
+            try:
+                with transaction.atomic():
+                    like = Like.objects.create(article_id=article_id, user=user)
+            except IntegrityError:
+                pass
+            else:
+                adjust_counter(article_id, 'likes_count', 1)
+                record_interaction(article_id, 'like', at=like.created_at)
+            liked = True
+        likes_count = Article.objects.filter(pk=article_id).values_list('likes_count', flat=True).get()
+    return liked, likes_count
@@ -0,0 +1,308 @@
+import asyncio
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from asgiref.sync import ThreadSensitiveContext
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from articles.counters import recompute_counters
+from articles.models import Article, Category, Comment
+from users.models import CustomUser
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'inconnu'
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Mesure le débit et la latence (p50/p99) des vues principales sur une base '
+        'de démonstration de taille configurable, et enregistre les résultats en JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200, help='Utilisateurs générés (défaut: 200)')
+        parser.add_argument('--articles', type=int, default=5000, help='Articles générés (défaut: 5000)')
+        parser.add_argument('--comments', type=int, default=10000, help='Commentaires générés (défaut: 10000)')
+        parser.add_argument(
+            '--hot-comments',
+            type=int,
+            default=2000,
+            help='Commentaires ajoutés sur l\'article utilisé pour le scénario de détail (défaut: 2000)'
+        )
+        parser.add_argument('--requests', type=int, default=200, help='Requêtes par scénario (défaut: 200)')
+        parser.add_argument('--concurrency', type=int, default=1, help='Clients simultanés (défaut: 1)')
+        parser.add_argument(
+            '--handler',
+            choices=('wsgi', 'asgi'),
+            default='wsgi',
+            help=(
+                'wsgi : clients dans des threads (défaut) ; asgi : clients concurrents dans une '
+                'boucle asyncio (à lancer avec ARTICLES_ASYNC_VIEWS=1 pour les vues asynchrones)'
+            )
+        )
+        parser.add_argument(
+            '--anonymous',
+            action='store_true',
+            help='Lectures en visiteur anonyme (cache de pages actif) plutôt qu\'en utilisateur connecté'
+        )
+        parser.add_argument(
+            '--database-file',
+            default=str(Path(settings.BASE_DIR) / 'bench' / 'benchmark.sqlite3'),
+            help='Fichier SQLite de la base de benchmark (jamais la base de développement)'
+        )
+        parser.add_argument(
+            '--keepdb',
+            action='store_true',
+            help='Réutiliser la base de benchmark existante (déjà peuplée) et la conserver'
+        )
+        parser.add_argument('--seed', type=int, default=42, help='Graine aléatoire (défaut: 42)')
+        parser.add_argument('--output', help='Fichier JSON de résultats (défaut: bench/results/<date>-<commit>.json)')
+        parser.add_argument('--compare', help='Fichier JSON d\'un précédent benchmark à comparer')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Le benchmark crée une base SQLite dédiée : base "default" SQLite requise.')
+        random.seed(options['seed'])
+        if options['handler'] == 'asgi' and not settings.ARTICLES_ASYNC_VIEWS:
+            self.stdout.write(self.style.WARNING(
+                "⚠️  ARTICLES_ASYNC_VIEWS n'est pas activé : le gestionnaire ASGI servira les vues synchrones"
+            ))
+
+        database_file = Path(options['database_file'])
+        database_file.parent.mkdir(parents=True, exist_ok=True)
+        keepdb = options['keepdb']
+
+        setup_test_environment()
+        connection.settings_dict['TEST']['NAME'] = str(database_file)
+        old_name = connection.settings_dict['NAME']
+        # La base de benchmark remplace « default » le temps de la mesure
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+        try:
+            with override_settings(CACHES=LOCMEM_CACHE, DEBUG=False):
+                if not (keepdb and Article.objects.exists()):
+                    self.seed(options)
+                results = self.run_scenarios(options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+            teardown_test_environment()
+
+        self.report(results, options)
+
+    # Données ------------------------------------------------------------------
+
+    def seed(self, options):
+        self.stdout.write("🌱 Génération de la base de benchmark...")
+        started = time.perf_counter()
+        if not Category.objects.exists():
+            call_command('load_categories', stdout=io.StringIO())
+        call_command(
+            'load_demo_data',
+            fast=True, force=True,
+            users=options['users'], articles=options['articles'], comments=options['comments'],
+            stdout=io.StringIO(),
+        )
+        # Un article très commenté pour le scénario de détail
+        hot = Article.objects.order_by('id').first()
+        user_ids = list(CustomUser.objects.values_list('id', flat=True))
+        Comment.objects.bulk_create([
+            Comment(article=hot, author_id=random.choice(user_ids), content=f'Commentaire de charge {i}')
+            for i in range(options['hot_comments'])
+        ], batch_size=2000)
+        recompute_counters(Article.objects.filter(pk=hot.pk))
+        self.stdout.write(f"   base prête en {time.perf_counter() - started:.1f} s")
+
+    # Scénarios ----------------------------------------------------------------
+
+    def scenarios(self):
+        hot = Article.objects.order_by('id').first()
+        category = Category.objects.order_by('-id').first()
+        last_page = max(1, Article.objects.count() // 10)
+        user = CustomUser.objects.get(username='admin')
+        toggle_url = reverse('article_like_toggle', kwargs={'slug': hot.slug})
+        return user, [
+            ('article_list', 'get', reverse('article_list'), {}),
+            ('article_list_category', 'get', reverse('article_list'), {'category': category.slug}),
+            ('article_list_search', 'get', reverse('article_list'), {'q': 'découverte'}),
+            ('article_list_deep_page', 'get', reverse('article_list'), {'page': last_page}),
+            ('article_detail_hot', 'get', hot.get_absolute_url(), {}),
+            ('article_like_toggle', 'post', toggle_url, {}),
+            ('comment_create', 'post', hot.get_absolute_url(), {'content': 'Commentaire de benchmark'}),
+        ]
+
+    def run_scenarios(self, options):
+        user, scenarios = self.scenarios()
+        results = {}
+        for name, method, url, data in scenarios:
+            is_write = method == 'post'
+            authenticated = is_write or not options['anonymous']
+            self.stdout.write(f"⏱️  {name}...")
+            measure = self.measure_async if options['handler'] == 'asgi' else self.measure
+            results[name] = measure(
+                url, method, data, user if authenticated else None,
+                options['requests'], options['concurrency'],
+            )
+        return results
+
+    def measure(self, url, method, data, user, total, concurrency):
+        def worker(count):
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            samples, queries, errors = [], [], 0
+            for _ in range(count):
+                started = time.perf_counter()
+                try:
+                    response = getattr(client, method)(url, data)
+                except Exception:
+                    errors += 1
+                    continue
+                samples.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+                queries.append(int(response.get('X-Query-Count', 0)))
+            connections.close_all()
+            return samples, queries, errors
+
+        shares = self.shares(total, concurrency)
+        started = time.perf_counter()
+        if concurrency == 1:
+            outcomes = [worker(total)]
+        else:
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                outcomes = list(executor.map(worker, shares))
+        return self.summarize(total, outcomes, time.perf_counter() - started)
+
+    def measure_async(self, url, method, data, user, total, concurrency):
+        """Mêmes mesures, `concurrency` clients asynchrones partageant une boucle d'événements"""
+        async def worker(count):
+            client = AsyncClient()
+            if user is not None:
+                await client.aforce_login(user)
+            samples, queries, errors = [], [], 0
+            for _ in range(count):
+                started = time.perf_counter()
+                try:
+                    # Comme ASGIHandler : le code synchrone d'une requête a son propre thread
+                    async with ThreadSensitiveContext():
+                        response = await getattr(client, method)(url, data)
+                except Exception:
+                    errors += 1
+                    continue
+                samples.append((time.perf_counter() - started) * 1000)
+                if response.status_code >= 400:
+                    errors += 1
+                queries.append(int(response.get('X-Query-Count', 0)))
+            return samples, queries, errors
+
+        async def run():
+            started = time.perf_counter()
+            outcomes = await asyncio.gather(*(worker(share) for share in self.shares(total, concurrency)))
+            return outcomes, time.perf_counter() - started
+
+        outcomes, elapsed = asyncio.run(run())
+        connections.close_all()
+        return self.summarize(total, outcomes, elapsed)
+
+    def shares(self, total, concurrency):
+        return [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+
+    def summarize(self, total, outcomes, elapsed):
+        samples = [sample for outcome in outcomes for sample in outcome[0]]
+        queries = [count for outcome in outcomes for count in outcome[1]]
+        errors = sum(outcome[2] for outcome in outcomes)
+        if not samples:
+            return {'requests': total, 'errors': errors}
+        return {
+            'requests': total,
+            'errors': errors,
+            'throughput_rps': round(len(samples) / elapsed, 1),
+            'mean_ms': round(statistics.fmean(samples), 2),
+            'p50_ms': round(percentile(samples, 0.50), 2),
+            'p90_ms': round(percentile(samples, 0.90), 2),
+            'p99_ms': round(percentile(samples, 0.99), 2),
+            'max_ms': round(max(samples), 2),
+            'mean_queries': round(statistics.fmean(queries), 2),
+        }
+
+    # Résultats ----------------------------------------------------------------
+
+    def report(self, results, options):
+        commit = git_commit()
+        payload = {
+            'meta': {
+                'commit': commit,
+                'date': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': connection.Database.sqlite_version,
+                'dataset': {
+                    key: options[key] for key in ('users', 'articles', 'comments', 'hot_comments')
+                },
+                'requests': options['requests'],
+                'concurrency': options['concurrency'],
+                'handler': options['handler'],
+                'async_views': settings.ARTICLES_ASYNC_VIEWS,
+                'anonymous': options['anonymous'],
+                'seed': options['seed'],
+            },
+            'scenarios': results,
+        }
+
+        output = options['output']
+        if not output:
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+            output = Path(settings.BASE_DIR) / 'bench' / 'results' / f'{stamp}-{commit}.json'
+        output = Path(output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+
+        previous = {}
+        if options['compare']:
+            previous = json.loads(Path(options['compare']).read_text())['scenarios']
+
+        self.stdout.write("\n" + "=" * 78)
+        self.stdout.write(f"{'Scénario':<26}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'requêtes':>10}{'erreurs':>9}{'Δ p50':>9}")
+        self.stdout.write("=" * 78)
+        for name, stats in results.items():
+            if 'p50_ms' not in stats:
+                self.stdout.write(f"{name:<26}{'—':>9}{'—':>9}{'—':>9}{'—':>10}{stats['errors']:>9}")
+                continue
+            delta = ''
+            before = previous.get(name, {}).get('p50_ms')
+            if before:
+                delta = f"{(stats['p50_ms'] - before) / before * 100:+.0f}%"
+            self.stdout.write(
+                f"{name:<26}{stats['throughput_rps']:>9}{stats['p50_ms']:>9}{stats['p99_ms']:>9}"
+                f"{stats['mean_queries']:>10}{stats['errors']:>9}{delta:>9}"
+            )
+        self.stdout.write("=" * 78)
+        self.stdout.write(self.style.SUCCESS(f"✅ Résultats enregistrés dans {output}"))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from articles.related import MIN_SCORE, RELATED_COUNT, build_related, refresh_related
+
+
+class Command(BaseCommand):
+    help = 'Construit l\'index des articles similaires (TF-IDF sur les titres et contenus)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Reconstruit tout l\'index (défaut: seulement les articles créés ou modifiés depuis la dernière construction)'
+        )
+        parser.add_argument(
+            '--k',
+            type=int,
+            default=RELATED_COUNT,
+            help=f'Nombre d\'articles similaires par article (défaut: {RELATED_COUNT})'
+        )
+        parser.add_argument(
+            '--min-score',
+            type=float,
+            default=MIN_SCORE,
+            help=f'Similarité cosinus minimale (défaut: {MIN_SCORE})'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            import numpy  # noqa: F401
+            import scipy  # noqa: F401
+        except ImportError:
+            raise CommandError("NumPy et SciPy sont nécessaires : pip install numpy scipy")
+
+        started = time.perf_counter()
+        if options['full']:
+            self.stdout.write("🔗 Reconstruction complète des articles similaires...")
+            count = build_related(options['k'], options['min_score'])
+        else:
+            self.stdout.write("🔗 Mise à jour des articles similaires...")
+            count = refresh_related(options['k'], options['min_score'])
+        elapsed = (time.perf_counter() - started) * 1000
+        self.stdout.write(self.style.SUCCESS(f"✅ {count} article(s) indexé(s) en {elapsed:.0f} ms"))
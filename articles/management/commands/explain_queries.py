@@ -0,0 +1,140 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from articles.archive import month_of
+from articles.models import Article, Category
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+# Tables de référence de quelques lignes : les parcourir en entier est normal
+SMALL_TABLES = {'articles_category', 'django_content_type'}
+
+
+def plan_warnings(sql, plan_lines):
+    """Étapes du plan SQLite révélant un parcours complet de table ou un tri en mémoire"""
+    # Le tri par pertinence (bm25) d'une recherche plein texte ne peut pas venir
+    # d'un index ; il ne porte que sur les articles trouvés par MATCH
+    ranked_search = ' MATCH ' in sql
+    warnings = []
+    for line in plan_lines:
+        words = line.split()
+        if line.startswith('SCAN ') and 'INDEX' not in line and 'VIRTUAL TABLE' not in line:
+            if words[1] not in SMALL_TABLES:
+                warnings.append(line)
+        elif 'USE TEMP B-TREE' in line and not ranked_search:
+            warnings.append(line)
+    return warnings
+
+
+class Command(BaseCommand):
+    help = (
+        'Affiche le plan d\'exécution (EXPLAIN) de chaque requête SQL des vues principales '
+        'et signale les parcours complets de table'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--strict',
+            action='store_true',
+            help='Échouer si une requête parcourt une table entière ou trie en mémoire'
+        )
+        parser.add_argument(
+            '--warnings-only',
+            action='store_true',
+            help='N\'afficher que les requêtes dont le plan est signalé'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Le diagnostic des plans utilise EXPLAIN QUERY PLAN : base SQLite requise.')
+
+        scenarios = self.scenarios()
+        if not scenarios:
+            raise CommandError('Aucun article en base : lancez d\'abord load_demo_data.')
+
+        flagged = 0
+        with override_settings(CACHES=LOCMEM_CACHE, ALLOWED_HOSTS=['testserver'], DEBUG=False):
+            for name, url, params in scenarios:
+                queries = self.capture(url, params)
+                flagged += self.report(name, queries, options['warnings_only'])
+
+        if flagged:
+            message = f"⚠️  {flagged} requête(s) avec un parcours complet ou un tri en mémoire"
+            if options['strict']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS("✅ Toutes les requêtes utilisent un index"))
+
+    def scenarios(self):
+        article = Article.objects.order_by('-comments_count', '-id').first()
+        if article is None:
+            return []
+        category = (
+            Category.objects.annotate(total=Count('article')).order_by('-total').first()
+        )
+        word = next((word for word in article.title.split() if len(word) > 3), article.title.split()[0])
+        list_url = reverse('article_list')
+        scenarios = [
+            ('article_list', list_url, {}),
+            ('article_list (page 3)', list_url, {'page': 3}),
+            ('article_list (curseur)', list_url, {'pagination': 'cursor'}),
+            ('article_list (recherche)', list_url, {'q': word}),
+            ('article_detail', article.get_absolute_url(), {}),
+            ('article_comments', reverse('article_comments', kwargs={'slug': article.slug}), {}),
+            ('article_trending', reverse('article_trending'), {}),
+            ('article_most_liked', reverse('article_most_liked'), {}),
+            ('article_archive', reverse('article_archive'), {}),
+            ('article_archive_month', reverse('article_archive_month', args=month_of(article.created_at)), {}),
+        ]
+        if category is not None:
+            scenarios.insert(3, ('article_list (catégorie)', list_url, {'category': category.slug}))
+        return scenarios
+
+    def capture(self, url, params):
+        """Requêtes SELECT exécutées par une requête GET anonyme sur `url`"""
+        queries = []
+
+        def wrapper(execute, sql, sql_params, many, context):
+            # Les requêtes d'introspection (sqlite_master) ne concernent pas les vues
+            if not many and sql.lstrip().upper().startswith('SELECT') and 'sqlite_master' not in sql:
+                queries.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        with connection.execute_wrapper(wrapper):
+            response = Client().get(url, params)
+        if response.status_code != 200:
+            raise CommandError(f"{url} a répondu {response.status_code}")
+        return queries
+
+    def explain(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            rows = cursor.fetchall()
+        # Colonnes (id, parent, notused, detail) : l'indentation reflète l'arbre du plan
+        depth = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depth[node_id] = depth.get(parent, -1) + 1
+            lines.append(('  ' * depth[node_id], detail))
+        return lines
+
+    def report(self, name, queries, warnings_only):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {name} ({len(queries)} requêtes)"))
+        flagged = 0
+        for sql, params in queries:
+            plan = self.explain(sql, params)
+            warnings = plan_warnings(sql, [detail for _, detail in plan])
+            if warnings:
+                flagged += 1
+            elif warnings_only:
+                continue
+            self.stdout.write(f"\n{sql[:200]}{'…' if len(sql) > 200 else ''}")
+            for indent, detail in plan:
+                line = f"  {indent}{detail}"
+                self.stdout.write(self.style.WARNING(line) if detail in warnings else line)
+        return flagged
@@ -1,14 +1,101 @@
 from django.core.management.base import BaseCommand
 from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Max
 from django.utils import timezone
 from datetime import timedelta
+from multiprocessing import Pool
 import random
+import time
 from faker import Faker
 
+from articles.archive import recompute_archive
+from articles.cache import invalidate_all
+from articles.counters import reconcile_counters, recompute_category_counts, recompute_counters
 from articles.models import Category, Article, Comment, Like
+from articles.rendering import RENDERER_VERSION, content_hash, make_excerpt, render_markdown
+from articles.slugs import allocate_slugs
+from articles.trending import recompute_trending
 from users.models import CustomUser
 
 
+# Contenu d'exemple pour les articles
+ARTICLE_CONTENTS = [
+    "Cet article explore les dernières avancées technologiques qui révolutionnent notre quotidien. "
+    "De l'intelligence artificielle aux énergies renouvelables, découvrez comment l'innovation "
+    "transforme notre monde.",
+
+    "La science moderne nous révèle des secrets fascinants sur l'univers qui nous entoure. "
+    "Des découvertes récentes en astrophysique aux avancées en biologie moléculaire, "
+    "chaque jour apporte son lot de surprises.",
+
+    "Prendre soin de sa santé est essentiel pour une vie équilibrée. "
+    "Cet article vous propose des conseils pratiques et des informations "
+    "pour maintenir votre bien-être physique et mental.",
+
+    "L'éducation est la clé d'un avenir prometteur. "
+    "Découvrez les nouvelles méthodes d'apprentissage et les outils "
+    "qui facilitent l'acquisition de connaissances.",
+
+    "Partez à la découverte de destinations extraordinaires à travers le monde. "
+    "De la culture locale aux paysages époustouflants, "
+    "chaque voyage est une aventure unique.",
+
+    "La cuisine est un art qui réveille tous nos sens. "
+    "Explorez des recettes traditionnelles et modernes "
+    "qui vous feront voyager à travers les saveurs du monde.",
+
+    "Le sport est bien plus qu'une simple activité physique. "
+    "Il développe la discipline, la persévérance et l'esprit d'équipe. "
+    "Découvrez comment intégrer le sport dans votre routine quotidienne.",
+
+    "La musique a le pouvoir de toucher nos âmes et de transcender les frontières. "
+    "Explorez différents genres musicaux et découvrez "
+    "comment la musique influence notre humeur et notre créativité.",
+
+    "Le cinéma nous transporte dans des mondes imaginaires et nous fait vivre "
+    "des émotions intenses. Découvrez les chefs-d'œuvre du 7ème art "
+    "et leur impact sur notre culture.",
+
+    "La littérature ouvre les portes de l'imagination et nous permet "
+    "d'explorer des univers infinis. Plongez dans des œuvres "
+    "qui ont marqué l'histoire de la littérature mondiale."
+]
+
+# Contenu d'exemple pour les commentaires
+COMMENT_CONTENTS = [
+    "Excellent article, très instructif !",
+    "Merci pour ces informations utiles.",
+    "Je ne suis pas d'accord avec certains points, mais c'est intéressant.",
+    "Très bien écrit et facile à comprendre.",
+    "Cela m'a donné envie d'en savoir plus sur le sujet.",
+    "Article passionnant, j'ai appris beaucoup de choses.",
+    "Bonne approche du sujet, continuez comme ça !",
+    "Je partage complètement votre point de vue.",
+    "Cela m'a fait réfléchir différemment.",
+    "Merci pour ce partage d'expérience."
+]
+
+
+def generate_article_rows(task):
+    """
+    Génère `count` articles (titre, contenu, rendu HTML, extrait, empreinte).
+    Exécutée dans les processus de --workers : Faker et Markdown sont le
+    principal coût de la génération.
+    """
+    seed, count = task
+    fake = Faker(['fr_FR'])
+    fake.seed_instance(seed)
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        title = fake.sentence(nb_words=6, variable_nb_words=True)
+        content = rng.choice(ARTICLE_CONTENTS) + " " + fake.paragraph(nb_sentences=3)
+        html = render_markdown(content)
+        rows.append((title, content, html, make_excerpt(html), content_hash(content)))
+    return rows
+
+
 class Command(BaseCommand):
     help = 'Charge des données de démonstration : utilisateurs, articles, commentaires et likes'
 
@@ -36,6 +123,23 @@ class Command(BaseCommand):
             action='store_true',
             help='Forcer la création même si des données existent déjà'
         )
+        parser.add_argument(
+            '--fast',
+            action='store_true',
+            help='Mode rapide : insertions groupées (bulk_create), pour générer de gros volumes'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=2000,
+            help='Taille des lots insérés en mode rapide (défaut: 2000)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de processus générant les articles en mode rapide (défaut: 1)'
+        )
 
     def handle(self, *args, **options):
         fake = Faker(['fr_FR'])
@@ -67,6 +171,14 @@ class Command(BaseCommand):
             )
             return
 
+        if options['fast']:
+            self.load_fast(
+                fake, num_users, num_articles, num_comments,
+                batch_size=options['batch_size'], workers=options['workers'],
+            )
+            self.print_summary()
+            return
+
         # 1. CRÉER LES UTILISATEURS
         self.stdout.write("👥 Création des utilisateurs...")
         users = []
@@ -116,48 +228,6 @@ class Command(BaseCommand):
         articles = []
         categories = list(Category.objects.all())
         
-        # Contenu d'exemple pour les articles
-        article_contents = [
-            "Cet article explore les dernières avancées technologiques qui révolutionnent notre quotidien. "
-            "De l'intelligence artificielle aux énergies renouvelables, découvrez comment l'innovation "
-            "transforme notre monde.",
-            
-            "La science moderne nous révèle des secrets fascinants sur l'univers qui nous entoure. "
-            "Des découvertes récentes en astrophysique aux avancées en biologie moléculaire, "
-            "chaque jour apporte son lot de surprises.",
-            
-            "Prendre soin de sa santé est essentiel pour une vie équilibrée. "
-            "Cet article vous propose des conseils pratiques et des informations "
-            "pour maintenir votre bien-être physique et mental.",
-            
-            "L'éducation est la clé d'un avenir prometteur. "
-            "Découvrez les nouvelles méthodes d'apprentissage et les outils "
-            "qui facilitent l'acquisition de connaissances.",
-            
-            "Partez à la découverte de destinations extraordinaires à travers le monde. "
-            "De la culture locale aux paysages époustouflants, "
-            "chaque voyage est une aventure unique.",
-            
-            "La cuisine est un art qui réveille tous nos sens. "
-            "Explorez des recettes traditionnelles et modernes "
-            "qui vous feront voyager à travers les saveurs du monde.",
-            
-            "Le sport est bien plus qu'une simple activité physique. "
-            "Il développe la discipline, la persévérance et l'esprit d'équipe. "
-            "Découvrez comment intégrer le sport dans votre routine quotidienne.",
-            
-            "La musique a le pouvoir de toucher nos âmes et de transcender les frontières. "
-            "Explorez différents genres musicaux et découvrez "
-            "comment la musique influence notre humeur et notre créativité.",
-            
-            "Le cinéma nous transporte dans des mondes imaginaires et nous fait vivre "
-            "des émotions intenses. Découvrez les chefs-d'œuvre du 7ème art "
-            "et leur impact sur notre culture.",
-            
-            "La littérature ouvre les portes de l'imagination et nous permet "
-            "d'explorer des univers infinis. Plongez dans des œuvres "
-            "qui ont marqué l'histoire de la littérature mondiale."
-        ]
 
         for i in range(num_articles):
             # Choisir une catégorie aléatoire
@@ -168,7 +238,7 @@ class Command(BaseCommand):
             
             # Créer un titre et un contenu
             title = fake.sentence(nb_words=6, variable_nb_words=True)
-            content = random.choice(article_contents) + " " + fake.paragraph(nb_sentences=3)
+            content = random.choice(ARTICLE_CONTENTS) + " " + fake.paragraph(nb_sentences=3)
             
             # Créer des dates aléatoires dans les 30 derniers jours
             days_ago = random.randint(0, 30)
@@ -191,18 +261,6 @@ class Command(BaseCommand):
 
         # 3. CRÉER LES COMMENTAIRES
         self.stdout.write("💬 Création des commentaires...")
-        comment_contents = [
-            "Excellent article, très instructif !",
-            "Merci pour ces informations utiles.",
-            "Je ne suis pas d'accord avec certains points, mais c'est intéressant.",
-            "Très bien écrit et facile à comprendre.",
-            "Cela m'a donné envie d'en savoir plus sur le sujet.",
-            "Article passionnant, j'ai appris beaucoup de choses.",
-            "Bonne approche du sujet, continuez comme ça !",
-            "Je partage complètement votre point de vue.",
-            "Cela m'a fait réfléchir différemment.",
-            "Merci pour ce partage d'expérience."
-        ]
 
         for i in range(num_comments):
             # Choisir un article et un auteur aléatoires
@@ -210,7 +268,7 @@ class Command(BaseCommand):
             author = random.choice(users)
             
             # Créer un contenu de commentaire
-            content = random.choice(comment_contents)
+            content = random.choice(COMMENT_CONTENTS)
             
             # Créer une date aléatoire après la création de l'article
             days_after_article = random.randint(0, 20)
@@ -250,7 +308,14 @@ class Command(BaseCommand):
                     
         self.stdout.write(f"✅ {likes_created} likes créés\n")
 
+        # Les compteurs dénormalisés et les tendances ne sont pas tenus à jour par .create()
+        reconcile_counters()
+        recompute_trending()
+
         # 5. AFFICHER LE RÉSUMÉ
+        self.print_summary()
+
+    def print_summary(self):
         self.stdout.write("\n" + "="*50)
         self.stdout.write("📊 RÉSUMÉ DES DONNÉES CRÉÉES")
         self.stdout.write("="*50)
@@ -275,3 +340,160 @@ class Command(BaseCommand):
         self.stdout.write("   1. Démarrer le serveur : python manage.py runserver")
         self.stdout.write("   2. Accéder à l'admin : http://127.0.0.1:8000/admin/")
         self.stdout.write("   3. Explorer vos articles et commentaires !")
+
+
+    # Mode rapide ---------------------------------------------------------------
+
+    def report(self, label, done, total, started):
+        """Progression d'une étape, avec le débit en lignes par seconde"""
+        elapsed = max(time.perf_counter() - started, 1e-6)
+        progress = f"{done}/{total}" if total is not None else f"{done}"
+        self.stdout.write(f"   {progress} {label} ({done / elapsed:.0f} lignes/s)")
+
+    def get_admin(self):
+        admin_user, created = CustomUser.objects.get_or_create(
+            username='admin',
+            defaults={
+                'email': 'admin@example.com',
+                'first_name': 'Administrateur',
+                'last_name': 'Système',
+                'is_staff': True,
+                'is_superuser': True,
+                'password': make_password('admin123')
+            }
+        )
+        if created:
+            self.stdout.write(
+                self.style.SUCCESS(f"✅ Utilisateur admin créé : admin/admin123")
+            )
+        return admin_user
+
+    def set_dates(self, model, objects, dates, *fields):
+        """
+        Pose les dates générées sur des lignes tout juste insérées. bulk_create
+        applique auto_now_add et auto_now (pre_save) et écraserait toute date
+        passée au constructeur ; bulk_update écrit les valeurs telles quelles,
+        par lots d'UPDATE ... CASE.
+        """
+        for obj, date in zip(objects, dates):
+            for field in fields:
+                setattr(obj, field, date)
+        model.objects.bulk_update(objects, fields)
+
+    def load_fast(self, fake, num_users, num_articles, num_comments, batch_size, workers):
+        # 1. UTILISATEURS : un seul hachage PBKDF2 partagé par tous les comptes
+        self.stdout.write("👥 Création des utilisateurs (mode rapide)...")
+        user_ids = [self.get_admin().pk]
+        password = make_password('password123')
+        # Suffixe numérique : unicité garantie sans dépendre de fake.unique
+        offset = CustomUser.objects.aggregate(last=Max('id'))['last'] or 0
+        started = time.perf_counter()
+        for start in range(0, num_users, batch_size):
+            users = []
+            for i in range(start, min(start + batch_size, num_users)):
+                number = offset + i + 1
+                username = f"{fake.user_name()}{number}"
+                users.append(CustomUser(
+                    username=username,
+                    email=f"{username}@example.com",
+                    first_name=fake.first_name(),
+                    last_name=fake.last_name(),
+                    password=password,
+                    is_active=True,
+                ))
+            with transaction.atomic():
+                user_ids += [user.pk for user in CustomUser.objects.bulk_create(users)]
+            self.report("utilisateurs", min(start + batch_size, num_users), num_users, started)
+
+        # 2. ARTICLES : générés (Faker + rendu Markdown) dans --workers processus
+        self.stdout.write("📝 Création des articles (mode rapide)...")
+        category_ids = list(Category.objects.values_list('id', flat=True))
+        base_seed = random.randrange(2 ** 32)
+        tasks = [
+            (base_seed + start, min(batch_size, num_articles - start))
+            for start in range(0, num_articles, batch_size)
+        ]
+        article_dates = {}
+        now = timezone.now()
+        created = 0
+        started = time.perf_counter()
+        pool = Pool(workers) if workers > 1 else None
+        try:
+            batches = pool.imap(generate_article_rows, tasks) if pool else map(generate_article_rows, tasks)
+            for rows in batches:
+                articles = []
+                dates = []
+                for title, content, html, excerpt, digest in rows:
+                    dates.append(now - timedelta(days=random.randint(0, 30), seconds=random.randint(0, 86399)))
+                    articles.append(Article(
+                        title=title,
+                        content=content,
+                        content_html=html,
+                        excerpt=excerpt,
+                        content_hash=digest,
+                        renderer_version=RENDERER_VERSION,
+                        author_id=random.choice(user_ids),
+                        category_id=random.choice(category_ids),
+                    ))
+                with transaction.atomic():
+                    # Slugs attribués dans la transaction d'insertion (voir articles.slugs)
+                    slugs = allocate_slugs(Article.objects.all(), [article.title for article in articles], 'article')
+                    for article, slug in zip(articles, slugs):
+                        article.slug = slug
+                    Article.objects.bulk_create(articles)
+                    self.set_dates(Article, articles, dates, 'created_at', 'updated_at')
+                for article in articles:
+                    article_dates[article.pk] = article.created_at
+                created += len(articles)
+                self.report("articles", created, num_articles, started)
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
+
+        article_ids = list(article_dates)
+        if not article_ids:
+            return
+
+        # 3. COMMENTAIRES
+        self.stdout.write("💬 Création des commentaires (mode rapide)...")
+        started = time.perf_counter()
+        for start in range(0, num_comments, batch_size):
+            comments = []
+            dates = []
+            for _ in range(min(batch_size, num_comments - start)):
+                article_id = random.choice(article_ids)
+                dates.append(min(article_dates[article_id] + timedelta(days=random.randint(0, 20)), now))
+                comments.append(Comment(
+                    article_id=article_id,
+                    author_id=random.choice(user_ids),
+                    content=random.choice(COMMENT_CONTENTS),
+                ))
+            with transaction.atomic():
+                Comment.objects.bulk_create(comments)
+                self.set_dates(Comment, comments, dates, 'created_at')
+            self.report("commentaires", start + len(comments), num_comments, started)
+
+        # 4. LIKES : entre 0 et 8 par article, la contrainte unique écarte les doublons
+        self.stdout.write("❤️ Création des likes (mode rapide)...")
+        started = time.perf_counter()
+        likes = []
+        likes_created = 0
+        for article_id in article_ids:
+            for user_id in random.sample(user_ids, min(random.randint(0, 8), len(user_ids))):
+                likes.append(Like(article_id=article_id, user_id=user_id))
+            if len(likes) >= batch_size or article_id == article_ids[-1]:
+                with transaction.atomic():
+                    Like.objects.bulk_create(likes, ignore_conflicts=True)
+                likes_created += len(likes)
+                likes = []
+                self.report("likes", likes_created, None, started)
+
+        # bulk_create ne déclenche aucun signal : compteurs et cache sont remis à jour ici
+        self.stdout.write("🔄 Mise à jour des compteurs...")
+        with transaction.atomic():
+            recompute_counters(Article.objects.filter(id__gte=min(article_ids)))
+            recompute_category_counts()
+        recompute_archive()
+        recompute_trending()
+        invalidate_all()
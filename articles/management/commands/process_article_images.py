@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from articles.images import process_article_image
+from articles.models import Article
+
+
+class Command(BaseCommand):
+    help = 'Génère les variantes redimensionnées (JPEG et WebP) des images d\'articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Régénérer les variantes de toutes les images, pas seulement celles qui en sont dépourvues'
+        )
+
+    def handle(self, *args, **options):
+        articles = Article.objects.exclude(image='').exclude(image__isnull=True)
+        if not options['all']:
+            articles = articles.filter(image_variants={})
+        article_ids = list(articles.order_by('id').values_list('id', flat=True))
+
+        self.stdout.write(f"🖼️ Traitement de {len(article_ids)} image(s)...")
+        processed = 0
+        for article_id in article_ids:
+            try:
+                process_article_image(article_id)
+            except OSError as exc:
+                self.stdout.write(self.style.WARNING(f"⚠️ Article {article_id} ignoré : {exc}"))
+                continue
+            processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"✅ {processed} image(s) traitée(s)"))
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from articles.search import ensure_search_index, optimize_search_index, rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit l\'index de recherche plein texte (FTS5) des articles'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Base de données à utiliser (défaut: "default")'
+        )
+        parser.add_argument(
+            '--optimize',
+            action='store_true',
+            help='Fusionner les segments de l\'index après la reconstruction'
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+
+        if not ensure_search_index(using):
+            raise CommandError(
+                'Index FTS5 indisponible sur cette base de données : '
+                'la recherche utilise le mode de repli (icontains). '
+                'Exécutez "python manage.py migrate" sur une base SQLite avec FTS5.'
+            )
+
+        self.stdout.write("🔄 Reconstruction de l'index de recherche...")
+        rebuild_search_index(using)
+        if options['optimize']:
+            optimize_search_index(using)
+
+        self.stdout.write(self.style.SUCCESS("✅ Index de recherche reconstruit"))
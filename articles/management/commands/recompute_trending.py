@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from articles.cache import invalidate_scopes, list_scope
+from articles.trending import HORIZON_HALF_LIVES, TRENDING_HALF_LIFE_HOURS, recompute_trending
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les scores de tendance des articles à partir des likes et commentaires récents'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre de lignes lues et écrites par lot (défaut: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"🔥 Recalcul des tendances (interactions des {TRENDING_HALF_LIFE_HOURS * HORIZON_HALF_LIVES} "
+            f"dernières heures)..."
+        )
+        ranked = recompute_trending(batch_size=options['batch_size'])
+        # Les pages de classement en cache affichent les anciens scores
+        invalidate_scopes(list_scope())
+        self.stdout.write(self.style.SUCCESS(f"✅ {ranked} article(s) classé(s)"))
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from articles.archive import recompute_archive
+from articles.cache import invalidate_category_counts
+from articles.counters import reconcile_counters, recompute_category_counts
+
+
+class Command(BaseCommand):
+    help = 'Recalcule les compteurs de likes et de commentaires des articles, et d\'articles des catégories et des mois d\'archive'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Nombre d\'articles traités par lot (défaut: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("🔄 Vérification des compteurs des articles...")
+        scanned, fixed = reconcile_counters(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ {scanned} articles vérifiés, {fixed} compteur(s) corrigé(s)")
+        )
+        categories = recompute_category_counts()
+        months = recompute_archive(batch_size=options['batch_size'])
+        # Les listes et les archives affichent ces compteurs
+        invalidate_category_counts()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {categories} catégorie(s) et {months} mois d'archive recomptés"
+        ))
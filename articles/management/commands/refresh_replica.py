@@ -0,0 +1,58 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.replicas import refresh_replica, replica_alias
+from .sqlite_health import human_size
+
+
+class Command(BaseCommand):
+    help = 'Recopie la base principale dans le réplica en lecture (API de sauvegarde de SQLite)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            help='Alias du réplica (défaut: settings.READ_REPLICA, ou "replica")'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Recopie toutes les N secondes jusqu\'à interruption (défaut: une seule copie)'
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=-1,
+            help='Pages copiées par étape, avec une pause entre deux étapes (défaut: tout en une étape)'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0.01,
+            help='Pause en secondes entre deux étapes de copie (défaut: 0.01)'
+        )
+
+    def handle(self, *args, **options):
+        alias = options['database'] or replica_alias() or 'replica'
+        if alias not in connections or alias == 'default':
+            raise CommandError(f"Réplica inconnu : {alias}")
+        if connections[alias].vendor != 'sqlite':
+            raise CommandError(f"La base {alias} n'est pas une base SQLite.")
+
+        interval = options['interval']
+        try:
+            while True:
+                started = time.perf_counter()
+                refresh_replica(alias, pages=options['pages'], sleep=options['sleep'])
+                elapsed = (time.perf_counter() - started) * 1000
+                size = connections[alias].settings_dict['NAME'].stat().st_size
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Réplica {alias} recopié en {elapsed:.0f} ms ({human_size(size)})"
+                ))
+                if not interval:
+                    break
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt du rafraîchissement du réplica.")
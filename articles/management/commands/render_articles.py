@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from articles.models import Article
+from articles.rendering import RENDERER_VERSION
+
+
+class Command(BaseCommand):
+    help = 'Pré-calcule (ou recalcule) le rendu HTML du contenu Markdown des articles par lots'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Nombre d\'articles traités par lot (défaut: 500)'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Re-rendre tous les articles, même ceux qui sont à jour'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        force = options['force']
+
+        self.stdout.write(
+            f"🔄 Rendu Markdown des articles (version du moteur : {RENDERER_VERSION})..."
+        )
+
+        fields = ['content_html', 'excerpt', 'content_hash', 'renderer_version']
+        queryset = Article.objects.only('id', 'content', *fields).order_by('id')
+        last_id = 0
+        scanned = 0
+        rendered = 0
+
+        # Parcours par clé primaire : chaque lot est une requête indexée,
+        # quelle que soit la taille de la table
+        while True:
+            batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1].id
+            scanned += len(batch)
+
+            changed = [article for article in batch if article.render_content(force=force)]
+            if changed:
+                with transaction.atomic():
+                    Article.objects.bulk_update(changed, fields)
+                rendered += len(changed)
+
+            self.stdout.write(f"   {scanned} articles parcourus, {rendered} re-rendus")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"✅ {rendered} article(s) re-rendu(s) sur {scanned}")
+        )
@@ -0,0 +1,66 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from blog.sqlite import sqlite_status
+
+
+def human_size(size):
+    for unit in ('o', 'Ko', 'Mo', 'Go'):
+        if size < 1024 or unit == 'Go':
+            return f"{size:.0f} {unit}" if unit == 'o' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class Command(BaseCommand):
+    help = 'Affiche l\'état de la base SQLite : PRAGMA effectifs, taille du journal WAL et checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base (défaut: default)')
+        parser.add_argument(
+            '--checkpoint',
+            choices=('none', 'passive', 'full', 'restart', 'truncate'),
+            default='passive',
+            help=(
+                'Checkpoint à lancer : passive (défaut, ne bloque personne), full, restart, '
+                'truncate (ramène le fichier WAL à zéro octet) ou none'
+            )
+        )
+        parser.add_argument('--json', action='store_true', help='Sortie JSON')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f"La base {options['database']} n'est pas une base SQLite.")
+        checkpoint = None if options['checkpoint'] == 'none' else options['checkpoint'].upper()
+        status = sqlite_status(connection, checkpoint=checkpoint)
+
+        if options['json']:
+            self.stdout.write(json.dumps(status, indent=2))
+            return
+
+        self.stdout.write(f"🗄️  {status['path']} (SQLite {status['sqlite_version']})")
+        self.stdout.write(f"   Base : {human_size(status['database_bytes'])} "
+                          f"({status['page_count']} pages de {status['page_size']} o, "
+                          f"{status['freelist_count']} libres)")
+        self.stdout.write(f"   Journal WAL : {human_size(status['wal_bytes'])}, "
+                          f"mémoire partagée : {human_size(status['shm_bytes'])}")
+        self.stdout.write(
+            f"   PRAGMA : journal_mode={status['journal_mode']} synchronous={status['synchronous']} "
+            f"busy_timeout={status['busy_timeout']} cache_size={status['cache_size']} "
+            f"mmap_size={status['mmap_size']} wal_autocheckpoint={status['wal_autocheckpoint']}"
+        )
+        if status['journal_mode'] != 'wal':
+            self.stdout.write(self.style.WARNING("⚠️  La base n'est pas en mode WAL : exécutez python manage.py migrate"))
+
+        result = status.get('checkpoint')
+        if result:
+            line = (
+                f"   Checkpoint {result['mode']} : {result['checkpointed_frames']}/{result['wal_frames']} "
+                f"pages du journal reportées dans la base"
+            )
+            if result['busy']:
+                self.stdout.write(self.style.WARNING(line + " (bloqué par un lecteur ou un écrivain)"))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
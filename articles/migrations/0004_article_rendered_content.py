@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+from django.db import migrations, models
+
+from articles.rendering import RENDERER_VERSION, content_hash, render_markdown
+
+
+def render_existing_articles(apps, schema_editor):
+    """
+    Pré-calcule le rendu des articles existants : sans lui, ils resteraient
+    vides jusqu'à l'ouverture de leur page. Écrit par bulk_update, sans
+    passer par save() ni toucher à `updated_at`.
+    """
+    Article = apps.get_model('articles', 'Article')
+    queryset = Article.objects.only('id', 'content').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:500])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for article in batch:
+            article.content_html = render_markdown(article.content)
+            article.content_hash = content_hash(article.content)
+            article.renderer_version = RENDERER_VERSION
+        Article.objects.bulk_update(batch, ['content_html', 'content_hash', 'renderer_version'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_like'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='content_html',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='renderer_version',
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(render_existing_articles, migrations.RunPython.noop),
+    ]
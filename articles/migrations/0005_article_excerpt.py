@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+from articles.rendering import make_excerpt
+
+
+def backfill_excerpts(apps, schema_editor):
+    """
+    Extrait des articles existants, tiré du rendu HTML (0004) : la liste ne
+    lit que ce champ et ne rend jamais un article qu'on n'a pas ouvert.
+    """
+    Article = apps.get_model('articles', 'Article')
+    queryset = Article.objects.only('id', 'content_html').order_by('id')
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:500])
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for article in batch:
+            article.excerpt = make_excerpt(article.content_html)
+        Article.objects.bulk_update(batch, ['excerpt'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0004_article_rendered_content'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False),
+        ),
+        migrations.RunPython(backfill_excerpts, migrations.RunPython.noop),
+    ]
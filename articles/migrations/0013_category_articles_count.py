@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_articles_count(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    Category = apps.get_model('articles', 'Category')
+    Category.objects.update(
+        articles_count=Coalesce(
+            Subquery(
+                Article.objects.filter(category=OuterRef('pk'))
+                .order_by()
+                .values('category')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            Value(0),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0012_related_articles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='articles_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_articles_count, migrations.RunPython.noop),
+    ]
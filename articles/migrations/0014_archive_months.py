@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:45
+
+from collections import Counter
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_archive_months(apps, schema_editor):
+    Article = apps.get_model('articles', 'Article')
+    ArchiveMonth = apps.get_model('articles', 'ArchiveMonth')
+    counts = Counter()
+    for created_at in Article.objects.values_list('created_at', flat=True).iterator():
+        local = timezone.localtime(created_at)
+        counts[local.year, local.month] += 1
+    ArchiveMonth.objects.bulk_create([
+        ArchiveMonth(year=year, month=month, articles_count=total)
+        for (year, month), total in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0013_category_articles_count'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchiveMonth',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('articles_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('year', 'month'), name='archive_month_unique')],
+            },
+        ),
+        migrations.RunPython(backfill_archive_months, migrations.RunPython.noop),
+    ]
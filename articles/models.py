@@ -1,15 +1,38 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, router, transaction
 from django.contrib.auth import get_user_model
 from django.urls import reverse
-from django.utils.text import slugify
+from .rendering import RENDERER_VERSION, content_hash, make_excerpt, render_markdown, run_in_markdown_executor
+from .slugs import allocate_slug
+
+
+def _save_with_slug(instance, text, fallback, *args, **kwargs):
+    """
+    Attribue un slug libre puis enregistre, dans la même transaction : deux
+    créations concurrentes ne peuvent pas obtenir le même slug (voir articles.slugs)
+    """
+    model = type(instance)
+    using = kwargs.get('using') or router.db_for_write(model, instance=instance)
+    with transaction.atomic(using=using):
+        instance.slug = allocate_slug(model._default_manager.using(using), text, fallback)
+        instance.save(*args, **kwargs)
+
 
 class Category(models.Model):
     name = models.CharField(max_length=50, unique=True)
     slug = models.SlugField(max_length=100, unique=True)
+    # Compteur dénormalisé, tenu à jour par articles.signals
+    articles_count = models.PositiveIntegerField(default=0, editable=False)
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.name)
+            return _save_with_slug(self, self.name, 'categorie', *args, **kwargs)
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Comme pour Article : un renommage ne réécrit pas le compteur
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'articles_count'
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -22,16 +45,112 @@ class Article(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=250, unique=True)
     content = models.TextField()  # Contenu Markdown
+    content_html = models.TextField(blank=True, editable=False)  # Rendu HTML du contenu
+    content_hash = models.CharField(max_length=64, blank=True, editable=False)
+    excerpt = models.TextField(blank=True, editable=False)  # Extrait texte pour les listes
+    renderer_version = models.PositiveSmallIntegerField(default=0, editable=False)
     image = models.ImageField(upload_to='articles/images/', blank=True, null=True)
+    image_width = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    image_height = models.PositiveIntegerField(null=True, blank=True, editable=False)
+    # Variantes générées en arrière-plan par articles.images :
+    # {nom: {'width', 'height', 'jpeg', 'webp'}}
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     author = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Compteurs dénormalisés, tenus à jour par articles.counters
+    likes_count = models.PositiveIntegerField(default=0, editable=False)
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+
+    COUNTER_FIELDS = ('likes_count', 'comments_count')
+
+    # Premiers segments des routes de articles/urls.py déclarées avant
+    # `<slug:slug>/` : un article de ce slug serait inaccessible
+    RESERVED_SLUGS = frozenset({'create', 'stats', 'trending', 'archive', 'feeds'})
+
+    class Meta:
+        indexes = [
+            # Liste des articles, du plus récent au plus ancien (pagination et curseur)
+            models.Index(fields=['created_at', 'id'], name='article_created_idx'),
+            # Liste filtrée par catégorie, même ordre
+            models.Index(fields=['category', 'created_at', 'id'], name='article_category_created_idx'),
+            # Classement des articles les plus aimés
+            models.Index(fields=['likes_count', 'id'], name='article_likes_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valeurs telles que chargées, pour que les signaux détectent les changements
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
 
     def save(self, *args, **kwargs):
         if not self.slug:
-            self.slug = slugify(self.title)
+            return _save_with_slug(self, self.title, 'article', *args, **kwargs)
+        self.render_content()
+        if not self.image:
+            self.image_width = self.image_height = None
+            self.image_variants = {}
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            # Les compteurs ne sont jamais réécrits par un save() complet : une
+            # modification de l'article écraserait les incréments concurrents
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
         super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields
+        }
+
+    def clean(self):
+        super().clean()
+        if self.slug in self.RESERVED_SLUGS:
+            raise ValidationError({'slug': f"Le slug « {self.slug} » est réservé à une page du blog."})
+
+    def needs_render(self):
+        return (
+            self.renderer_version != RENDERER_VERSION
+            or self.content_hash != content_hash(self.content)
+        )
+
+    def render_content(self, force=False):
+        """
+        Met à jour le rendu HTML si le contenu ou la version du moteur a changé.
+        Retourne True si le rendu a été recalculé.
+        """
+        if not force and not self.needs_render():
+            return False
+        self.content_html = render_markdown(self.content)
+        self.excerpt = make_excerpt(self.content_html)
+        self.content_hash = content_hash(self.content)
+        self.renderer_version = RENDERER_VERSION
+        return True
+
+    def ensure_rendered(self):
+        """
+        Rattrape un rendu périmé (article antérieur à la version courante du moteur)
+        et l'enregistre sans toucher à `updated_at`.
+        """
+        if self.render_content():
+            Article.objects.filter(pk=self.pk).update(
+                content_html=self.content_html,
+                excerpt=self.excerpt,
+                content_hash=self.content_hash,
+                renderer_version=self.renderer_version,
+            )
+
+    async def aensure_rendered(self):
+        """Version asynchrone de `ensure_rendered`, le rendu passant par le pool Markdown borné"""
+        if self.needs_render() and await run_in_markdown_executor(self.render_content):
+            await Article.objects.filter(pk=self.pk).aupdate(
+                content_html=self.content_html,
+                excerpt=self.excerpt,
+                content_hash=self.content_hash,
+                renderer_version=self.renderer_version,
+            )
 
     def __str__(self):
         return self.title
@@ -39,12 +158,34 @@ class Article(models.Model):
     def get_absolute_url(self):
         return reverse('article_detail', kwargs={'slug': self.slug})
 
+    @property
+    def image_sources(self):
+        """URLs et dimensions des variantes de l'image, vide tant qu'elles ne sont pas générées"""
+        if not self.image or not self.image_variants:
+            return {}
+        storage = self.image.storage
+        return {
+            name: {
+                'width': variant['width'],
+                'height': variant['height'],
+                'jpeg': storage.url(variant['jpeg']),
+                'webp': storage.url(variant['webp']),
+            }
+            for name, variant in self.image_variants.items()
+        }
+
 class Comment(models.Model):
     article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(get_user_model(), on_delete=models.CASCADE)
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Fil de commentaires d'un article, du plus récent au plus ancien
+            models.Index(fields=['article', 'created_at'], name='comment_article_created_idx'),
+        ]
+
     def __str__(self):
         return f"Commentaire par {self.author} sur {self.article}"
 
@@ -57,4 +198,62 @@ class Like(models.Model):
         unique_together = ('article', 'user')  # Un utilisateur ne peut liker un article qu'une fois
 
     def __str__(self):
-        return f"Like de {self.user} sur {self.article}"
\ No newline at end of file
+        return f"Like de {self.user} sur {self.article}"
+
+class TrendingScore(models.Model):
+    """
+    Score de tendance d'un article, tenu à jour par articles.trending. Seuls
+    les articles ayant reçu des likes ou commentaires récents ont une ligne.
+    """
+    article = models.OneToOneField(Article, on_delete=models.CASCADE, primary_key=True, related_name='trending')
+    # log(Σ poids × exp((date de l'interaction - TRENDING_EPOCH) / tau)) : voir articles.trending
+    log_score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Classement des tendances (les N premiers)
+            models.Index(fields=['log_score', 'article'], name='trending_score_idx'),
+        ]
+
+    def __str__(self):
+        return f"Tendance de {self.article_id}"
+
+class RelatedArticle(models.Model):
+    """
+    Article similaire à `article`, au rang `rank` (0 = le plus proche).
+    Table construite hors ligne par articles.related.
+    """
+    article = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='related_links')
+    related = models.ForeignKey(Article, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField()  # Similarité cosinus des vecteurs TF-IDF
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        constraints = [
+            # Sert aussi d'index : les similaires d'un article en une seule recherche
+            models.UniqueConstraint(fields=['article', 'rank'], name='related_article_rank_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.related_id} proche de {self.article_id}"
+
+
+class ArchiveMonth(models.Model):
+    """
+    Nombre d'articles publiés par mois (heure locale), tenu à jour par
+    articles.archive : la navigation des archives lit cette petite table
+    plutôt que de regrouper tous les articles par mois.
+    """
+    year = models.PositiveSmallIntegerField()
+    month = models.PositiveSmallIntegerField()
+    articles_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Sert aussi d'index pour la navigation, du plus récent au plus ancien
+            models.UniqueConstraint(fields=['year', 'month'], name='archive_month_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.month:02d}/{self.year} ({self.articles_count})"
@@ -0,0 +1,150 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# Bornes d'une clé primaire (entier signé 64 bits sous SQLite)
+MIN_PK = -2 ** 63
+MAX_PK = 2 ** 63 - 1
+
+
+def encode_cursor(direction, value, pk):
+    """Jeton opaque désignant la position (valeur, id) et le sens de lecture"""
+    payload = json.dumps([direction, value.isoformat(), pk], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, value, pk = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if direction not in ('next', 'prev'):
+            raise ValueError(direction)
+        # Un id hors de l'entier 64 bits ferait échouer la requête (1e400, 10**30…)
+        if isinstance(pk, bool) or not isinstance(pk, int) or not MIN_PK <= pk <= MAX_PK:
+            raise ValueError(pk)
+        return direction, datetime.fromisoformat(value), pk
+    except (binascii.Error, UnicodeError, ValueError, TypeError, OverflowError) as exc:
+        raise InvalidCursor(token) from exc
+
+
+class CursorPage:
+    """
+    Page obtenue par pagination « keyset » : aucune requête COUNT et aucun
+    OFFSET, le coût d'une page est le même au début et au fond de l'archive.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+def _cursor_queryset(queryset, cursor, field):
+    """Requête de la page désignée par `cursor`, avec le sens et la position de lecture"""
+    direction, value, pk = 'next', None, None
+    if cursor:
+        try:
+            direction, value, pk = decode_cursor(cursor)
+        except InvalidCursor:
+            direction, value, pk = 'next', None, None
+
+    if direction == 'next':
+        queryset = queryset.order_by(f'-{field}', '-id')
+        if value is not None:
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+            )
+    else:
+        queryset = queryset.order_by(field, 'id').filter(
+            Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk})
+        )
+    return queryset, direction, value
+
+
+def _cursor_page(rows, direction, value, per_page, field):
+    # Une ligne de plus que nécessaire suffit à savoir s'il existe une suite
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if direction == 'prev':
+        rows.reverse()
+
+    def cursor_for(direction, obj):
+        # Instances de modèle ou lignes `.values()` (qui doivent alors contenir `field` et id)
+        if isinstance(obj, dict):
+            return encode_cursor(direction, obj[field], obj['id'])
+        return encode_cursor(direction, getattr(obj, field), obj.pk)
+
+    next_cursor = previous_cursor = None
+    if rows:
+        if direction == 'next':
+            if has_more:
+                next_cursor = cursor_for('next', rows[-1])
+            if value is not None:
+                previous_cursor = cursor_for('prev', rows[0])
+        else:
+            if has_more:
+                previous_cursor = cursor_for('prev', rows[0])
+            next_cursor = cursor_for('next', rows[-1])
+    return CursorPage(rows, next_cursor=next_cursor, previous_cursor=previous_cursor)
+
+
+def paginate_by_cursor(queryset, cursor, per_page, field='created_at'):
+    """
+    Pagine `queryset` par ordre décroissant de (`field`, id) à partir du jeton
+    `cursor` (None pour la première page). Un jeton invalide renvoie la
+    première page, comme `Paginator.get_page` le fait pour un numéro invalide.
+    """
+    queryset, direction, value = _cursor_queryset(queryset, cursor, field)
+    rows = list(queryset[:per_page + 1])
+    return _cursor_page(rows, direction, value, per_page, field)
+
+
+async def apaginate_by_cursor(queryset, cursor, per_page, field='created_at'):
+    """Version asynchrone de `paginate_by_cursor` (ORM asynchrone)"""
+    queryset, direction, value = _cursor_queryset(queryset, cursor, field)
+    rows = [row async for row in queryset[:per_page + 1]]
+    return _cursor_page(rows, direction, value, per_page, field)
+
+
+async def apaginate(queryset, number, per_page):
+    """
+    Équivalent asynchrone de `Paginator(queryset, per_page).get_page(number)` :
+    le total est compté avec `acount()` et seule la page demandée est lue.
+    Retourne (paginator, page) ; le paginateur porte sur les positions.
+    """
+    paginator = Paginator(range(await queryset.acount()), per_page)
+    page = paginator.get_page(number)
+    rows = []
+    if paginator.count:
+        rows = [obj async for obj in queryset[page.start_index() - 1:page.end_index()]]
+    page.object_list = rows
+    return paginator, page
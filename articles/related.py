@@ -0,0 +1,242 @@
+"""
+Articles similaires : index construit hors ligne (commande
+`build_related_articles`) à partir des titres et contenus, servi par une
+seule requête sur l'index unique (article, rang) de `RelatedArticle`.
+
+Chaque article est un vecteur TF-IDF creux (scipy.sparse) : fréquence
+sous-linéaire 1 + log(tf), titre compté deux fois, idf lissé
+log((1 + N) / (1 + df)) + 1, vecteur normé. La similarité de deux articles
+est le produit scalaire de leurs vecteurs (cosinus) ; les `RELATED_COUNT`
+plus proches sont gardés au-dessus de `MIN_SCORE`.
+
+- `build_related()` calcule toute la matrice de similarité, par blocs de
+  lignes pour borner la mémoire.
+- `refresh_related()` ne recalcule que les lignes des articles créés ou
+  modifiés depuis la dernière construction, puis les fusionne dans les
+  listes des autres articles. Les poids idf bougent un peu à chaque ajout :
+  une reconstruction complète de temps en temps remet les scores à plat.
+
+NumPy et SciPy ne sont nécessaires qu'à la construction, jamais pour servir
+les pages.
+"""
+import math
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import detail_scope, invalidate_all, invalidate_scopes
+from .models import Article, RelatedArticle
+
+# Nombre d'articles similaires gardés par article
+RELATED_COUNT = getattr(settings, 'ARTICLES_RELATED_COUNT', 5)
+
+# Similarité cosinus minimale pour qu'un article soit proposé
+MIN_SCORE = 0.05
+
+# Un terme présent dans plus de cette proportion d'articles ne distingue rien
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+# Lignes de la matrice de similarité calculées ensemble (bloc dense de CHUNK_SIZE × N)
+CHUNK_SIZE = 256
+
+BUILT_AT_KEY = 'related:built_at'
+
+TOKEN_RE = re.compile(r'[^\W\d_]{3,}')
+
+STOPWORDS = frozenset("""
+    les des une dans pour par sur avec sans sous entre vers chez est sont était
+    être été avoir ont qui que quoi dont où pas plus moins très tout tous toute
+    toutes cette ces ses son sa leur leurs nous vous ils elles elle lui aux
+    mais ou donc car comme aussi bien fait faire peut même encore alors ainsi
+    the and for with that this from are was were not but you your
+""".split())
+
+
+def tokenize(text):
+    return [
+        token for token in TOKEN_RE.findall(text.lower())
+        if token not in STOPWORDS
+    ]
+
+
+def _documents(queryset):
+    for article_id, title, content in queryset.values_list('id', 'title', 'content').iterator(chunk_size=500):
+        yield article_id, Counter(tokenize(title) * 2 + tokenize(content))
+
+
+def _tfidf_matrix(documents):
+    """Identifiants des articles et matrice CSR de leurs vecteurs TF-IDF normés"""
+    import numpy as np
+    from scipy import sparse
+
+    ids, counts = [], []
+    document_frequency = Counter()
+    for article_id, terms in documents:
+        ids.append(article_id)
+        counts.append(terms)
+        document_frequency.update(terms.keys())
+
+    total = len(ids)
+    max_frequency = max(1, MAX_DOCUMENT_FREQUENCY * total)
+    vocabulary = {}
+    idf = []
+    for term, frequency in document_frequency.items():
+        if frequency <= max_frequency:
+            vocabulary[term] = len(idf)
+            idf.append(math.log((1 + total) / (1 + frequency)) + 1)
+
+    rows, columns, values = [], [], []
+    for row, terms in enumerate(counts):
+        for term, tf in terms.items():
+            column = vocabulary.get(term)
+            if column is not None:
+                rows.append(row)
+                columns.append(column)
+                values.append((1 + math.log(tf)) * idf[column])
+
+    matrix = sparse.csr_matrix(
+        (np.array(values, dtype=np.float64), (rows, columns)),
+        shape=(total, len(vocabulary)),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return np.array(ids, dtype=np.int64), sparse.diags(1 / norms) @ matrix
+
+
+def _top_k(similarities, ids, k, min_score):
+    """Les k meilleurs (identifiant, score) de chaque ligne, par score décroissant"""
+    import numpy as np
+
+    k = min(k, similarities.shape[1])
+    if k == 0:
+        return [[] for _ in range(similarities.shape[0])]
+    # argpartition isole les k meilleurs sans trier toute la ligne
+    best = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+    results = []
+    for row, columns in enumerate(best):
+        scores = similarities[row, columns]
+        order = np.argsort(-scores, kind='stable')
+        results.append([
+            (int(ids[columns[i]]), float(scores[i]))
+            for i in order if scores[i] >= min_score
+        ])
+    return results
+
+
+def _similarity_chunks(matrix, rows):
+    """Blocs (lignes, similarités denses avec tous les articles) pour les lignes `rows`"""
+    for start in range(0, len(rows), CHUNK_SIZE):
+        chunk = rows[start:start + CHUNK_SIZE]
+        similarities = (matrix[chunk] @ matrix.T).toarray()
+        # Un article n'est pas similaire à lui-même
+        similarities[range(len(chunk)), chunk] = -1
+        yield chunk, similarities
+
+
+def _replace_links(neighbours, batch_size=1000):
+    RelatedArticle.objects.filter(article_id__in=list(neighbours)).delete()
+    RelatedArticle.objects.bulk_create(
+        [
+            RelatedArticle(article_id=article_id, related_id=related_id, score=score, rank=rank)
+            for article_id, top in neighbours.items()
+            for rank, (related_id, score) in enumerate(top)
+        ],
+        batch_size=batch_size,
+    )
+
+
+def build_related(k=RELATED_COUNT, min_score=MIN_SCORE):
+    """
+    Reconstruit tout l'index des articles similaires. Retourne le nombre
+    d'articles indexés.
+    """
+    started = timezone.now()
+    ids, matrix = _tfidf_matrix(_documents(Article.objects.order_by('id')))
+    neighbours = {}
+    for chunk, similarities in _similarity_chunks(matrix, list(range(len(ids)))):
+        for row, top in zip(chunk, _top_k(similarities, ids, k, min_score)):
+            neighbours[int(ids[row])] = top
+    with transaction.atomic():
+        RelatedArticle.objects.all().delete()
+        _replace_links(neighbours)
+    cache.set(BUILT_AT_KEY, started, None)
+    transaction.on_commit(invalidate_all)
+    return len(ids)
+
+
+def refresh_related(k=RELATED_COUNT, min_score=MIN_SCORE):
+    """
+    Met l'index à jour pour les articles créés ou modifiés depuis la dernière
+    construction (reconstruction complète si elle est inconnue). Retourne le
+    nombre d'articles recalculés.
+    """
+    import numpy as np
+
+    built_at = cache.get(BUILT_AT_KEY)
+    if built_at is None:
+        return build_related(k, min_score)
+    started = timezone.now()
+    changed = set(Article.objects.filter(updated_at__gte=built_at).values_list('id', flat=True))
+    if not changed:
+        cache.set(BUILT_AT_KEY, started, None)
+        return 0
+
+    ids, matrix = _tfidf_matrix(_documents(Article.objects.order_by('id')))
+    changed_rows = [row for row, article_id in enumerate(ids) if article_id in changed]
+    neighbours = {}
+    # Les autres articles perdent leurs anciens liens vers les articles
+    # modifiés et gagnent les nouveaux, lus dans les mêmes lignes (la
+    # similarité est symétrique)
+    incoming = {}
+    for chunk, similarities in _similarity_chunks(matrix, changed_rows):
+        for position, (row, top) in enumerate(zip(chunk, _top_k(similarities, ids, k, min_score))):
+            source = int(ids[row])
+            neighbours[source] = top
+            for column in np.flatnonzero(similarities[position] >= min_score):
+                target = int(ids[column])
+                if target not in changed:
+                    incoming.setdefault(target, []).append((source, float(similarities[position, column])))
+
+    current = {}
+    for article_id, related_id, score in (
+        RelatedArticle.objects.exclude(article_id__in=changed)
+        .order_by('article', 'rank').values_list('article_id', 'related_id', 'score')
+    ):
+        current.setdefault(article_id, []).append((related_id, score))
+    for article_id, links in current.items():
+        if any(related_id in changed for related_id, _ in links):
+            incoming.setdefault(article_id, [])
+    for article_id, candidates in incoming.items():
+        kept = [link for link in current.get(article_id, []) if link[0] not in changed]
+        merged = sorted(kept + candidates, key=lambda link: -link[1])[:k]
+        if merged != current.get(article_id, []):
+            neighbours[article_id] = merged
+
+    with transaction.atomic():
+        _replace_links(neighbours)
+        slugs = list(Article.objects.filter(id__in=list(neighbours)).values_list('slug', flat=True))
+    cache.set(BUILT_AT_KEY, started, None)
+    transaction.on_commit(lambda: invalidate_scopes(*[detail_scope(slug) for slug in slugs]))
+    return len(changed)
+
+
+def _related_links(article):
+    return (
+        article.related_links.select_related('related')
+        .defer('related__content', 'related__content_html')
+        .order_by('rank')
+    )
+
+
+def related_articles(article):
+    """Articles similaires de `article`, par rang : une requête sur l'index (article, rang)"""
+    return [link.related for link in _related_links(article)]
+
+
+async def arelated_articles(article):
+    """Version asynchrone de `related_articles`"""
+    return [link.related async for link in _related_links(article)]
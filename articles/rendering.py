@@ -0,0 +1,74 @@
+import asyncio
+import contextvars
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import markdown
+from blog.instrumentation import track
+from django.conf import settings
+from django.utils.html import strip_tags
+from django.utils.text import Truncator
+
+# Incrémenter cette version à chaque changement des extensions ou de leur
+# configuration : les articles seront re-rendus par `render_articles`.
+RENDERER_VERSION = 2
+
+MARKDOWN_EXTENSIONS = []
+
+# Longueur (en mots) de l'extrait texte affiché dans les listes
+EXCERPT_WORDS = 40
+
+
+# Threads dédiés au rendu Markdown depuis les vues asynchrones : le rendu est
+# purement CPU, il ne doit ni bloquer la boucle d'événements ni occuper sans
+# limite le pool de threads partagé de sync_to_async
+MARKDOWN_WORKERS = getattr(settings, 'ARTICLES_MARKDOWN_WORKERS', 2)
+
+_local = threading.local()
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_renderer():
+    # Construire le parseur coûte autant que convertir un article : une
+    # instance est réutilisée par thread (Markdown n'est pas thread-safe)
+    renderer = getattr(_local, 'renderer', None)
+    if renderer is None:
+        renderer = _local.renderer = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    return renderer
+
+
+def render_markdown(text):
+    """Convertit le contenu Markdown d'un article en HTML"""
+    renderer = _get_renderer()
+    with track('markdown_ms'):
+        try:
+            return renderer.convert(text or '')
+        finally:
+            renderer.reset()
+
+
+def content_hash(text):
+    """Empreinte SHA-256 du contenu Markdown, utilisée pour détecter les changements"""
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+
+def make_excerpt(html, words=EXCERPT_WORDS):
+    """Extrait en texte brut du rendu HTML, tronqué à `words` mots"""
+    text = ' '.join(strip_tags(html).split())
+    return Truncator(text).words(words, truncate='…')
+
+
+def markdown_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MARKDOWN_WORKERS, thread_name_prefix='markdown')
+        return _executor
+
+
+async def run_in_markdown_executor(func, *args):
+    """Exécute `func(*args)` dans le pool borné de rendu Markdown, métriques de la requête comprises"""
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(markdown_executor(), context.run, func, *args)
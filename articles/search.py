@@ -0,0 +1,145 @@
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+FTS_TABLE = 'articles_article_fts'
+
+# Poids BM25 des colonnes indexées (title, content) : le titre compte davantage
+BM25_WEIGHTS = (10.0, 1.0)
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+# Disponibilité de l'index FTS5 par alias de base de données
+_fts_available = {}
+
+CREATE_TABLE_SQL = f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title,
+        content,
+        content='articles_article',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+"""
+
+# Triggers qui maintiennent l'index à jour, y compris pour bulk_create et
+# QuerySet.update qui ne déclenchent aucun signal Django
+TRIGGERS_SQL = {
+    f'{FTS_TABLE}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON articles_article BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+    f'{FTS_TABLE}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON articles_article BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+        END
+    """,
+    f'{FTS_TABLE}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF title, content ON articles_article BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, content)
+            VALUES ('delete', old.id, old.title, old.content);
+            INSERT INTO {FTS_TABLE}(rowid, title, content) VALUES (new.id, new.title, new.content);
+        END
+    """,
+}
+
+
+def fts_available(using='default'):
+    """Indique si la table FTS5 existe sur la base `using`"""
+    if using not in _fts_available:
+        connection = connections[using]
+        _fts_available[using] = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available[using]
+
+
+def reset_fts_cache():
+    _fts_available.clear()
+
+
+def fts5_supported(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def ensure_search_index(using='default'):
+    """
+    Crée la table FTS5 et ses triggers s'ils manquent. Sur SQLite, une migration
+    qui reconstruit la table articles_article supprime ses triggers : ils sont
+    alors recréés et l'index reconstruit. Retourne True si l'index est disponible.
+    """
+    reset_fts_cache()
+    if not fts5_supported(using):
+        return False
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'articles_article'"
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        missing = [name for name in TRIGGERS_SQL if name not in existing]
+        if missing:
+            cursor.execute(CREATE_TABLE_SQL)
+            for name in missing:
+                cursor.execute(TRIGGERS_SQL[name])
+            cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def search_terms(query):
+    return _TERM_RE.findall(query or '')
+
+
+def build_match_expression(query):
+    """
+    Traduit la saisie de l'utilisateur en requête FTS5 : chaque mot est cité
+    (pour neutraliser la syntaxe FTS5) et recherché en préfixe, tous les mots
+    devant être présents.
+    """
+    terms = search_terms(query)
+    return ' '.join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def search_articles(queryset, query):
+    """
+    Filtre `queryset` sur les articles correspondant à `query`, classés par
+    pertinence BM25 puis par date. Sur une base sans FTS5, se replie sur une
+    recherche icontains sur le titre et le contenu. Une saisie sans aucun mot
+    cherchable (ponctuation seule, « !!! ») ne correspond à aucun article.
+    """
+    if not (query or '').strip():
+        return queryset
+    if not search_terms(query):
+        return queryset.none()
+    if not fts_available(queryset.db):
+        return queryset.filter(Q(title__icontains=query) | Q(content__icontains=query))
+
+    table = queryset.model._meta.db_table
+    weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+    return queryset.extra(
+        select={'search_rank': f'bm25({FTS_TABLE}, {weights})'},
+        tables=[FTS_TABLE],
+        where=[f'{FTS_TABLE} MATCH %s', f'{FTS_TABLE}.rowid = {table}.id'],
+        params=[build_match_expression(query)],
+    ).order_by('search_rank', '-created_at', '-id')
+
+
+def rebuild_search_index(using='default'):
+    """Reconstruit entièrement l'index FTS5 à partir de la table des articles"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def optimize_search_index(using='default'):
+    """Fusionne les segments de l'index FTS5"""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
@@ -1,7 +1,14 @@
-from django.db.models.signals import post_migrate
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from django.apps import apps
-from .models import Category
+from blog.sqlite import enable_wal
+from .images import schedule_image_processing
+from .search import ensure_search_index
+from .cache import detail_scope, invalidate_all, invalidate_article, invalidate_category_counts, invalidate_scopes
+from .archive import record_article
+from .counters import adjust_category_count
+from .models import Article, Category, Comment, Like
 
 
 @receiver(post_migrate)
@@ -49,3 +56,129 @@ def create_default_categories(sender, **kwargs):
         print(f"✅ {len(default_categories)} catégories par défaut ont été créées automatiquement !")
     else:
         print("ℹ️ Des catégories existent déjà dans la base de données.")
+
+
+@receiver(post_migrate)
+def ensure_search_triggers(sender, using='default', **kwargs):
+    """
+    Recrée les triggers de l'index de recherche après les migrations : SQLite
+    les supprime lorsqu'une migration reconstruit la table des articles
+    """
+    if sender.name != 'articles':
+        return
+    ensure_search_index(using)
+
+
+@receiver(post_migrate)
+def enable_wal_journal(sender, using='default', **kwargs):
+    """
+    Passe la base en journal WAL après les migrations. Le mode est persistant :
+    les connexions ne le redemandent pas (voir blog.sqlite.enable_wal).
+    """
+    if sender.name != 'articles' or connections[using].vendor != 'sqlite':
+        return
+    enable_wal(connections[using])
+
+
+def _article_category_slugs(*category_ids):
+    ids = [category_id for category_id in category_ids if category_id]
+    if not ids:
+        return []
+    return list(Category.objects.filter(id__in=ids).values_list('slug', flat=True))
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def invalidate_article_pages(sender, instance, **kwargs):
+    """
+    Purge du cache de pages la page de l'article, l'archive complète et les
+    listes de sa catégorie (ancienne et nouvelle en cas de changement)
+    """
+    loaded = getattr(instance, '_loaded_values', {})
+    category_slugs = _article_category_slugs(instance.category_id, loaded.get('category_id'))
+    previous_slug = loaded.get('slug', instance.slug)
+    slug = instance.slug
+
+    def invalidate():
+        invalidate_article(slug, category_slugs)
+        if previous_slug != slug:
+            invalidate_scopes(detail_scope(previous_slug))
+
+    # Après le commit : une page servie entre-temps ne doit pas figer l'ancien état
+    transaction.on_commit(invalidate)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def count_category_articles(sender, instance, signal, created=False, **kwargs):
+    """
+    Tient à jour `Category.articles_count` à la création, à la suppression et
+    au changement de catégorie d'un article, dans la transaction de l'écriture.
+    La suppression d'une catégorie (les articles passent à NULL par
+    `on_delete=SET_NULL`, sans signal) emporte son compteur et invalide tout
+    le cache, barre latérale comprise (voir invalidate_pages_on_category_change).
+    """
+    if signal is post_delete:
+        adjust_category_count(instance.category_id, -1)
+    elif created:
+        adjust_category_count(instance.category_id, 1)
+    else:
+        previous = getattr(instance, '_loaded_values', {}).get('category_id', instance.category_id)
+        if previous == instance.category_id:
+            return
+        adjust_category_count(previous, -1)
+        adjust_category_count(instance.category_id, 1)
+    transaction.on_commit(invalidate_category_counts)
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_delete, sender=Article)
+def count_archive_month(sender, instance, signal, created=False, **kwargs):
+    """
+    Tient à jour le nombre d'articles du mois de publication. Les pages
+    d'archives relèvent de la portée de l'archive complète, déjà invalidée
+    par invalidate_article_pages.
+    """
+    if signal is post_delete:
+        record_article(instance.created_at, -1)
+    elif created:
+        record_article(instance.created_at, 1)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Like)
+@receiver(post_delete, sender=Like)
+def invalidate_pages_on_interaction(sender, instance, **kwargs):
+    """
+    Un commentaire ou un like change les compteurs affichés sur la page de
+    l'article et dans les listes qui le contiennent
+    """
+    row = (
+        Article.objects.filter(pk=instance.article_id)
+        .values_list('slug', 'category__slug')
+        .first()
+    )
+    if row is None:
+        # Suppression en cascade de l'article : déjà invalidé par son propre signal
+        return
+    slug, category_slug = row
+    transaction.on_commit(lambda: invalidate_article(slug, [category_slug]))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_pages_on_category_change(sender, instance, **kwargs):
+    """Les catégories apparaissent sur toutes les pages : tout le cache est invalidé"""
+    transaction.on_commit(invalidate_all)
+
+
+@receiver(post_save, sender=Article)
+def process_uploaded_image(sender, instance, **kwargs):
+    """
+    Lance la génération des variantes de l'image en arrière-plan lorsqu'un
+    nouveau fichier a été enregistré
+    """
+    loaded = getattr(instance, '_loaded_values', {})
+    if instance.image and instance.image.name != loaded.get('image'):
+        schedule_image_processing(instance.pk)
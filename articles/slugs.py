@@ -0,0 +1,82 @@
+"""
+Attribution de slugs uniques pour les articles et les catégories.
+
+Les slugs déjà pris pour une base `titre` sont lus en une seule requête sur
+l'index unique du slug : `slug = 'titre' OR (slug >= 'titre-' AND slug <
+'titre.')` (le point suit le tiret dans l'ordre binaire). Un `LIKE 'titre%'`
+ne profiterait pas de l'index sous SQLite, où LIKE ignore la casse. Le
+premier suffixe libre (`titre-2`, `titre-3`…) est ensuite choisi en mémoire.
+
+L'attribution et l'insertion doivent avoir lieu dans la même transaction :
+avec `BEGIN IMMEDIATE` (blog.sqlite), une seule transaction d'écriture est
+ouverte à la fois, deux insertions concurrentes ne peuvent donc pas choisir
+le même suffixe. `bulk_create` et le chargeur de données de démonstration
+attribuent ainsi des lots entiers sans collision.
+
+Les slugs listés dans l'attribut `RESERVED_SLUGS` du modèle (les préfixes de
+routes qui précèdent `<slug:slug>/`, comme `archive/` pour les articles) sont
+traités comme déjà pris : "Archive" reçoit `archive-2`.
+"""
+from itertools import count
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Place réservée au suffixe numérique ("-" et jusqu'à 9 chiffres)
+SUFFIX_RESERVE = 10
+
+# Nombre de bases par requête (chaque base ajoute deux conditions)
+QUERY_CHUNK_SIZE = 100
+
+
+def slug_base(text, max_length, fallback):
+    """
+    Slug ASCII de `text`, tronqué pour laisser la place d'un suffixe. Un titre
+    sans caractère translittérable (emoji, écriture non latine) donne `fallback`.
+    """
+    base = slugify(text)[:max_length - SUFFIX_RESERVE].strip('-_')
+    return base or fallback
+
+
+def prefix_filter(field, base):
+    """Condition couvrant `base` et `base-…`, résolue par l'index du champ"""
+    return Q(**{field: base}) | Q(**{f'{field}__gte': f'{base}-', f'{field}__lt': f'{base}.'})
+
+
+def allocate_slugs(queryset, texts, fallback, field='slug'):
+    """
+    Slugs uniques pour `texts`, dans l'ordre, en tenant compte des lignes de
+    `queryset` ; les doublons du lot reçoivent des suffixes distincts. À
+    appeler dans la transaction qui insère les objets.
+    """
+    max_length = queryset.model._meta.get_field(field).max_length
+    bases = [slug_base(text, max_length, fallback) for text in texts]
+
+    unique_bases = list(dict.fromkeys(bases))
+    existing = set(getattr(queryset.model, 'RESERVED_SLUGS', ()))
+    for start in range(0, len(unique_bases), QUERY_CHUNK_SIZE):
+        condition = Q()
+        for base in unique_bases[start:start + QUERY_CHUNK_SIZE]:
+            condition |= prefix_filter(field, base)
+        existing.update(queryset.filter(condition).values_list(field, flat=True))
+
+    # `existing` contient tous les slugs de la forme base ou base-N : le
+    # premier libre est cherché en mémoire, en reprenant après le dernier
+    # suffixe attribué pour les doublons du lot
+    next_suffix = {}
+    slugs = []
+    for base in bases:
+        for suffix in count(next_suffix.get(base, 1)):
+            slug = base if suffix == 1 else f'{base}-{suffix}'
+            if slug not in existing:
+                break
+        next_suffix[base] = suffix + 1
+        # Réservé aussi pour les autres bases du lot ("titre-2" peut être un titre)
+        existing.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def allocate_slug(queryset, text, fallback, field='slug'):
+    """Slug unique pour un seul objet : une requête sur l'index du slug"""
+    return allocate_slugs(queryset, [text], fallback, field)[0]
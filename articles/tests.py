@@ -1,3 +1,1466 @@
-from django.test import TestCase
+import base64
+import importlib.util
+import io
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from unittest import mock, skipUnless
+
+from asgiref.sync import iscoroutinefunction
+from django.apps import apps
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import OperationalError, connection, router
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteDatabaseWrapper
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import include, path, resolve, reverse
+from django.utils import timezone
+from PIL import Image
+
+from blog.cache import SQLiteCache
+from blog.instrumentation import QueryBudgetExceeded
+from blog.replicas import PRIMARY_COOKIE, read_from_replica
+from blog.sqlite import backup_database, enable_wal, retry_on_locked, sqlite_database
+from users.models import CustomUser
+
+from . import async_views
+from .archive import month_of, recompute_archive
+from .cache import category_sidebar, flush_page_cache_stats, invalidate_category_counts, page_cache_stats
+from .counters import adjust_counter, reconcile_counters
+from .forms import ArticleForm
+from .images import process_article_image
+from .models import ArchiveMonth, Article, Category, Comment, Like, RelatedArticle, TrendingScore
+from .pagination import InvalidCursor, decode_cursor, encode_cursor
+from .related import build_related, refresh_related, related_articles
+from .rendering import EXCERPT_WORDS, RENDERER_VERSION, content_hash, make_excerpt, render_markdown
+from .search import TRIGGERS_SQL, search_articles
+from .signals import ensure_search_triggers
+from .slugs import allocate_slugs, prefix_filter
+from .trending import recompute_trending, record_interaction, trending_articles
+from .views import COMMENTS_PER_PAGE
+
+
+class CacheTestCase(TestCase):
+    """
+    Le lanceur de tests (blog.test_runner) remplace le cache partagé par un
+    LocMemCache commun à toute la suite : il est vidé avant chaque test pour
+    qu'aucune page en cache ne passe d'un test à l'autre.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+
+class MarkdownRenderingTests(CacheTestCase):
+    """Rendu HTML du Markdown stocké avec l'article et recalculé seulement si nécessaire"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+
+    def create(self, content='Du **gras**'):
+        return Article.objects.create(title='Rendu', content=content, author=self.user)
+
+    def test_rendered_on_save_with_hash_and_version(self):
+        article = self.create()
+        self.assertIn('<strong>gras</strong>', article.content_html)
+        self.assertEqual(article.content_hash, content_hash('Du **gras**'))
+        self.assertEqual(article.renderer_version, RENDERER_VERSION)
+
+    def test_rerendered_only_when_content_changes(self):
+        article = self.create()
+        with mock.patch('articles.models.render_markdown', wraps=render_markdown) as render:
+            article.title = 'Nouveau titre'
+            article.save()
+            render.assert_not_called()
+            article.content = 'Du *italique*'
+            article.save()
+            render.assert_called_once()
+        article.refresh_from_db()
+        self.assertIn('<em>italique</em>', article.content_html)
+        self.assertEqual(article.content_hash, content_hash('Du *italique*'))
+
+    def test_outdated_renderer_version_is_rerendered_on_view(self):
+        article = self.create()
+        updated_at = Article.objects.get(pk=article.pk).updated_at
+        Article.objects.filter(pk=article.pk).update(content_html='périmé', renderer_version=RENDERER_VERSION - 1)
+        response = self.client.get(article.get_absolute_url())
+        self.assertContains(response, '<strong>gras</strong>')
+        article.refresh_from_db()
+        self.assertEqual(article.renderer_version, RENDERER_VERSION)
+        # Rattrapage du rendu : la date de modification de l'article ne bouge pas
+        self.assertEqual(article.updated_at, updated_at)
+
+    def test_migration_renders_existing_articles(self):
+        article = self.create('# Titre')
+        Article.objects.filter(pk=article.pk).update(content_html='', content_hash='', renderer_version=0)
+        migration = importlib.import_module('articles.migrations.0004_article_rendered_content')
+        migration.render_existing_articles(apps, None)
+        article = Article.objects.get(pk=article.pk)
+        self.assertIn('<h1>Titre</h1>', article.content_html)
+        self.assertFalse(article.needs_render())
+
+    def test_render_articles_command_catches_up_stale_rows(self):
+        fresh, stale = self.create(), self.create('# Titre')
+        Article.objects.filter(pk=stale.pk).update(content_html='', renderer_version=0)
+        output = io.StringIO()
+        call_command('render_articles', stdout=output)
+        self.assertIn('1 article(s) re-rendu(s) sur 2', output.getvalue())
+        self.assertIn('<h1>Titre</h1>', Article.objects.get(pk=stale.pk).content_html)
+        call_command('render_articles', force=True, stdout=output)
+        self.assertIn('2 article(s) re-rendu(s) sur 2', output.getvalue())
+
+
+class ExcerptTests(CacheTestCase):
+    """La liste affiche un extrait texte pré-calculé, jamais le contenu complet"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+
+    def test_excerpt_is_plain_text_truncated_to_word_limit(self):
+        self.assertEqual(make_excerpt('<p>Un <strong>texte</strong>\n  court</p>'), 'Un texte court')
+        words = ' '.join(f'mot{i}' for i in range(EXCERPT_WORDS + 10))
+        excerpt = make_excerpt(f'<p>{words}</p>')
+        self.assertEqual(len(excerpt.split()), EXCERPT_WORDS)
+        self.assertTrue(excerpt.endswith('…'))
+
+    def test_excerpt_follows_content_on_save(self):
+        article = Article.objects.create(title='Extrait', content='Premier **jet**', author=self.user)
+        self.assertEqual(article.excerpt, 'Premier jet')
+        article.content = 'Version _finale_'
+        article.save()
+        self.assertEqual(Article.objects.get(pk=article.pk).excerpt, 'Version finale')
+
+    def test_migration_backfills_excerpts(self):
+        article = Article.objects.create(title='Ancien', content='Un *ancien* article', author=self.user)
+        Article.objects.filter(pk=article.pk).update(excerpt='')
+        migration = importlib.import_module('articles.migrations.0005_article_excerpt')
+        migration.backfill_excerpts(apps, None)
+        self.assertEqual(Article.objects.get(pk=article.pk).excerpt, 'Un ancien article')
+
+    def test_list_shows_excerpts_of_the_requested_page_only(self):
+        tail = ' '.join(f'suite{i}' for i in range(EXCERPT_WORDS))
+        for i in range(12):
+            Article.objects.create(title=f'Liste {i}', content=f'Début {i} {tail} FIN-DU-CONTENU', author=self.user)
+        response = self.client.get(reverse('article_list'))
+        self.assertEqual(len(response.context['page_obj']), 10)
+        self.assertContains(response, 'Début 11')
+        self.assertNotContains(response, 'FIN-DU-CONTENU')
+        self.assertNotContains(response, 'Début 1 ')
+        # Le contenu et son rendu ne sont pas chargés pour la liste
+        self.assertEqual(response.context['page_obj'][0].get_deferred_fields(), {'content', 'content_html'})
+
+
+class SearchTests(CacheTestCase):
+    """Recherche plein texte FTS5 : accents, préfixes, classement BM25 et repli sans index"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.in_title = Article.objects.create(
+            title='Économie circulaire', content='Réparer plutôt que jeter.', author=cls.user
+        )
+        cls.in_content = Article.objects.create(
+            title='Notes de lecture', content="Un livre d'économie politique.", author=cls.user
+        )
+        cls.unrelated = Article.objects.create(
+            title='Recette du jour', content='Une tarte aux pommes.', author=cls.user
+        )
+
+    def search(self, query):
+        return list(search_articles(Article.objects.order_by('-created_at', '-id'), query))
+
+    def test_accents_and_case_are_folded(self):
+        for query in ('economie', 'ÉCONOMIE', 'Economie'):
+            with self.subTest(query=query):
+                self.assertEqual(set(self.search(query)), {self.in_title, self.in_content})
+        self.assertEqual(self.search('reparer'), [self.in_title])
+
+    def test_prefix_matching_requires_every_term(self):
+        self.assertEqual(self.search('circ'), [self.in_title])
+        self.assertEqual(self.search('eco poli'), [self.in_content])
+        self.assertEqual(self.search('eco pommes'), [])
+
+    def test_title_matches_rank_first(self):
+        # L'article le plus récent ne contient le mot que dans son corps
+        self.assertEqual(self.search('économie'), [self.in_title, self.in_content])
+        self.assertLess(search_articles(Article.objects.all(), 'économie')[0].search_rank, 0)
+
+    def test_query_without_terms_matches_nothing(self):
+        self.assertEqual(self.search('!!!'), [])
+        self.assertEqual(self.search('"*'), [])
+        self.assertEqual(len(self.search('  ')), Article.objects.count())
+        response = self.client.get(reverse('article_list'), {'q': '!!!'})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_fts_syntax_is_neutralised(self):
+        self.assertEqual(self.search('économie" OR "tarte'), [])
+        self.assertEqual(self.search('^tarte (pommes)'), [self.unrelated])
+
+    def test_icontains_fallback_without_index(self):
+        with mock.patch('articles.search.fts_available', return_value=False):
+            self.assertEqual(self.search('tarte'), [self.unrelated])
+            # Sans index, ni préfixes par mot ni repli des accents
+            self.assertEqual(self.search('economie'), [])
+            self.assertFalse(hasattr(self.search('économie')[0], 'search_rank'))
+
+    def test_post_migrate_recreates_dropped_triggers(self):
+        with connection.cursor() as cursor:
+            for name in TRIGGERS_SQL:
+                cursor.execute(f'DROP TRIGGER {name}')
+        # Inséré sans trigger : absent de l'index jusqu'à sa reconstruction
+        article = Article.objects.create(title='Astronomie', content='Les comètes.', author=self.user)
+        self.assertEqual(self.search('comètes'), [])
+
+        ensure_search_triggers(sender=apps.get_app_config('articles'))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'articles_article'")
+            self.assertLessEqual(set(TRIGGERS_SQL), {row[0] for row in cursor.fetchall()})
+        self.assertEqual(self.search('comètes'), [article])
+        article.title = 'Astrophysique'
+        article.save()
+        self.assertEqual(self.search('astrophys'), [article])
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class QueryBudgetTests(CacheTestCase):
+    """Les vues principales doivent respecter settings.QUERY_BUDGETS, quel que soit le volume"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lecteur', password='password123')
+        cls.category = Category.objects.create(name='Tests de charge')
+        authors = [CustomUser.objects.create_user(f'auteur{i}', password='password123') for i in range(5)]
+        cls.articles = [
+            Article.objects.create(
+                title=f'Article numéro {i}',
+                content=f'Contenu **Markdown** de l\'article {i}',
+                author=authors[i % len(authors)],
+                category=cls.category,
+            )
+            for i in range(25)
+        ]
+        cls.article = cls.articles[0]
+        # Commentaires de plusieurs auteurs : un N+1 sur comment.author ferait exploser le budget
+        Comment.objects.bulk_create([
+            Comment(article=cls.article, author=authors[i % len(authors)], content=f'Commentaire {i}')
+            for i in range(30)
+        ])
+        Like.objects.bulk_create([Like(article=cls.article, user=author) for author in authors])
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def test_article_list_within_budget(self):
+        url = reverse('article_list')
+        for params in ({}, {'page': 2}, {'category': self.category.slug}, {'q': 'numéro'}, {'pagination': 'cursor'}):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 200)
+
+    def test_article_detail_within_budget(self):
+        response = self.client.get(self.article.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Commentaire 29')
+
+    def test_like_toggle_within_budget(self):
+        url = reverse('article_like_toggle', kwargs={'slug': self.article.slug})
+        self.assertEqual(self.client.post(url).json()['liked'], True)
+        self.assertEqual(self.client.post(url).json()['liked'], False)
+
+    @override_settings(QUERY_BUDGETS={'article_list': 1})
+    def test_exceeded_budget_fails(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            self.client.get(reverse('article_list'))
+
+    def test_instrumentation_headers(self):
+        response = self.client.get(self.article.get_absolute_url())
+        self.assertGreater(int(response['X-Query-Count']), 0)
+        self.assertIn('X-Template-Time-Ms', response)
+        self.assertIn('sql;dur=', response['Server-Timing'])
+
+
+class QueryPlanTests(CacheTestCase):
+    """Les requêtes des vues principales ne doivent pas retomber sur un parcours complet de table"""
+
+    @classmethod
+    def setUpTestData(cls):
+        author = CustomUser.objects.create_user('auteur', password='password123')
+        category = Category.objects.create(name='Plans de requêtes')
+        articles = [
+            Article.objects.create(title=f'Article indexé {i}', content='Contenu', author=author, category=category)
+            for i in range(15)
+        ]
+        Comment.objects.create(article=articles[0], author=author, content='Commentaire')
+
+    def test_explain_queries_strict(self):
+        call_command('explain_queries', strict=True, stdout=io.StringIO())
+
+
+class CounterTests(CacheTestCase):
+    """Compteurs dénormalisés des articles : tenus à jour par les vues, corrigés par reconcile_counters"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lecteur', password='password123')
+        cls.article = Article.objects.create(title='Article compté', content='Contenu', author=cls.user)
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_login(self.user)
+
+    def counters(self):
+        return Article.objects.values_list('likes_count', 'comments_count').get(pk=self.article.pk)
+
+    def test_views_maintain_counters(self):
+        self.client.post(reverse('article_like', kwargs={'slug': self.article.slug}))
+        self.client.post(self.article.get_absolute_url(), {'content': 'Premier commentaire'})
+        self.client.post(self.article.get_absolute_url(), {'content': 'Second commentaire'})
+        self.assertEqual(self.counters(), (1, 2))
+
+        comment = Comment.objects.filter(article=self.article).first()
+        self.client.post(reverse('comment_delete', kwargs={'slug': self.article.slug, 'comment_id': comment.pk}))
+        self.client.post(reverse('article_like', kwargs={'slug': self.article.slug}))
+        self.assertEqual(self.counters(), (0, 1))
+
+    def test_counter_updates_leave_updated_at_alone(self):
+        updated_at = Article.objects.get(pk=self.article.pk).updated_at
+        self.client.post(reverse('article_like', kwargs={'slug': self.article.slug}))
+        self.assertEqual(Article.objects.get(pk=self.article.pk).updated_at, updated_at)
+
+    def test_counters_never_go_negative(self):
+        adjust_counter(self.article.pk, 'comments_count', -1)
+        self.assertEqual(self.counters(), (0, 0))
+        with self.assertRaises(ValueError):
+            adjust_counter(self.article.pk, 'views_count', 1)
+
+    def test_reconcile_counters_fixes_drift(self):
+        other = Article.objects.create(title='Article juste', content='Contenu', author=self.user)
+        Like.objects.create(article=self.article, user=self.user)
+        Comment.objects.bulk_create([
+            Comment(article=self.article, author=self.user, content=f'Commentaire {i}') for i in range(3)
+        ])
+        Article.objects.filter(pk=other.pk).update(likes_count=0, comments_count=0)
+        Article.objects.filter(pk=self.article.pk).update(likes_count=7, comments_count=0)
+
+        self.assertEqual(reconcile_counters(batch_size=1), (2, 1))
+        self.assertEqual(self.counters(), (1, 3))
+
+        output = io.StringIO()
+        call_command('reconcile_counters', stdout=output)
+        self.assertIn('2 articles vérifiés, 0 compteur(s) corrigé(s)', output.getvalue())
+
+    def test_reconcile_counters_invalidates_corrected_pages(self):
+        other = Article.objects.create(title='Article juste', content='Contenu', author=self.user)
+        Like.objects.create(article=self.article, user=self.user)
+        self.client.logout()
+        urls = {'drifted': self.article.get_absolute_url(), 'other': other.get_absolute_url()}
+        for url in urls.values():
+            self.client.get(url)
+        Article.objects.filter(pk=self.article.pk).update(likes_count=0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('reconcile_counters', stdout=io.StringIO())
+        response = self.client.get(urls['drifted'])
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertEqual(response.context['article'].likes_count, 1)
+        self.assertEqual(self.client.get(urls['other'])['X-Page-Cache'], 'HIT')
+
+
+class LikeToggleTests(CacheTestCase):
+    """Bascule du like en JSON : une transaction, un like par utilisateur"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lecteur', password='password123')
+        cls.other = CustomUser.objects.create_user('voisin', password='password123')
+        cls.article = Article.objects.create(title='Article aimé', content='Contenu', author=cls.user)
+        cls.url = reverse('article_like_toggle', kwargs={'slug': cls.article.slug})
+
+    def test_double_toggle(self):
+        Like.objects.create(article=self.article, user=self.other)
+        Article.objects.filter(pk=self.article.pk).update(likes_count=1)
+        self.client.force_login(self.user)
+
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'liked': True, 'likes_count': 2})
+        self.assertEqual(self.client.post(self.url).json(), {'liked': False, 'likes_count': 1})
+        self.assertFalse(Like.objects.filter(article=self.article, user=self.user).exists())
+
+    def test_concurrent_duplicate_is_counted_once(self):
+        Like.objects.create(article=self.article, user=self.user)
+        Article.objects.filter(pk=self.article.pk).update(likes_count=1)
+        self.client.force_login(self.user)
+        # Le like inséré par une requête concurrente n'était pas encore visible
+        with mock.patch('articles.likes.Like.objects.filter') as filter_likes:
+            filter_likes.return_value.only.return_value.first.return_value = None
+            response = self.client.post(self.url)
+        self.assertEqual(response.json(), {'liked': True, 'likes_count': 1})
+        self.assertEqual(Like.objects.filter(article=self.article).count(), 1)
+
+    def test_anonymous_and_unknown_article(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('error', response.json())
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+        self.assertEqual(
+            self.client.post(reverse('article_like_toggle', kwargs={'slug': 'introuvable'})).status_code, 404
+        )
+        self.assertFalse(Like.objects.exists())
+
+
+class ConditionalGetTests(CacheTestCase):
+    """Une page inchangée est servie en 304 sans rendu ; toute modification change ses validateurs"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lecteur', password='password123')
+        cls.article = Article.objects.create(title='Article conditionnel', content='Contenu', author=cls.user)
+
+    def test_article_detail_not_modified(self):
+        url = self.article.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['X-Query-Count'], '1')
+
+    def test_article_detail_etag_changes_with_counters_and_user(self):
+        url = self.article.get_absolute_url()
+        etag = self.client.get(url)['ETag']
+        self.client.force_login(self.user)
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('article_like_toggle', kwargs={'slug': self.article.slug}))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_article_list_last_modified(self):
+        url = reverse('article_list')
+        self.client.get(url)
+        now = time.time()
+        with mock.patch('time.time', return_value=now + 5):
+            last_modified = self.client.get(url)['Last-Modified']
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+        with mock.patch('time.time', return_value=now + 10), self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Nouvel article', content='Contenu', author=self.user)
+        with mock.patch('time.time', return_value=now + 15):
+            self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+    def test_recent_change_omits_last_modified(self):
+        self.assertNotIn('Last-Modified', self.client.get(reverse('article_list')))
+
+
+class PageCacheTests(CacheTestCase):
+    """Cache des pages anonymes : versions par portée et statistiques"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.category = Category.objects.create(name='Portée A')
+        cls.other_category = Category.objects.create(name='Portée B')
+        cls.article = Article.objects.create(
+            title='Article en cache', content='Contenu', author=cls.user, category=cls.category
+        )
+        cls.other = Article.objects.create(
+            title='Article voisin', content='Contenu', author=cls.user, category=cls.other_category
+        )
+
+    def setUp(self):
+        flush_page_cache_stats()
+        super().setUp()
+
+    def warm(self):
+        """Met en cache les pages suivies et renvoie leurs URL"""
+        urls = {
+            'detail': self.article.get_absolute_url(),
+            'other_detail': self.other.get_absolute_url(),
+            'list': reverse('article_list'),
+            'category_list': f"{reverse('article_list')}?category={self.category.slug}",
+            'other_category_list': f"{reverse('article_list')}?category={self.other_category.slug}",
+        }
+        for url in urls.values():
+            self.client.get(url)
+        return urls
+
+    def page_cache_status(self, urls):
+        return {name: self.client.get(url)['X-Page-Cache'] for name, url in urls.items()}
+
+    def test_article_edit_invalidates_only_its_scopes(self):
+        urls = self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.article.title = 'Article modifié'
+            self.article.save()
+        self.assertEqual(self.page_cache_status(urls), {
+            'detail': 'MISS',
+            'other_detail': 'HIT',
+            'list': 'MISS',
+            'category_list': 'MISS',
+            'other_category_list': 'HIT',
+        })
+        self.assertContains(self.client.get(urls['detail']), 'Article modifié')
+
+    def test_comment_invalidates_only_its_article_scopes(self):
+        urls = self.warm()
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(article=self.other, author=self.user, content='Commentaire')
+        self.assertEqual(self.page_cache_status(urls), {
+            'detail': 'HIT',
+            'other_detail': 'MISS',
+            'list': 'MISS',
+            'category_list': 'HIT',
+            'other_category_list': 'MISS',
+        })
+
+    def test_authenticated_pages_bypass_the_cache(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.article.get_absolute_url())
+        self.assertNotIn('X-Page-Cache', response)
+        self.assertEqual(page_cache_stats()['misses'], 0)
+
+    def test_hits_are_counted_without_a_cache_write_per_request(self):
+        url = self.article.get_absolute_url()
+        self.client.get(url)
+        with mock.patch.object(cache, 'incr') as incr, mock.patch.object(cache, 'add') as add:
+            for _ in range(5):
+                self.assertEqual(self.client.get(url)['X-Page-Cache'], 'HIT')
+        incr.assert_not_called()
+        add.assert_not_called()
+        self.assertEqual(page_cache_stats(), {'hits': 5, 'misses': 1, 'hit_ratio': 0.8333})
+
+
+class FeedTests(CacheTestCase):
+    """Flux et sitemap produits en streaming, puis servis depuis le cache jusqu'à la prochaine modification"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.category = Category.objects.create(name='Flux')
+        cls.article = Article.objects.create(
+            title='Premier article du flux', content='Contenu', author=cls.user, category=cls.category
+        )
+
+    def read(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        body = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, body.decode('utf-8')
+
+    def test_feeds_are_streamed_then_cached(self):
+        for url in (
+            reverse('article_feed', args=['rss']),
+            reverse('article_feed', args=['atom']),
+            reverse('category_feed', args=[self.category.slug, 'atom']),
+        ):
+            with self.subTest(url=url):
+                response, body = self.read(url)
+                self.assertTrue(response.streaming)
+                self.assertIn('Premier article du flux', body)
+                cached, cached_body = self.read(url)
+                self.assertFalse(cached.streaming)
+                self.assertEqual(cached_body, body)
+
+    def test_feed_invalidated_when_an_article_changes(self):
+        url = reverse('article_feed', args=['rss'])
+        self.read(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.create(title='Article suivant', content='Contenu', author=self.user)
+        response, body = self.read(url)
+        self.assertTrue(response.streaming)
+        self.assertIn('Article suivant', body)
+
+    def test_only_known_formats_are_feed_routes(self):
+        self.assertEqual(resolve('/articles/feeds/rss/').url_name, 'article_feed')
+        self.assertEqual(resolve(f'/articles/feeds/{self.category.slug}/atom/').url_name, 'category_feed')
+        self.assertEqual(resolve('/articles/feeds/like/').url_name, 'article_like')
+        self.assertEqual(resolve('/articles/feeds/comments/').url_name, 'article_comments')
+        self.assertEqual(resolve('/articles/feeds/like/toggle/').url_name, 'article_like_toggle')
+        self.assertEqual(self.client.get('/articles/feeds/json/').status_code, 404)
+
+    def test_sitemap_lists_every_article(self):
+        _, index = self.read(reverse('sitemap_index'))
+        self.assertIn(reverse('sitemap_section', args=[1]), index)
+        _, section = self.read(reverse('sitemap_section', args=[1]))
+        self.assertIn(self.article.get_absolute_url(), section)
+
+
+def _uploaded_image(width, height, name='photo.png'):
+    output = io.BytesIO()
+    Image.new('RGBA', (width, height), (200, 80, 40, 255)).save(output, format='PNG')
+    return SimpleUploadedFile(name, output.getvalue(), content_type='image/png')
+
+
+@override_settings(ARTICLES_IMAGE_PROCESSING_EAGER=True)
+class ImageVariantTests(CacheTestCase):
+    """Variantes JPEG et WebP générées après le commit ; l'original est servi en attendant"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+
+    def create_article(self, image):
+        return Article.objects.create(title='Article illustré', content='Contenu', author=self.user, image=image)
+
+    def test_variants_generated_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = self.create_article(_uploaded_image(2000, 1000))
+        article.refresh_from_db()
+        self.assertEqual((article.image_width, article.image_height), (2000, 1000))
+        self.assertEqual(
+            {name: (variant['width'], variant['height']) for name, variant in article.image_variants.items()},
+            {'thumbnail': (400, 200), 'medium': (800, 400), 'full': (1600, 800)},
+        )
+        for variant in article.image_variants.values():
+            for image_format in ('jpeg', 'webp'):
+                with article.image.storage.open(variant[image_format]) as stored:
+                    self.assertEqual(Image.open(stored).format, image_format.upper())
+
+        thumbnail = article.image_sources['thumbnail']
+        self.assertTrue(thumbnail['webp'].endswith(f'variants/{article.pk}/thumbnail.webp'))
+        response = self.client.get(reverse('article_list'))
+        self.assertContains(response, f'<img src="{thumbnail["jpeg"]}" width="400" height="200"')
+
+    def test_small_images_are_not_upscaled(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = self.create_article(_uploaded_image(300, 150))
+        article.refresh_from_db()
+        self.assertEqual({variant['width'] for variant in article.image_variants.values()}, {300})
+
+    def test_original_served_until_variants_exist(self):
+        with mock.patch('articles.signals.schedule_image_processing') as schedule:
+            article = self.create_article(_uploaded_image(1000, 500))
+        schedule.assert_called_once_with(article.pk)
+        self.assertEqual(article.image_sources, {})
+        response = self.client.get(reverse('article_list'))
+        self.assertContains(response, f'<img src="{article.image.url}" loading="lazy"')
+        self.assertNotContains(response, '<picture>')
+
+        self.assertEqual(set(process_article_image(article.pk)), {'thumbnail', 'medium', 'full'})
+        self.assertContains(self.client.get(reverse('article_list')), '<picture>')
+
+    def test_removing_the_image_clears_variants(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            article = self.create_article(_uploaded_image(600, 300))
+        article.refresh_from_db()
+        article.image = None
+        article.save()
+        article.refresh_from_db()
+        self.assertEqual((article.image_variants, article.image_width), ({}, None))
+        self.assertEqual(process_article_image(article.pk), {})
+
+
+class DemoDataTests(CacheTestCase):
+    """load_demo_data --fast : insertions groupées, puis compteurs recalculés en masse"""
+
+    def test_fast_mode_row_counts(self):
+        output = io.StringIO()
+        call_command('load_demo_data', fast=True, users=12, articles=30, comments=45, batch_size=7, stdout=output)
+        self.assertIn('Données de démonstration chargées', output.getvalue())
+
+        self.assertEqual(CustomUser.objects.count(), 13)
+        self.assertTrue(CustomUser.objects.filter(username='admin', is_superuser=True).exists())
+        self.assertEqual(Article.objects.count(), 30)
+        self.assertEqual(Comment.objects.count(), 45)
+        self.assertEqual(Article.objects.values('slug').distinct().count(), 30)
+        self.assertFalse(Article.objects.filter(slug__in=Article.RESERVED_SLUGS).exists())
+        self.assertFalse(Article.objects.exclude(renderer_version=RENDERER_VERSION).exists())
+
+        # Compteurs dénormalisés cohérents avec les lignes insérées
+        self.assertEqual(reconcile_counters(), (30, 0))
+        self.assertEqual(sum(Article.objects.values_list('comments_count', flat=True)), 45)
+        self.assertEqual(sum(Article.objects.values_list('likes_count', flat=True)), Like.objects.count())
+        self.assertEqual(sum(Category.objects.values_list('articles_count', flat=True)), 30)
+        self.assertEqual(sum(ArchiveMonth.objects.values_list('articles_count', flat=True)), 30)
+
+    def test_fast_mode_keeps_generated_dates(self):
+        started = timezone.now()
+        call_command('load_demo_data', fast=True, users=3, articles=40, comments=60, batch_size=15, stdout=io.StringIO())
+        self.assertFalse(Article.objects.exclude(updated_at=F('created_at')).exists())
+        # Dates étalées sur les 30 derniers jours, pas l'heure de l'insertion
+        self.assertFalse(Article.objects.filter(created_at__gte=started).exists())
+        self.assertFalse(Comment.objects.filter(created_at__lt=F('article__created_at')).exists())
+        self.assertFalse(Comment.objects.filter(created_at__gt=timezone.now()).exists())
+        self.assertTrue(Comment.objects.filter(created_at__lt=started).exists())
+        # auto_now_add n'a pas été désactivé pour le reste du processus
+        article = Article.objects.create(title='Article du jour', content='Contenu', author=CustomUser.objects.first())
+        self.assertGreaterEqual(article.created_at, started)
+
+    def test_refuses_to_run_twice_without_force(self):
+        call_command('load_demo_data', fast=True, users=1, articles=2, comments=0, stdout=io.StringIO())
+        output = io.StringIO()
+        call_command('load_demo_data', fast=True, users=1, articles=2, comments=0, stdout=output)
+        self.assertIn('--force', output.getvalue())
+        self.assertEqual(Article.objects.count(), 2)
+
+
+def _raw_cursor(payload):
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+class CursorPaginationTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.articles = [
+            Article.objects.create(title=f'Article curseur {i}', content='Contenu', author=cls.user)
+            for i in range(3)
+        ]
+
+    def test_round_trip(self):
+        now = timezone.now()
+        self.assertEqual(decode_cursor(encode_cursor('prev', now, 42)), ('prev', now, 42))
+
+    def test_bad_and_overflowing_cursors_are_rejected(self):
+        date = '"2025-01-01T00:00:00+00:00"'
+        for token in (
+            'pas-un-curseur!',
+            _raw_cursor('{"a": 1}'),
+            _raw_cursor(f'["sideways",{date},1]'),
+            _raw_cursor('["next","hier",1]'),
+            _raw_cursor(f'["next",{date},1e400]'),
+            _raw_cursor(f'["next",{date},{2 ** 63}]'),
+            _raw_cursor(f'["next",{date},"1"]'),
+            _raw_cursor(f'["next",{date},true]'),
+        ):
+            with self.subTest(token=token), self.assertRaises(InvalidCursor):
+                decode_cursor(token)
+
+    def test_overflowing_cursor_returns_first_page(self):
+        token = _raw_cursor('["next","2025-01-01T00:00:00+00:00",1e400]')
+        for url in (reverse('article_list'), reverse('api_article_list')):
+            with self.subTest(url=url):
+                response = self.client.get(url, {'pagination': 'cursor', 'cursor': token})
+                self.assertEqual(response.status_code, 200)
+
+
+class CommentThreadTests(CacheTestCase):
+    """Fil de commentaires paginé par curseur : page de l'article, puis fragments HTML ou JSON"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.article = Article.objects.create(title='Article commenté', content='Contenu', author=cls.user)
+        # Dates égales ou presque : l'ordre et les curseurs départagent par id
+        Comment.objects.bulk_create([
+            Comment(article=cls.article, author=cls.user, content=f'Commentaire n°{i}')
+            for i in range(COMMENTS_PER_PAGE * 2 + 5)
+        ])
+        cls.ids = list(Comment.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        cls.url = reverse('article_comments', kwargs={'slug': cls.article.slug})
+
+    def test_json_pages_cover_the_thread_once(self):
+        seen, cursor, pages = [], None, 0
+        while True:
+            params = {'format': 'json', **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(self.url, params).json()
+            pages += 1
+            self.assertLessEqual(len(data['comments']), COMMENTS_PER_PAGE)
+            seen += [comment['id'] for comment in data['comments']]
+            cursor = data['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, self.ids)
+        self.assertEqual(set(data['comments'][0]), {'id', 'author', 'content', 'created_at'})
+
+    def test_detail_page_then_fragments(self):
+        response = self.client.get(self.article.get_absolute_url())
+        page = response.context['comments_page']
+        self.assertEqual([comment.id for comment in page], self.ids[:COMMENTS_PER_PAGE])
+        self.assertContains(response, f'data-fragment-url="{self.url}?cursor={page.next_cursor}"')
+
+        fragment = self.client.get(self.url, {'cursor': page.next_cursor})
+        self.assertTemplateUsed(fragment, 'articles/_comment_list.html')
+        self.assertTemplateNotUsed(fragment, 'base.html')
+        self.assertEqual(
+            [comment.id for comment in fragment.context['comments_page']],
+            self.ids[COMMENTS_PER_PAGE:COMMENTS_PER_PAGE * 2],
+        )
+
+        last = self.client.get(self.url, {'cursor': fragment.context['comments_page'].next_cursor})
+        self.assertEqual(len(last.context['comments_page']), 5)
+        self.assertNotContains(last, 'comments-more')
+        self.assertNotContains(last, 'Aucun commentaire')
+
+    def test_invalid_cursor_and_unknown_article(self):
+        data = self.client.get(self.url, {'format': 'json', 'cursor': 'invalide'}).json()
+        self.assertEqual(data['comments'][0]['id'], self.ids[0])
+        self.assertEqual(
+            self.client.get(reverse('article_comments', kwargs={'slug': 'introuvable'})).status_code, 404
+        )
+
+
+class ApiTests(CacheTestCase):
+    """API JSON : champs à la demande, lot de slugs en une requête, pagination par curseur"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.articles = [
+            Article.objects.create(title=f'Article API {i}', content='Contenu', author=cls.user)
+            for i in range(7)
+        ]
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(reverse('api_article_list'), {'fields': 'slug,likes_count'})
+        self.assertEqual(set(response.json()['results'][0]), {'slug', 'likes_count'})
+        response = self.client.get(reverse('api_article_list'), {'fields': 'slug,password'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_fetch_in_one_query(self):
+        slugs = [self.articles[3].slug, 'inconnu', self.articles[1].slug]
+        with self.assertNumQueries(1):
+            data = self.client.get(reverse('api_article_list'), {'slugs': ','.join(slugs), 'fields': 'slug'}).json()
+        self.assertEqual([row['slug'] for row in data['results']], [slugs[0], slugs[2]])
+        self.assertEqual(data['missing'], ['inconnu'])
+
+    def test_cursor_pagination_walks_every_article(self):
+        seen, params = [], {'limit': 3, 'fields': 'slug'}
+        while True:
+            data = self.client.get(reverse('api_article_list'), params).json()
+            seen += [row['slug'] for row in data['results']]
+            if not data['next_cursor']:
+                break
+            params['cursor'] = data['next_cursor']
+        self.assertEqual(seen, [article.slug for article in reversed(self.articles)])
+
+
+
+class SQLiteSettingsTests(CacheTestCase):
+    def test_pragmas_applied_to_connections(self):
+        with connection.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+            self.assertEqual(cursor.execute('PRAGMA temp_store').fetchone()[0], 2)
+
+    def test_connections_leave_journal_mode_alone_until_migrate(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'base.sqlite3')
+        sqlite3.connect(path).execute('CREATE TABLE t (id INTEGER PRIMARY KEY)')
+
+        def header_journal_mode():
+            with open(path, 'rb') as database:
+                # Octets 18-19 de l'en-tête : 1 = journal classique, 2 = WAL
+                return database.read(20)[18]
+
+        wrapper = SQLiteDatabaseWrapper({**connection.settings_dict, **sqlite_database(path)}, alias='wal')
+        self.addCleanup(wrapper.close)
+        with wrapper.cursor() as cursor:
+            self.assertEqual(cursor.execute('PRAGMA busy_timeout').fetchone()[0], 5000)
+        self.assertEqual(header_journal_mode(), 1)
+        self.assertFalse(os.path.exists(f'{path}-wal'))
+
+        self.assertEqual(enable_wal(wrapper), 'wal')
+        self.assertEqual(enable_wal(wrapper), 'wal')
+        self.assertEqual(header_journal_mode(), 2)
+
+
+@mock.patch('blog.sqlite.time.sleep')
+class RetryOnLockedTests(SimpleTestCase):
+    """Une écriture est rejouée quand SQLite reste verrouillé, et seulement dans ce cas"""
+
+    def view(self, *errors):
+        errors = list(errors)
+
+        @retry_on_locked
+        def view(request):
+            if errors:
+                raise errors.pop(0)
+            return HttpResponse('ok')
+        return view
+
+    def test_retries_locked_database(self, sleep):
+        view = self.view(OperationalError('database is locked'), OperationalError('database is locked'))
+        with self.assertLogs('blog.sqlite', 'WARNING'):
+            self.assertEqual(view(RequestFactory().post('/')).content, b'ok')
+        self.assertEqual(sleep.call_count, 2)
+
+    def test_gives_up_after_last_attempt(self, sleep):
+        view = self.view(*[OperationalError('database is locked')] * 4)
+        with self.assertLogs('blog.sqlite', 'WARNING'), self.assertRaises(OperationalError):
+            view(RequestFactory().post('/'))
+
+    def test_other_errors_are_not_retried(self, sleep):
+        view = self.view(OperationalError('no such table: articles_article'))
+        with self.assertRaises(OperationalError):
+            view(RequestFactory().post('/'))
+        sleep.assert_not_called()
+
+
+@mock.patch('blog.sqlite.time.sleep')
+@override_settings(ARTICLES_IMAGE_PROCESSING_EAGER=True)
+class LockedWriteViewTests(TransactionTestCase):
+    """
+    Seule l'écriture est rejouée : ni le formulaire, ni le téléversement, ni
+    le reste de la vue. Sans transaction englobante, comme en production.
+    """
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        media = override_settings(MEDIA_ROOT=directory.name)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.user = CustomUser.objects.create_user('auteur', password='password123')
+        self.client.force_login(self.user)
+
+    def locked_once(self, model):
+        """Fait échouer le premier INSERT de `model` comme une base verrouillée"""
+        do_insert = model._do_insert
+        calls = []
+
+        def locked_insert(instance, *args, **kwargs):
+            calls.append(instance)
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+            return do_insert(instance, *args, **kwargs)
+        return mock.patch.object(model, '_do_insert', locked_insert)
+
+    def test_article_create_retries_only_the_insert(self, sleep):
+        category = Category.objects.create(name='Catégorie rejouée')
+        with (
+            self.locked_once(Article),
+            mock.patch.object(ArticleForm, 'save', autospec=True, side_effect=ArticleForm.save) as form_save,
+            self.assertLogs('blog.sqlite', 'WARNING'),
+        ):
+            response = self.client.post(reverse('article_create'), {
+                'title': 'Article rejoué', 'content': 'Contenu', 'category': category.pk,
+                'image': _uploaded_image(50, 50),
+            })
+        article = Article.objects.get()
+        self.assertRedirects(response, article.get_absolute_url(), fetch_redirect_response=False)
+        form_save.assert_called_once()
+        _, files = article.image.storage.listdir('articles/images')
+        self.assertEqual(files, ['photo.png'])
+        sleep.assert_called_once()
+
+    def test_comment_retries_only_the_insert(self, sleep):
+        article = Article.objects.create(title='Article commenté', content='Contenu', author=self.user)
+        with (
+            self.locked_once(Comment),
+            mock.patch.object(Article, 'ensure_rendered', autospec=True, side_effect=Article.ensure_rendered) as render,
+            self.assertLogs('blog.sqlite', 'WARNING'),
+        ):
+            response = self.client.post(article.get_absolute_url(), {'content': 'Commentaire rejoué'})
+        self.assertRedirects(response, article.get_absolute_url(), fetch_redirect_response=False)
+        render.assert_called_once()
+        self.assertEqual(Comment.objects.filter(article=article).count(), 1)
+        self.assertEqual(Article.objects.values_list('comments_count', flat=True).get(pk=article.pk), 1)
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def make_cache(self, **options):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        return SQLiteCache(os.path.join(directory.name, 'cache.sqlite3'), {'OPTIONS': options})
+
+    def stats(self, cache_backend):
+        connection = cache_backend._connection()
+        return (
+            connection.execute('SELECT entries, size FROM cache_stats').fetchone(),
+            connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries').fetchone(),
+        )
+
+    def test_stats_follow_every_write(self):
+        backend = self.make_cache(MAX_ENTRIES=1000)
+        for i in range(20):
+            backend.set(f'cle{i}', 'x' * i)
+        backend.set('cle3', 'beaucoup plus long')
+        backend.add('compteur', 1)
+        backend.incr('compteur', 10 ** 12)
+        backend.delete('cle0')
+        backend.delete_many(['cle1', 'cle2'])
+        stored, actual = self.stats(backend)
+        self.assertEqual(stored, actual)
+        backend.clear()
+        self.assertEqual(self.stats(backend), ((0, 0), (0, 0)))
+
+    def test_suite_never_writes_the_project_cache(self):
+        # Lanceur blog.test_runner : un LocMemCache, pas le fichier du projet
+        self.assertNotIsInstance(caches['default'], SQLiteCache)
+
+    def test_culls_by_entries_and_size(self):
+        backend = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2)
+        for i in range(30):
+            backend.set(f'cle{i}', i)
+        stored, actual = self.stats(backend)
+        self.assertEqual(stored, actual)
+        self.assertLessEqual(stored[0], 10)
+        self.assertEqual(backend.get('cle29'), 29)
+
+        backend = self.make_cache(MAX_SIZE=1000)
+        for i in range(10):
+            backend.set(f'bloc{i}', b'x' * 300)
+        stored, actual = self.stats(backend)
+        self.assertEqual(stored, actual)
+        self.assertLessEqual(stored[1], 1000)
+
+
+class BackupDatabaseTests(SimpleTestCase):
+    def test_copies_database_into_wal_replica(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source_path = os.path.join(directory, 'source.sqlite3')
+            replica_path = os.path.join(directory, 'replica.sqlite3')
+            source = sqlite3.connect(source_path)
+            source.execute('CREATE TABLE t (x)')
+            source.execute('INSERT INTO t VALUES (1), (2)')
+            source.commit()
+            source.close()
+
+            backup_database(source_path, replica_path)
+
+            replica = sqlite3.connect(replica_path)
+            try:
+                self.assertEqual(replica.execute('SELECT COUNT(*) FROM t').fetchone()[0], 2)
+                self.assertEqual(replica.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+            finally:
+                replica.close()
+
+
+@read_from_replica(lambda request: 0)
+def _routed_view(request):
+    """Base utilisée pour les articles et les utilisateurs, avant et après une écriture"""
+    before = [Article.objects.all().db, CustomUser.objects.all().db]
+    router.db_for_write(Article)
+    return HttpResponse(','.join(before + [Article.objects.all().db]))
+
+
+
+@override_settings(READ_REPLICA='replica')
+class ReadReplicaTests(CacheTestCase):
+    def routed(self, method='get', synced_at=None):
+        request = getattr(RequestFactory(), method)('/')
+        with mock.patch('blog.replicas.replica_synced_at', return_value=synced_at):
+            return _routed_view(request).content.decode()
+
+    def test_fresh_replica_serves_article_reads_until_a_write(self):
+        self.assertEqual(self.routed(synced_at=time.time()), 'replica,default,default')
+
+    def test_stale_or_missing_replica_is_not_used(self):
+        self.assertEqual(self.routed(synced_at=None), 'default,default,default')
+        # Copie antérieure à la dernière modification (ici : l'instant présent)
+        view = read_from_replica(lambda request: time.time())(_routed_view.__wrapped__)
+        with mock.patch('blog.replicas.replica_synced_at', return_value=time.time() - 60):
+            self.assertEqual(view(RequestFactory().get('/')).content.decode(), 'default,default,default')
+
+    def test_writes_are_never_served_from_replica(self):
+        self.assertEqual(self.routed('post', synced_at=time.time()), 'default,default,default')
+
+    @override_settings(READ_REPLICA=None)
+    def test_disabled_without_replica(self):
+        self.assertEqual(self.routed(synced_at=time.time()), 'default,default,default')
+
+    def test_visitor_reads_primary_after_writing(self):
+        user = CustomUser.objects.create_user('lecteur', password='password123')
+        article = Article.objects.create(title='Réplica', content='Texte', author=user)
+        self.client.force_login(user)
+        response = self.client.post(reverse('article_like_toggle', args=[article.slug]))
+        self.assertIn(PRIMARY_COOKIE, response.cookies)
+
+        # Le réplica paraît à jour : sans le cookie, la page le lirait (et le
+        # test échouerait, la base "replica" n'y étant pas autorisée)
+        with mock.patch('blog.replicas.replica_synced_at', return_value=time.time() + 60):
+            response = self.client.get(reverse('article_detail', args=[article.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['is_liked'])
+
+
+class SlugAllocationTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+
+    def create(self, title):
+        return Article.objects.create(title=title, content='Texte', author=self.user)
+
+    def test_same_title_gets_next_free_suffix(self):
+        slugs = [self.create('Mon titre').slug for _ in range(3)]
+        self.assertEqual(slugs, ['mon-titre', 'mon-titre-2', 'mon-titre-3'])
+
+    def test_titles_without_latin_characters_use_fallback(self):
+        self.assertEqual(self.create('🎉🎉').slug, 'article')
+        self.assertEqual(self.create('日本語').slug, 'article-2')
+        self.assertEqual(Category.objects.create(name='🍜').slug, 'categorie')
+
+    def test_long_titles_leave_room_for_suffix(self):
+        self.create('x' * 200)
+        slug = self.create('x' * 200).slug
+        self.assertTrue(slug.endswith('-2'))
+        self.assertLessEqual(len(slug), Article._meta.get_field('slug').max_length)
+
+    def test_bulk_allocation_resolves_batch_and_database_collisions(self):
+        self.create('Titre')
+        self.create('Titre 2')
+        with self.assertNumQueries(1):
+            slugs = allocate_slugs(Article.objects.all(), ['Titre', 'Titre', 'Titre 3', 'Autre'], 'article')
+        self.assertEqual(slugs, ['titre-3', 'titre-4', 'titre-3-2', 'autre'])
+
+    def test_route_prefixes_are_reserved(self):
+        from articles import urls as article_urls
+        prefixes = {
+            str(pattern.pattern).split('/')[0] for pattern in article_urls.urlpatterns
+        } - {''}
+        prefixes = {prefix for prefix in prefixes if not prefix.startswith(('<', '^'))}
+        self.assertTrue(prefixes <= Article.RESERVED_SLUGS, prefixes - Article.RESERVED_SLUGS)
+
+        for title in ('Archive', 'Trending', 'Feeds'):
+            with self.subTest(title=title):
+                article = self.create(title)
+                self.assertEqual(article.slug, f'{title.lower()}-2')
+                self.assertEqual(resolve(article.get_absolute_url()).url_name, 'article_detail')
+                self.assertContains(self.client.get(article.get_absolute_url()), title)
+
+        article = Article(title='Archive', slug='archive', content='Texte', author=self.user)
+        with self.assertRaises(ValidationError):
+            article.full_clean()
+
+    def test_prefix_lookup_uses_slug_index(self):
+        plan = Article.objects.filter(prefix_filter('slug', 'titre')).values_list('slug').explain()
+        self.assertIn('INDEX', plan)
+        self.assertNotIn('SCAN articles_article', plan)
+
+
+@override_settings(QUERY_BUDGETS_STRICT=True)
+class TrendingTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lecteur', password='password123')
+        cls.old, cls.recent, cls.quiet = [
+            Article.objects.create(title=title, content='Texte', author=cls.user)
+            for title in ('Ancien succès', 'Sujet du jour', 'Sans réaction')
+        ]
+
+    def test_recent_interactions_outrank_older_ones(self):
+        # Trois likes il y a deux demi-vies (0,75) contre un like maintenant (1)
+        two_days_ago = timezone.now() - timedelta(hours=48)
+        for _ in range(3):
+            record_interaction(self.old.pk, 'like', at=two_days_ago)
+        record_interaction(self.recent.pk, 'like')
+        self.assertEqual([article.pk for article in trending_articles()], [self.recent.pk, self.old.pk])
+
+    def test_comments_weigh_more_than_likes(self):
+        now = timezone.now()
+        record_interaction(self.old.pk, 'like', at=now)
+        record_interaction(self.recent.pk, 'comment', at=now)
+        self.assertEqual(trending_articles()[0].pk, self.recent.pk)
+
+    def test_unlike_removes_its_contribution(self):
+        url = reverse('article_like_toggle', args=[self.recent.slug])
+        self.client.force_login(self.user)
+        self.client.post(url)
+        self.assertTrue(TrendingScore.objects.filter(article=self.recent).exists())
+        self.client.post(url)
+        self.assertFalse(TrendingScore.objects.filter(article=self.recent).exists())
+
+    def test_incremental_scores_match_full_recompute(self):
+        other = CustomUser.objects.create_user('autre', password='password123')
+        for user in (self.user, other):
+            self.client.force_login(user)
+            self.client.post(reverse('article_like_toggle', args=[self.old.slug]))
+            self.client.post(self.recent.get_absolute_url(), {'content': 'Bravo'})
+        self.client.post(reverse('article_like_toggle', args=[self.old.slug]))
+        incremental = dict(TrendingScore.objects.values_list('article_id', 'log_score'))
+
+        self.assertEqual(recompute_trending(), 2)
+        recomputed = dict(TrendingScore.objects.values_list('article_id', 'log_score'))
+        self.assertEqual(incremental.keys(), recomputed.keys())
+        for article_id, log_score in recomputed.items():
+            self.assertAlmostEqual(incremental[article_id], log_score, places=6)
+
+    def test_ranking_pages(self):
+        record_interaction(self.recent.pk, 'like')
+        Article.objects.filter(pk=self.old.pk).update(likes_count=5)
+
+        response = self.client.get(reverse('article_trending'))
+        self.assertEqual([article.pk for article in response.context['articles']], [self.recent.pk])
+
+        response = self.client.get(reverse('article_most_liked'))
+        self.assertEqual([article.pk for article in response.context['articles']], [self.old.pk])
+        self.assertNotContains(response, self.quiet.title)
+
+
+class CategoryCountTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.jeux = Category.objects.create(name='Jeux')
+        cls.tech = Category.objects.create(name='Tech')
+
+    def counts(self):
+        return dict(Category.objects.filter(pk__in=[self.jeux.pk, self.tech.pk]).values_list('name', 'articles_count'))
+
+    def create(self, category, title='Article'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Article.objects.create(title=title, content='Texte', author=self.user, category=category)
+
+    def test_create_move_and_delete_adjust_counts(self):
+        article = self.create(self.jeux)
+        self.create(self.jeux)
+        self.assertEqual(self.counts(), {'Jeux': 2, 'Tech': 0})
+
+        article = Article.objects.get(pk=article.pk)
+        article.category = self.tech
+        article.save()
+        self.assertEqual(self.counts(), {'Jeux': 1, 'Tech': 1})
+
+        article.delete()
+        self.assertEqual(self.counts(), {'Jeux': 1, 'Tech': 0})
+
+        # Un renommage ne réécrit pas le compteur chargé avec la catégorie
+        jeux = Category.objects.get(pk=self.jeux.pk)
+        self.create(self.jeux)
+        jeux.name = 'Jeux vidéo'
+        jeux.save()
+        self.assertEqual(Category.objects.get(pk=self.jeux.pk).articles_count, 2)
+
+    def test_deleting_category_sets_articles_null_and_refreshes_sidebar(self):
+        article = self.create(self.tech)
+        self.assertIn(self.tech.slug, [category['slug'] for category in category_sidebar()])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tech.delete()
+        self.assertIsNone(Article.objects.get(pk=article.pk).category_id)
+        self.assertNotIn(self.tech.slug, [category['slug'] for category in category_sidebar()])
+
+        # Un article sans catégorie se supprime sans toucher aux compteurs
+        with self.captureOnCommitCallbacks(execute=True):
+            Article.objects.get(pk=article.pk).delete()
+        self.assertEqual(Category.objects.get(pk=self.jeux.pk).articles_count, 0)
+
+    def test_sidebar_is_served_from_cache_until_counts_change(self):
+        sidebar = category_sidebar()
+        with self.assertNumQueries(0):
+            self.assertEqual(category_sidebar(), sidebar)
+
+        # Les listes des autres catégories, en cache, affichent aussi le compteur
+        url = f"{reverse('article_list')}?category={self.tech.slug}"
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'MISS')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'HIT')
+        self.create(self.jeux)
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        counts = {category['slug']: category['articles_count'] for category in response.context['categories']}
+        self.assertEqual(counts[self.jeux.slug], 1)
+
+    def test_invalidation_reads_slugs_without_rebuilding_sidebar(self):
+        with self.assertNumQueries(1), mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            invalidate_category_counts()
+        # Seules les versions des portées sont écrites, pas la barre latérale
+        self.assertFalse(any(call.args[0].startswith('sidebar:') for call in cache_set.call_args_list))
+
+class ArchiveTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+
+    def months(self):
+        return list(ArchiveMonth.objects.order_by('year', 'month').values_list('year', 'month', 'articles_count'))
+
+    def test_create_and_delete_maintain_month_counts(self):
+        articles = [
+            Article.objects.create(title=f'Article {i}', content='Texte', author=self.user) for i in range(3)
+        ]
+        year, month = month_of(articles[0].created_at)
+        self.assertEqual(self.months(), [(year, month, 3)])
+        articles[0].delete()
+        self.assertEqual(self.months(), [(year, month, 2)])
+        for article in articles[1:]:
+            article.delete()
+        self.assertEqual(self.months(), [])
+
+        # Dates modifiées hors de l'ORM : recompute_archive rattrape
+        Article.objects.create(title='Ancien', content='Texte', author=self.user)
+        Article.objects.update(created_at=timezone.make_aware(datetime(2024, 12, 31, 23, 30)))
+        self.assertEqual(recompute_archive(), 1)
+        self.assertEqual(self.months(), [(2024, 12, 1)])
+
+    def test_month_page_paginates_by_cursor_within_month(self):
+        march = timezone.make_aware(datetime(2025, 3, 1))
+        for i in range(12):
+            Article.objects.create(title=f'Mars {i}', content='Texte', author=self.user)
+        for i, article in enumerate(Article.objects.order_by('id')):
+            Article.objects.filter(pk=article.pk).update(created_at=march + timedelta(days=i))
+        Article.objects.create(title='Avril', content='Texte', author=self.user)
+        Article.objects.filter(title='Avril').update(created_at=march + timedelta(days=40))
+        recompute_archive()
+
+        url = reverse('article_archive_month', args=[2025, 3])
+        response = self.client.get(url)
+        first = [article.title for article in response.context['page_obj']]
+        self.assertEqual(first, [f'Mars {i}' for i in range(11, 1, -1)])
+        self.assertEqual(response.context['newer'].month, 4)
+        self.assertIsNone(response.context['older'])
+
+        response = self.client.get(url, {'cursor': response.context['page_obj'].next_cursor})
+        self.assertEqual([article.title for article in response.context['page_obj']], ['Mars 1', 'Mars 0'])
+        self.assertFalse(response.context['page_obj'].has_next)
+
+        self.assertContains(self.client.get(reverse('article_archive')), '12 articles')
+        self.assertEqual(self.client.get(reverse('article_archive_month', args=[2025, 5])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('article_archive_year', args=[2019])).status_code, 404)
+
+@skipUnless(
+    importlib.util.find_spec('numpy') and importlib.util.find_spec('scipy'),
+    "NumPy et SciPy sont nécessaires à la construction de l'index",
+)
+class RelatedArticleTests(CacheTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('auteur', password='password123')
+        cls.tomato, cls.garden, cls.python, cls.django = [
+            Article.objects.create(title=title, content=content, author=cls.user)
+            for title, content in (
+                ('Tomates du potager', 'Arroser les tomates du potager le soir, tailler les tomates.'),
+                ('Potager en ville', 'Un potager sur le balcon : tomates, salades et herbes.'),
+                ('Débuter en Python', 'Les listes Python, les fonctions Python et les modules.'),
+                ('Django pour Python', 'Django est un framework Python : modèles, vues et gabarits.'),
+            )
+        ]
+
+    def ranked(self, article):
+        return [related.pk for related in related_articles(article)]
+
+    def test_build_keeps_closest_articles_by_rank(self):
+        self.assertEqual(build_related(k=1), 4)
+        self.assertEqual(self.ranked(self.tomato), [self.garden.pk])
+        self.assertEqual(self.ranked(self.python), [self.django.pk])
+        self.assertFalse(RelatedArticle.objects.filter(article=self.tomato, related=self.tomato).exists())
+
+    def test_refresh_recomputes_only_changed_articles(self):
+        build_related()
+        scores = dict(RelatedArticle.objects.filter(article=self.tomato).values_list('related_id', 'score'))
+        flask = Article.objects.create(
+            title='Flask ou Django', content='Deux frameworks Python : Flask, Django, leurs vues.', author=self.user
+        )
+        self.assertEqual(refresh_related(), 1)
+        self.assertIn(flask.pk, self.ranked(self.django))
+        self.assertEqual(self.ranked(flask)[0], self.django.pk)
+        # Les listes sans lien avec le nouvel article ne sont pas réécrites
+        self.assertEqual(
+            dict(RelatedArticle.objects.filter(article=self.tomato).values_list('related_id', 'score')), scores
+        )
+        self.assertEqual(refresh_related(), 0)
+
+    def test_detail_page_reads_related_in_one_query(self):
+        build_related()
+        with self.assertNumQueries(1):
+            related = related_articles(self.python)
+            self.assertEqual(related[0].title, self.django.title)
+        response = self.client.get(self.python.get_absolute_url())
+        self.assertContains(response, 'Articles similaires')
+        self.assertEqual(response.context['related_articles'][0].pk, self.django.pk)
+
+# URLconf des tests des vues asynchrones : mêmes chemins et mêmes noms, les
+# vues asynchrones étant déclarées avant les vues synchrones
+urlpatterns = [
+    path('', async_views.article_list, name='article_list'),
+    path('<slug:slug>/', async_views.article_detail, name='article_detail'),
+    path('<slug:slug>/like/toggle/', async_views.article_like_toggle, name='article_like_toggle'),
+    path('', include('blog.urls')),
+]
+
+
+@override_settings(ROOT_URLCONF='articles.tests', QUERY_BUDGETS_STRICT=True)
+class AsyncViewTests(CacheTestCase):
+    """Vues asynchrones (ASGI) : mêmes pages et mêmes budgets que les vues synchrones"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user('lecteur', password='password123')
+        cls.category = Category.objects.create(name='Asynchrone')
+        cls.article = Article.objects.create(
+            title='Article asynchrone', content='Contenu **Markdown**', author=cls.user, category=cls.category
+        )
+        Comment.objects.bulk_create([
+            Comment(article=cls.article, author=cls.user, content=f'Commentaire {i}') for i in range(25)
+        ])
+
+    async def test_article_list(self):
+        self.assertTrue(iscoroutinefunction(resolve(reverse('article_list')).func))
+        await self.async_client.aforce_login(self.user)
+        for params in ({}, {'category': self.category.slug}, {'q': 'asynchrone'}, {'pagination': 'cursor'}):
+            with self.subTest(params=params):
+                response = await self.async_client.get(reverse('article_list'), params)
+                self.assertContains(response, 'Article asynchrone')
+
+    async def test_article_detail_renders_stale_markdown(self):
+        await Article.objects.filter(pk=self.article.pk).aupdate(content_html='', renderer_version=0)
+        response = await self.async_client.get(self.article.get_absolute_url())
+        self.assertContains(response, '<strong>Markdown</strong>')
+        self.assertContains(response, 'Commentaire 24')
+        self.assertNotContains(response, 'Commentaire 4<')
+        article = await Article.objects.aget(pk=self.article.pk)
+        self.assertFalse(article.needs_render())
+
+    async def test_conditional_get(self):
+        url = self.article.get_absolute_url()
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 304)
+
+    async def test_like_toggle(self):
+        await self.async_client.aforce_login(self.user)
+        url = reverse('article_like_toggle', kwargs={'slug': self.article.slug})
+        self.assertEqual((await self.async_client.post(url)).json(), {'liked': True, 'likes_count': 1})
+        self.assertEqual((await self.async_client.post(url)).json(), {'liked': False, 'likes_count': 0})
+
+    def record_cache_threads(self):
+        """Threads des appels au cache pendant le bloc (le cache SQLite peut attendre un verrou)"""
+        threads = []
+        patches = []
+        for name in ('get', 'get_many', 'set', 'add', 'incr'):
+            original = getattr(cache, name)
+
+            def recorder(*args, _original=original, **kwargs):
+                threads.append(threading.get_ident())
+                return _original(*args, **kwargs)
+            patches.append(mock.patch.object(cache, name, recorder))
+        return threads, patches
+
+    @override_settings(READ_REPLICA='replica')
+    async def test_replica_check_runs_off_event_loop(self):
+        # Copie ancienne : last_changed() est consulté, puis la base principale est lue
+        cache.set('replica:replica:synced_at', 1.0, None)
+        threads, patches = self.record_cache_threads()
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        response = await self.async_client.get(self.article.get_absolute_url())
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
+
+    async def test_cache_is_never_used_on_event_loop(self):
+        threads, patches = self.record_cache_threads()
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        for url in (self.article.get_absolute_url(), reverse('article_list')):
+            with self.subTest(url=url):
+                for _ in range(2):
+                    response = await self.async_client.get(url)
+                self.assertEqual(response['X-Page-Cache'], 'HIT')
+        # Barre latérale de la liste, hors du cache de pages
+        await self.async_client.aforce_login(self.user)
+        self.assertContains(await self.async_client.get(reverse('article_list')), 'Asynchrone')
+        self.assertTrue(threads)
+        self.assertNotIn(threading.get_ident(), threads)
 
-# Create your tests here.
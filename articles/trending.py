@@ -0,0 +1,143 @@
+"""
+Classement des articles en tendance : likes et commentaires récents, avec
+une décroissance exponentielle (demi-vie `TRENDING_HALF_LIFE_HOURS`).
+
+Le score d'un article à l'instant t vaut Σ poids × exp(-(t - tᵢ) / tau) sur
+ses interactions. Toutes les interactions perdent le même facteur au même
+rythme : l'ordre est inchangé si l'on mesure chaque score par rapport à une
+date fixe, `TRENDING_EPOCH`. Chaque interaction ajoute donc une fois pour
+toutes poids × exp((tᵢ - EPOCH) / tau) au score stocké, sans jamais
+réécrire les autres lignes. Ce nombre grandit sans limite avec le temps : il
+est stocké sous forme de logarithme (`TrendingScore.log_score`).
+
+- `record_interaction()` met le score à jour à chaque like ou commentaire
+  (ajout ou retrait), dans la transaction de l'écriture.
+- `recompute_trending()` recalcule toute la table depuis les likes et les
+  commentaires (commande `recompute_trending`) : il rattrape les insertions
+  en masse et les suppressions en cascade, et retire les scores devenus
+  négligeables.
+- `trending_articles()` lit les N premiers sur l'index de `log_score`.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.utils import timezone
+
+from .models import Article, Comment, Like, TrendingScore
+
+TRENDING_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+# Demi-vie d'une interaction : au-delà, elle compte deux fois moins
+TRENDING_HALF_LIFE_HOURS = getattr(settings, 'ARTICLES_TRENDING_HALF_LIFE_HOURS', 24)
+
+TRENDING_WEIGHTS = getattr(settings, 'ARTICLES_TRENDING_WEIGHTS', {'like': 1.0, 'comment': 2.0})
+
+# Nombre d'articles affichés par classement
+TRENDING_SIZE = getattr(settings, 'ARTICLES_TRENDING_SIZE', 20)
+
+# Score (à l'instant présent) en dessous duquel un article sort de la table
+MIN_SCORE = 0.01
+
+# Écart (en logarithme) sous lequel un retrait annule tout le score
+REMOVAL_TOLERANCE = 1e-9
+
+# Au-delà de 20 demi-vies, une interaction pèse moins d'un millionième
+HORIZON_HALF_LIVES = 20
+
+TAU = TRENDING_HALF_LIFE_HOURS * 3600 / math.log(2)
+
+
+def _log_weight(kind, at):
+    return math.log(TRENDING_WEIGHTS[kind]) + (at - TRENDING_EPOCH).total_seconds() / TAU
+
+
+def _log_add(a, b):
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+def current_score(log_score, now=None):
+    """Score décru à l'instant `now`, comparable d'un article à l'autre"""
+    now = now or timezone.now()
+    return math.exp(log_score - (now - TRENDING_EPOCH).total_seconds() / TAU)
+
+
+def record_interaction(article_id, kind, at=None, removed=False):
+    """
+    Ajoute (ou retire, avec `removed`) au score de l'article la contribution
+    d'un like ou d'un commentaire (`kind`) daté de `at`. Pour un retrait, `at`
+    est la date de l'interaction supprimée : sa contribution exacte est
+    retranchée.
+
+    Le nouveau logarithme est calculé par la requête UPDATE elle-même :
+    log(eˢ + eᶜ) = max + ln(1 + exp(min - max)) et log(eˢ - eᶜ) = s + ln(1 - exp(c - s)).
+    """
+    contribution = Value(_log_weight(kind, at or timezone.now()))
+    scores = TrendingScore.objects.filter(article_id=article_id)
+    now = timezone.now()
+    if removed:
+        # Une contribution égale au score (à l'arrondi près) était la seule : la ligne disparaît
+        remaining = scores.filter(log_score__gt=contribution + REMOVAL_TOLERANCE)
+        if not remaining.update(log_score=F('log_score') + Ln(1 - Exp(contribution - F('log_score'))), updated_at=now):
+            scores.delete()
+        return
+    high = Greatest(F('log_score'), contribution)
+    low = Least(F('log_score'), contribution)
+    if not scores.update(log_score=high + Ln(1 + Exp(low - high)), updated_at=now):
+        # Première interaction récente : transaction BEGIN IMMEDIATE en cours,
+        # aucune autre écriture ne peut créer la ligne entre-temps
+        TrendingScore.objects.create(article_id=article_id, log_score=contribution.value)
+
+
+def recompute_trending(now=None, batch_size=1000):
+    """
+    Recalcule tous les scores à partir des likes et commentaires des
+    `HORIZON_HALF_LIVES` dernières demi-vies. Retourne le nombre d'articles
+    classés.
+    """
+    now = now or timezone.now()
+    since = now - timedelta(hours=TRENDING_HALF_LIFE_HOURS * HORIZON_HALF_LIVES)
+    threshold = math.log(MIN_SCORE) + (now - TRENDING_EPOCH).total_seconds() / TAU
+    # Lecture et remplacement dans la même transaction : aucune interaction
+    # enregistrée entre les deux ne peut être perdue
+    with transaction.atomic():
+        scores = {}
+        for kind, model in (('like', Like), ('comment', Comment)):
+            events = model.objects.filter(created_at__gte=since).values_list('article_id', 'created_at')
+            for article_id, created_at in events.iterator(chunk_size=batch_size):
+                contribution = _log_weight(kind, created_at)
+                previous = scores.get(article_id)
+                scores[article_id] = contribution if previous is None else _log_add(previous, contribution)
+        rows = [
+            TrendingScore(article_id=article_id, log_score=log_score, updated_at=now)
+            for article_id, log_score in scores.items()
+            if log_score >= threshold
+        ]
+        TrendingScore.objects.all().delete()
+        TrendingScore.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _ranked(queryset):
+    return (
+        queryset.select_related('category', 'author')
+        .defer('content', 'content_html')
+    )
+
+
+def trending_articles(limit=TRENDING_SIZE):
+    """Les `limit` articles au plus fort score de tendance"""
+    return list(
+        _ranked(Article.objects.filter(trending__isnull=False))
+        .annotate(log_score=F('trending__log_score'))
+        .order_by('-trending__log_score', '-trending__article')[:limit]
+    )
+
+
+def most_liked_articles(limit=TRENDING_SIZE):
+    """Les `limit` articles les plus aimés, sur l'index de likes_count"""
+    return list(_ranked(Article.objects.filter(likes_count__gt=0)).order_by('-likes_count', '-id')[:limit])
@@ -1,12 +1,32 @@
-from django.urls import path
-from .views import article_list, article_detail, article_create, article_edit, article_delete, comment_delete, article_like
+from django.conf import settings
+from django.urls import path, re_path
+from .feeds import FEED_FORMATS, article_feed
+from .views import article_list, article_detail, article_comments, article_create, article_edit, article_delete, comment_delete, article_like, article_like_toggle, article_trending, article_archive, article_archive_month, cache_stats
+
+if settings.ARTICLES_ASYNC_VIEWS:
+    # Déploiement ASGI : vues asynchrones pour les chemins les plus sollicités
+    from .async_views import article_list, article_detail, article_like_toggle
+
+# Seuls les formats connus sont des flux : /feeds/like/ et les autres routes
+# d'un article reviennent aux motifs <slug:slug>/...
+FEED_FORMAT = '(?P<feed_format>{})'.format('|'.join(FEED_FORMATS))
 
 urlpatterns = [
     path('', article_list, name='article_list'),
     path('create/', article_create, name='article_create'),
+    path('stats/cache/', cache_stats, name='cache_stats'),
+    path('trending/', article_trending, name='article_trending'),
+    path('trending/likes/', article_trending, {'ranking': 'likes'}, name='article_most_liked'),
+    path('archive/', article_archive, name='article_archive'),
+    path('archive/<int:year>/', article_archive, name='article_archive_year'),
+    path('archive/<int:year>/<int:month>/', article_archive_month, name='article_archive_month'),
+    re_path(rf'^feeds/{FEED_FORMAT}/$', article_feed, name='article_feed'),
+    re_path(rf'^feeds/(?P<category_slug>[-a-zA-Z0-9_]+)/{FEED_FORMAT}/$', article_feed, name='category_feed'),
     path('<slug:slug>/', article_detail, name='article_detail'),
+    path('<slug:slug>/comments/', article_comments, name='article_comments'),
     path('<slug:slug>/edit/', article_edit, name='article_edit'),
     path('<slug:slug>/delete/', article_delete, name='article_delete'),
     path('<slug:slug>/comment/<int:comment_id>/delete/', comment_delete, name='comment_delete'),
     path('<slug:slug>/like/', article_like, name='article_like'),
+    path('<slug:slug>/like/toggle/', article_like_toggle, name='article_like_toggle'),
 ]
\ No newline at end of file
@@ -1,43 +1,94 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.core.paginator import Paginator
-from django.db.models import Q
-import markdown
-from .models import Article, Category, Comment, Like
+from django.db import transaction
+from django.http import Http404, JsonResponse
+from django.views.decorators.http import require_POST
+from blog.replicas import read_from_replica
+from blog.sqlite import retry_on_locked
+from .models import Article, Comment
 from .forms import ArticleForm, CommentForm
+from .comments import add_comment
+from .likes import toggle_like
+from .archive import adjacent_months, archive_months, month_articles, month_bounds
+from .cache import cache_anonymous_page, category_sidebar, detail_scope, last_changed, list_scope, page_cache_stats
+from .conditional import conditional_article_page, conditional_list_page
+from .counters import adjust_counter
+from .pagination import paginate_by_cursor
+from .related import related_articles
+from .search import search_articles
+from .trending import current_score, most_liked_articles, record_interaction, trending_articles
 
+# Nombre de commentaires chargés à la fois sur la page d'un article
+COMMENTS_PER_PAGE = 20
+
+@read_from_replica(lambda request: last_changed(list_scope(request.GET.get('category', ''))))
+@conditional_list_page
+@cache_anonymous_page(lambda request: list_scope(request.GET.get('category', '')))
 def article_list(request):
     query = request.GET.get('q', '')
     category_slug = request.GET.get('category', '')
-    articles = Article.objects.all().select_related('category', 'author').order_by('-created_at')
+    # Le corps des articles n'est jamais affiché dans la liste : seul l'extrait
+    # pré-calculé est chargé, et uniquement pour la page demandée
+    articles = (
+        Article.objects.select_related('category', 'author')
+        .defer('content', 'content_html')
+        .order_by('-created_at', '-id')
+    )
     
     if category_slug:
         articles = articles.filter(category__slug=category_slug)
     if query:
-        articles = articles.filter(Q(title__icontains=query) | Q(content__icontains=query))
-    
-    for article in articles:
-        article.content = markdown.markdown(article.content)
+        articles = search_articles(articles, query)
     
-    paginator = Paginator(articles, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Mode « curseur » (?cursor=... ou ?pagination=cursor) : pas de COUNT ni d'OFFSET,
+    # utile pour les robots qui parcourent l'archive en profondeur
+    cursor = request.GET.get('cursor', '')
+    cursor_mode = bool(cursor) or request.GET.get('pagination') == 'cursor'
+    page_range = None
+    if cursor_mode:
+        page_obj = paginate_by_cursor(articles, cursor, 10)
+    else:
+        paginator = Paginator(articles, 10)
+        page_number = request.GET.get('page')
+        page_obj = paginator.get_page(page_number)
+        # Plage de pages tronquée : le nombre de liens reste constant quelle que soit la taille de la table
+        page_range = paginator.get_elided_page_range(page_obj.number)
     
-    categories = Category.objects.all()
+    categories = category_sidebar()
     
     return render(request, 'articles/article_list.html', {
         'page_obj': page_obj,
+        'page_range': page_range,
+        'cursor_mode': cursor_mode,
         'categories': categories,
         'query': query,
         'selected_category': category_slug,
     })
 
+@read_from_replica(lambda request, **kwargs: last_changed(list_scope()))
+@cache_anonymous_page(lambda request, **kwargs: list_scope())
+def article_trending(request, ranking='trending'):
+    """Classements : tendances (score décroissant dans le temps) ou articles les plus aimés"""
+    if ranking == 'likes':
+        articles = most_liked_articles()
+    else:
+        articles = trending_articles()
+        for article in articles:
+            article.trending_score = current_score(article.log_score)
+    return render(request, 'articles/article_trending.html', {
+        'articles': articles,
+        'ranking': ranking,
+    })
+
+@read_from_replica(lambda request, slug: last_changed(detail_scope(slug)))
+@conditional_article_page
+@cache_anonymous_page(lambda request, slug: detail_scope(slug))
 def article_detail(request, slug):
     article = get_object_or_404(Article, slug=slug)
-    article.content = markdown.markdown(article.content)
-    comments = article.comments.all().order_by('-created_at')
-    is_liked = article.likes.filter(user=request.user).exists() if request.user.is_authenticated else False
+    article.ensure_rendered()
     
     if request.method == 'POST':
         if not request.user.is_authenticated:
@@ -45,20 +96,83 @@ def article_detail(request, slug):
             return redirect('login')
         form = CommentForm(request.POST)
         if form.is_valid():
-            comment = form.save(commit=False)
-            comment.article = article
-            comment.author = request.user
-            comment.save()
+            add_comment(form, article, request.user)
             messages.success(request, 'Commentaire ajouté avec succès !')
             return redirect('article_detail', slug=article.slug)
     else:
         form = CommentForm()
     
+    # Chargés seulement quand la page est rendue (pas pour un commentaire redirigé)
+    comments_page = paginate_by_cursor(
+        article.comments.select_related('author'), request.GET.get('cursor'), COMMENTS_PER_PAGE
+    )
+    is_liked = article.likes.filter(user=request.user).exists() if request.user.is_authenticated else False
+    
     return render(request, 'articles/article_detail.html', {
         'article': article,
-        'comments': comments,
+        'comments_page': comments_page,
         'form': form,
         'is_liked': is_liked,
+        'related_articles': related_articles(article),
+    })
+
+@read_from_replica(lambda request, **kwargs: last_changed(list_scope()))
+@cache_anonymous_page(lambda request, **kwargs: list_scope())
+def article_archive(request, year=None):
+    """Navigation des archives (toutes les années, ou les mois d'une année) depuis ArchiveMonth"""
+    months = list(archive_months(year))
+    if year is not None and not months:
+        raise Http404("Aucun article publié cette année-là.")
+    return render(request, 'articles/article_archive.html', {
+        'months': months,
+        'year': year,
+    })
+
+@read_from_replica(lambda request, **kwargs: last_changed(list_scope()))
+@cache_anonymous_page(lambda request, **kwargs: list_scope())
+def article_archive_month(request, year, month):
+    """Articles d'un mois, paginés par curseur à l'intérieur du mois"""
+    archive_month = archive_months(year).filter(month=month).first()
+    if archive_month is None:
+        raise Http404("Aucun article publié ce mois-là.")
+    page_obj = paginate_by_cursor(month_articles(year, month), request.GET.get('cursor', ''), 10)
+    older, newer = adjacent_months(year, month)
+    return render(request, 'articles/article_archive_month.html', {
+        'archive_month': archive_month,
+        'month_start': month_bounds(year, month)[0],
+        'page_obj': page_obj,
+        'older': older,
+        'newer': newer,
+    })
+
+@read_from_replica(lambda request, slug: last_changed(detail_scope(slug)))
+@conditional_article_page
+@cache_anonymous_page(lambda request, slug: detail_scope(slug))
+def article_comments(request, slug):
+    """
+    Page suivante du fil de commentaires (?cursor=...), en fragment HTML pour
+    la page de l'article ou en JSON avec ?format=json
+    """
+    article = get_object_or_404(Article.objects.only('id', 'slug', 'author_id'), slug=slug)
+    page = paginate_by_cursor(
+        article.comments.select_related('author'), request.GET.get('cursor'), COMMENTS_PER_PAGE
+    )
+    if request.GET.get('format') == 'json':
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'content': comment.content,
+                    'created_at': comment.created_at.isoformat(),
+                }
+                for comment in page
+            ],
+            'next_cursor': page.next_cursor,
+        })
+    return render(request, 'articles/_comment_list.html', {
+        'article': article,
+        'comments_page': page,
     })
 
 @login_required
@@ -68,7 +182,9 @@ def article_create(request):
         if form.is_valid():
             article = form.save(commit=False)
             article.author = request.user
-            article.save()
+            # Seule l'insertion est rejouée : l'image, enregistrée par la
+            # première tentative, n'est pas téléversée une seconde fois
+            retry_on_locked(article.save)()
             messages.success(request, 'Article créé avec succès !')
             return redirect('article_detail', slug=article.slug)
     else:
@@ -111,18 +227,39 @@ def comment_delete(request, slug, comment_id):
         messages.error(request, "Vous n'êtes pas autorisé à supprimer ce commentaire.")
         return redirect('article_detail', slug=slug)
     if request.method == 'POST':
-        comment.delete()
+        with transaction.atomic():
+            comment.delete()
+            adjust_counter(comment.article_id, 'comments_count', -1)
+            record_interaction(comment.article_id, 'comment', at=comment.created_at, removed=True)
         messages.success(request, 'Commentaire supprimé avec succès !')
         return redirect('article_detail', slug=slug)
     return render(request, 'articles/comment_confirm_delete.html', {'article': article, 'comment': comment})
 
 @login_required
+@retry_on_locked
 def article_like(request, slug):
-    article = get_object_or_404(Article, slug=slug)
-    like, created = Like.objects.get_or_create(article=article, user=request.user)
-    if not created:
-        like.delete()
-        messages.success(request, 'Like retiré.')
-    else:
+    article = get_object_or_404(Article.objects.only('id', 'slug'), slug=slug)
+    liked, _ = toggle_like(article.pk, request.user)
+    if liked:
         messages.success(request, 'Article liké !')
-    return redirect('article_detail', slug=article.slug)
\ No newline at end of file
+    else:
+        messages.success(request, 'Like retiré.')
+    return redirect('article_detail', slug=article.slug)
+
+@require_POST
+@retry_on_locked
+def article_like_toggle(request, slug):
+    """Bascule le like en une transaction et renvoie le nouvel état en JSON"""
+    if not request.user.is_authenticated:
+        return JsonResponse({'error': 'Authentification requise.'}, status=401)
+    article_id = Article.objects.filter(slug=slug).values_list('pk', flat=True).first()
+    if article_id is None:
+        raise Http404("Article introuvable.")
+    liked, likes_count = toggle_like(article_id, request.user)
+    return JsonResponse({'liked': liked, 'likes_count': likes_count})
+
+
+@staff_member_required
+def cache_stats(request):
+    """Compteurs de succès/échecs du cache de pages anonymes"""
+    return JsonResponse(page_cache_stats())
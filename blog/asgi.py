@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog.settings')
+# Sous ASGI, la liste, le détail et le like sont servis par les vues asynchrones
+os.environ.setdefault('ARTICLES_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
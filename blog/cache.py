@@ -0,0 +1,300 @@
+"""
+Backend de cache partagé entre processus, stocké dans un fichier SQLite.
+
+Contrairement à LocMemCache, tous les workers (gunicorn, runserver, commandes
+de gestion) d'une même machine lisent et écrivent le même cache : une
+invalidation faite par un processus est immédiatement visible des autres.
+Aucun service externe n'est nécessaire.
+
+Configuration :
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'blog.cache.SQLiteCache',
+            'LOCATION': BASE_DIR / 'cache.sqlite3',
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                'MAX_ENTRIES': 10000,          # nombre maximal d'entrées
+                'MAX_SIZE': 64 * 1024 * 1024,  # taille cumulée maximale des valeurs (octets)
+                'CULL_FREQUENCY': 4,           # fraction (1/N) évincée quand une limite est atteinte
+            },
+        }
+    }
+
+Dans blog/settings.py, `LOCATION` se règle par la variable d'environnement
+BLOG_CACHE_LOCATION ; les tests n'utilisent jamais ce fichier.
+
+Les entrées expirées sont supprimées en priorité, puis les moins récemment
+utilisées (LRU, à la seconde près). Le nombre d'entrées et leur taille
+cumulée sont tenus à jour par des triggers dans la table `cache_stats` :
+vérifier les limites coûte une lecture de ligne par écriture.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        expires REAL,
+        accessed REAL NOT NULL,
+        size INTEGER NOT NULL
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS cache_entries_expires ON cache_entries (expires)",
+    "CREATE INDEX IF NOT EXISTS cache_entries_accessed ON cache_entries (accessed)",
+    # Nombre d'entrées et taille cumulée, tenus à jour par des triggers : la
+    # vérification des limites à chaque écriture lit une ligne au lieu de
+    # parcourir toute la table
+    """
+    CREATE TABLE IF NOT EXISTS cache_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        entries INTEGER NOT NULL,
+        size INTEGER NOT NULL
+    )
+    """,
+    """
+    INSERT INTO cache_stats (id, entries, size)
+    SELECT 1, (SELECT COUNT(*) FROM cache_entries), (SELECT COALESCE(SUM(size), 0) FROM cache_entries)
+    WHERE NOT EXISTS (SELECT 1 FROM cache_stats)
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries BEGIN
+        UPDATE cache_stats SET entries = entries + 1, size = size + new.size WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries BEGIN
+        UPDATE cache_stats SET entries = entries - 1, size = size - old.size WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entries_resize AFTER UPDATE OF size ON cache_entries BEGIN
+        UPDATE cache_stats SET size = size - old.size + new.size WHERE id = 1;
+    END
+    """,
+]
+
+# Granularité de la mise à jour de la date d'accès : évite une écriture à chaque lecture
+ACCESS_RESOLUTION = 1.0
+
+
+class SQLiteCache(BaseCache):
+    pickle_protocol = pickle.HIGHEST_PROTOCOL
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = str(location)
+        options = params.get('OPTIONS', {})
+        self._max_size = options.get('MAX_SIZE')
+        self._timeout_seconds = float(options.get('BUSY_TIMEOUT', 5))
+        self._local = threading.local()
+
+    # Connexions -----------------------------------------------------------
+
+    def _connection(self):
+        """Connexion propre au thread et au processus (sûr après un fork)"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(
+                self._path,
+                timeout=self._timeout_seconds,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            # Les compteurs et leurs triggers sont créés ensemble, sans écriture
+            # concurrente entre les deux
+            with _ImmediateTransaction(connection):
+                for statement in SCHEMA:
+                    connection.execute(statement)
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _write(self):
+        """Transaction d'écriture : BEGIN IMMEDIATE sérialise les écrivains entre processus"""
+        return _ImmediateTransaction(self._connection())
+
+    # Sérialisation ----------------------------------------------------------
+
+    def _dumps(self, value):
+        return pickle.dumps(value, self.pickle_protocol)
+
+    def _loads(self, blob):
+        return pickle.loads(blob)
+
+    # API du cache -----------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._get_many([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = self._get_many(list(key_map))
+        return {key_map[key]: value for key, value in found.items()}
+
+    def _get_many(self, keys):
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        connection = self._connection()
+        rows = connection.execute(
+            f'SELECT key, value, accessed FROM cache_entries '
+            f'WHERE key IN ({placeholders}) AND (expires IS NULL OR expires > ?)',
+            [*keys, now],
+        ).fetchall()
+        stale = [key for key, _, accessed in rows if now - accessed >= ACCESS_RESOLUTION]
+        if stale:
+            placeholders = ', '.join('?' * len(stale))
+            connection.execute(
+                f'UPDATE cache_entries SET accessed = ? WHERE key IN ({placeholders})',
+                [now, *stale],
+            )
+        return {key: self._loads(value) for key, value, _ in rows}
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._store(key, value, timeout, mode='set')
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._store(key, value, timeout, mode='add')
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        for key, value in data.items():
+            self.set(key, value, timeout, version=version)
+        return []
+
+    def _store(self, key, value, timeout, mode):
+        blob = self._dumps(value)
+        expires = self.get_backend_timeout(timeout)
+        now = time.time()
+        with self._write() as connection:
+            if mode == 'add':
+                exists = connection.execute(
+                    'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                    (key, now),
+                ).fetchone()
+                if exists:
+                    return False
+            # Pas de INSERT OR REPLACE : la suppression implicite ne déclencherait
+            # pas le trigger de cache_stats
+            connection.execute(
+                'INSERT INTO cache_entries (key, value, expires, accessed, size) '
+                'VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, '
+                'accessed = excluded.accessed, size = excluded.size',
+                (key, blob, expires, now, len(blob)),
+            )
+            self._cull(connection, now)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as connection:
+            cursor = connection.execute(
+                'UPDATE cache_entries SET expires = ?, accessed = ? '
+                'WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (self.get_backend_timeout(timeout), now, key, now),
+            )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        """Incrément atomique : lecture et écriture dans la même transaction IMMEDIATE"""
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        with self._write() as connection:
+            row = connection.execute(
+                'SELECT value FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+                (key, now),
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            new_value = self._loads(row[0]) + delta
+            blob = self._dumps(new_value)
+            connection.execute(
+                'UPDATE cache_entries SET value = ?, accessed = ?, size = ? WHERE key = ?',
+                (blob, now, len(blob), key),
+            )
+        return new_value
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            'SELECT 1 FROM cache_entries WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (key, time.time()),
+        ).fetchone()
+        return row is not None
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        with self._write() as connection:
+            cursor = connection.execute('DELETE FROM cache_entries WHERE key = ?', (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if not keys:
+            return
+        placeholders = ', '.join('?' * len(keys))
+        with self._write() as connection:
+            connection.execute(f'DELETE FROM cache_entries WHERE key IN ({placeholders})', keys)
+
+    def clear(self):
+        with self._write() as connection:
+            connection.execute('DELETE FROM cache_entries')
+
+    def close(self, **kwargs):
+        # La connexion est conservée d'une requête à l'autre (comme LocMemCache)
+        pass
+
+    # Éviction ---------------------------------------------------------------
+
+    def _stats(self, connection):
+        return connection.execute('SELECT entries, size FROM cache_stats WHERE id = 1').fetchone()
+
+    def _over_limits(self, count, size):
+        return count > self._max_entries or (self._max_size is not None and size > self._max_size)
+
+    def _cull(self, connection, now):
+        count, size = self._stats(connection)
+        if not self._over_limits(count, size):
+            return
+        connection.execute('DELETE FROM cache_entries WHERE expires IS NOT NULL AND expires <= ?', (now,))
+        count, size = self._stats(connection)
+        if self._over_limits(count, size):
+            # Même sémantique que les backends de Django : 1/CULL_FREQUENCY des entrées,
+            # CULL_FREQUENCY = 0 vidant tout le cache
+            to_delete = count if self._cull_frequency == 0 else max(1, count // self._cull_frequency)
+            connection.execute(
+                'DELETE FROM cache_entries WHERE key IN '
+                '(SELECT key FROM cache_entries ORDER BY accessed LIMIT ?)',
+                (to_delete,),
+            )
+
+
+class _ImmediateTransaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute('BEGIN IMMEDIATE')
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.connection.execute('COMMIT')
+        else:
+            self.connection.execute('ROLLBACK')
+        return False
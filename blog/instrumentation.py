@@ -0,0 +1,223 @@
+"""
+Instrumentation des requêtes : nombre et durée des requêtes SQL, temps de
+rendu des templates et du Markdown, par vue.
+
+- `InstrumentationMiddleware` mesure chaque requête, ajoute les en-têtes
+  X-Query-Count, X-Query-Time-Ms, X-Template-Time-Ms, X-Markdown-Time-Ms et
+  Server-Timing, et conserve une fenêtre glissante de mesures par vue,
+  consultable (staff) via `stats_view`.
+- `InstrumentedDjangoTemplates` est le backend de templates qui chronomètre
+  les rendus.
+- `track(metric)` chronomètre un bloc de code quelconque.
+- `QUERY_BUDGETS = {'nom_de_vue': nombre_max_de_requêtes}` fixe un budget de
+  requêtes SQL par vue. Un dépassement est journalisé et signalé par l'en-tête
+  X-Query-Budget ; avec `QUERY_BUDGETS_STRICT = True` (activé dans les tests),
+  il lève `QueryBudgetExceeded`.
+"""
+import contextvars
+import logging
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('queries', 'sql_ms', 'template_ms', 'markdown_ms')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+_stats = defaultdict(lambda: deque(maxlen=getattr(settings, 'INSTRUMENTATION_WINDOW', 500)))
+_stats_lock = threading.Lock()
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Levée quand une vue dépasse son budget de requêtes SQL en mode strict"""
+
+
+@contextmanager
+def track(metric):
+    """Ajoute la durée du bloc (en ms) à la métrique `metric` de la requête en cours"""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics[metric] += (time.perf_counter() - started) * 1000
+
+
+def _sql_wrapper(execute, sql, params, many, context):
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics['queries'] += 1
+            metrics['sql_ms'] += (time.perf_counter() - started) * 1000
+
+
+def _install_wrapper(connection, **kwargs):
+    if _sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_sql_wrapper)
+
+
+# Les connexions sont propres à chaque thread : sous ASGI, l'ORM asynchrone
+# exécute les requêtes dans un autre thread que la vue. Le wrapper est donc
+# posé sur toutes les connexions et ne compte que si une collecte est en cours
+# dans le contexte (les contextvars suivent sync_to_async).
+connection_created.connect(_install_wrapper)
+
+
+@contextmanager
+def collect_metrics():
+    """
+    Collecte les métriques du bloc et les expose dans le dictionnaire produit.
+    Utilisable hors du middleware (tests, benchmarks, commandes).
+    """
+    for alias in connections:
+        _install_wrapper(connections[alias])
+    metrics = dict.fromkeys(METRICS, 0)
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+def check_query_budget(view_name, queries):
+    """Retourne le budget de la vue s'il est dépassé (None sinon)"""
+    budget = getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+    if budget is None or queries <= budget:
+        return None
+    message = f"La vue {view_name} a exécuté {queries} requêtes SQL (budget : {budget})"
+    if getattr(settings, 'QUERY_BUDGETS_STRICT', False):
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+    return budget
+
+
+class InstrumentationMiddleware:
+    # Compatible WSGI et ASGI : sous ASGI, un middleware synchrone imposerait
+    # un passage par un thread à toute la chaîne, vues asynchrones comprises
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with collect_metrics() as metrics:
+            response = self.get_response(request)
+        return self.finish(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with collect_metrics() as metrics:
+            response = await self.get_response(request)
+        return self.finish(request, response, metrics, started)
+
+    def finish(self, request, response, metrics, started):
+        total_ms = (time.perf_counter() - started) * 1000
+
+        match = getattr(request, 'resolver_match', None)
+        view_name = (match.view_name if match else None) or 'unresolved'
+
+        response['X-Query-Count'] = str(metrics['queries'])
+        response['X-Query-Time-Ms'] = f"{metrics['sql_ms']:.2f}"
+        response['X-Template-Time-Ms'] = f"{metrics['template_ms']:.2f}"
+        response['X-Markdown-Time-Ms'] = f"{metrics['markdown_ms']:.2f}"
+        response['Server-Timing'] = ', '.join([
+            f"sql;dur={metrics['sql_ms']:.2f}",
+            f"template;dur={metrics['template_ms']:.2f}",
+            f"markdown;dur={metrics['markdown_ms']:.2f}",
+            f"total;dur={total_ms:.2f}",
+        ])
+
+        with _stats_lock:
+            _stats[view_name].append({**metrics, 'total_ms': total_ms})
+
+        if check_query_budget(view_name, metrics['queries']) is not None:
+            response['X-Query-Budget'] = 'exceeded'
+        return response
+
+
+def _summary(samples):
+    totals = sorted(sample['total_ms'] for sample in samples)
+
+    def percentile(fraction):
+        return round(totals[min(len(totals) - 1, int(fraction * len(totals)))], 2)
+
+    return {
+        'requests': len(samples),
+        'total_ms': {'p50': percentile(0.50), 'p95': percentile(0.95), 'max': round(totals[-1], 2)},
+        'queries': {
+            'mean': round(statistics.fmean(sample['queries'] for sample in samples), 2),
+            'max': max(sample['queries'] for sample in samples),
+        },
+        'sql_ms': round(statistics.fmean(sample['sql_ms'] for sample in samples), 2),
+        'template_ms': round(statistics.fmean(sample['template_ms'] for sample in samples), 2),
+        'markdown_ms': round(statistics.fmean(sample['markdown_ms'] for sample in samples), 2),
+    }
+
+
+def get_stats():
+    """Statistiques de la fenêtre glissante, par vue (processus courant)"""
+    with _stats_lock:
+        snapshot = {name: list(samples) for name, samples in _stats.items() if samples}
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    stats = {}
+    for name, samples in sorted(snapshot.items()):
+        summary = _summary(samples)
+        summary['query_budget'] = budgets.get(name)
+        stats[name] = summary
+    return stats
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+@staff_member_required
+def stats_view(request):
+    return JsonResponse(get_stats())
+
+
+class _InstrumentedTemplate:
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        with track('template_ms'):
+            return self.template.render(context, request)
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+    """Backend de templates Django dont les rendus sont chronométrés"""
+
+    def from_string(self, template_code):
+        return _InstrumentedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _InstrumentedTemplate(super().get_template(template_name))
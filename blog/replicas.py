@@ -0,0 +1,231 @@
+"""
+Réplica en lecture : les pages de consultation lisent une copie de la base,
+les écritures vont toujours à la base principale.
+
+- `PrimaryReplicaRouter` envoie au réplica (`settings.READ_REPLICA`) les
+  lectures des modèles de `READ_REPLICA_APPS`, uniquement pendant une vue
+  décorée par `read_from_replica` et tant que la requête n'a rien écrit.
+  Tout le reste (sessions, authentification, administration, écritures) va à
+  la base principale.
+- `read_from_replica(changed_func)` n'utilise le réplica que s'il contient
+  la dernière modification du contenu affiché : `changed_func(request,
+  **kwargs)` renvoie l'horodatage de cette modification, comparé à celui de
+  la dernière copie. Une page mise en cache ne fige donc jamais un état
+  antérieur à l'invalidation qui l'a rendue nécessaire.
+- `ReplicaRoutingMiddleware` assure la lecture de ses propres écritures :
+  après une requête qui a écrit, un cookie renvoie les lectures de ce
+  visiteur à la base principale pendant `READ_REPLICA_STICKY_SECONDS`.
+- `refresh_replica()` recopie la base principale dans le réplica avec l'API
+  de sauvegarde de SQLite (commande `refresh_replica`) : l'ensemble se teste
+  sur une seule machine.
+"""
+import contextvars
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from blog.sqlite import backup_database
+
+PRIMARY_COOKIE = 'db_primary_until'
+
+_routing = contextvars.ContextVar('db_routing', default=None)
+
+
+class _RoutingState:
+    """Aiguillage de la requête en cours (partagé avec les threads de sync_to_async)"""
+    __slots__ = ('replica', 'pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+def replica_alias():
+    """Alias du réplica s'il est activé, None sinon"""
+    alias = getattr(settings, 'READ_REPLICA', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def _synced_key(alias):
+    return f'replica:{alias}:synced_at'
+
+
+def replica_synced_at(alias):
+    """Horodatage du début de la dernière copie du réplica (None s'il n'a jamais été copié)"""
+    return cache.get(_synced_key(alias))
+
+
+def refresh_replica(alias=None, pages=-1, sleep=0.0):
+    """
+    Recopie la base principale dans le réplica et enregistre l'heure de début
+    de la copie : tout ce qui a été validé avant y figure.
+    """
+    alias = alias or replica_alias()
+    if alias is None:
+        raise ValueError("Aucun réplica n'est configuré (settings.READ_REPLICA).")
+    started = time.time()
+    backup_database(
+        connections[DEFAULT_DB_ALIAS].settings_dict['NAME'],
+        connections[alias].settings_dict['NAME'],
+        pages=pages,
+        sleep=sleep,
+    )
+    cache.set(_synced_key(alias), started, None)
+    return started
+
+
+class PrimaryReplicaRouter:
+    def _routed(self, model):
+        return model._meta.app_label in getattr(settings, 'READ_REPLICA_APPS', ())
+
+    def db_for_read(self, model, **hints):
+        state = _routing.get()
+        alias = replica_alias()
+        if alias and state and state.replica and not state.wrote and self._routed(model):
+            return alias
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        state = _routing.get()
+        if state is not None:
+            # Les lectures suivantes de la requête doivent voir cette écriture
+            state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Le réplica est une copie de la base principale : un objet lu sur
+        # l'un peut être lié à un objet de l'autre
+        aliases = {DEFAULT_DB_ALIAS, replica_alias()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Le réplica reçoit le schéma avec la copie
+        if db == replica_alias():
+            return False
+        return None
+
+
+@contextmanager
+def _replica_reads():
+    state = _routing.get()
+    token = None
+    if state is None:
+        state = _RoutingState()
+        token = _routing.set(state)
+    previous = state.replica
+    state.replica = True
+    try:
+        yield
+    finally:
+        state.replica = previous
+        if token is not None:
+            _routing.reset(token)
+
+
+def _replica_stream(chunks):
+    with _replica_reads():
+        yield from chunks
+
+
+def _use_replica(request, changed_func, kwargs):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    alias = replica_alias()
+    if alias is None:
+        return False
+    state = _routing.get()
+    if state is not None and (state.pinned or state.wrote):
+        return False
+    synced_at = replica_synced_at(alias)
+    return synced_at is not None and synced_at >= changed_func(request, **kwargs)
+
+
+def read_from_replica(changed_func):
+    """
+    Sert la vue (synchrone ou asynchrone) depuis le réplica si celui-ci a été
+    copié après la dernière modification renvoyée par `changed_func`.
+    À placer au-dessus des décorateurs de cache, qui lisent aussi la base.
+
+    Pour une vue asynchrone, la vérification (qui lit le cache partagé, dont
+    `changed_func`) est faite dans un thread, hors de la boucle d'événements.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                use_replica = await sync_to_async(_use_replica, thread_sensitive=False)(
+                    request, changed_func, kwargs
+                )
+                if not use_replica:
+                    return await view_func(request, *args, **kwargs)
+                with _replica_reads():
+                    return await view_func(request, *args, **kwargs)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not _use_replica(request, changed_func, kwargs):
+                return view_func(request, *args, **kwargs)
+            with _replica_reads():
+                response = view_func(request, *args, **kwargs)
+            if response.streaming:
+                # Le corps est produit après le retour de la vue (flux, sitemap)
+                response.streaming_content = _replica_stream(response.streaming_content)
+            return response
+        return wrapper
+    return decorator
+
+
+def _pinned(request):
+    try:
+        return float(request.COOKIES.get(PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    # Compatible WSGI et ASGI, comme InstrumentationMiddleware
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = _RoutingState(pinned=_pinned(request))
+        token = _routing.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        state = _RoutingState(pinned=_pinned(request))
+        token = _routing.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.finish(response, state)
+
+    def finish(self, response, state):
+        if state.wrote and replica_alias():
+            sticky = getattr(settings, 'READ_REPLICA_STICKY_SECONDS', 15)
+            response.set_cookie(
+                PRIMARY_COOKIE, f'{time.time() + sticky:.0f}',
+                max_age=sticky, httponly=True, samesite='Lax',
+            )
+        return response
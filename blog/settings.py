@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from blog.sqlite import sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -42,6 +45,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'blog.instrumentation.InstrumentationMiddleware',
+    'blog.replicas.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -53,9 +58,28 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'blog.urls'
 
+# Budgets de requêtes SQL par vue (voir blog/instrumentation.py), pour un
+# utilisateur connecté (session + utilisateur comptent pour 2 requêtes,
+# SAVEPOINT/RELEASE comptent aussi). Un like ou un commentaire met aussi à
+# jour le score de tendance : 1 requête, 2 pour la première interaction.
+QUERY_BUDGETS = {
+    'article_list': 6,
+    'article_detail': 10,
+    'article_like': 14,
+    'article_like_toggle': 14,
+    'article_trending': 4,
+    'article_most_liked': 4,
+    'article_archive': 4,
+    'article_archive_year': 4,
+    'article_archive_month': 6,
+}
+QUERY_BUDGETS_STRICT = False
+INSTRUMENTATION_WINDOW = 500
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates dont les rendus sont chronométrés (voir blog/instrumentation.py)
+        'BACKEND': 'blog.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -74,13 +98,30 @@ WSGI_APPLICATION = 'blog.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# WAL, PRAGMA de production et transactions BEGIN IMMEDIATE (voir blog/sqlite.py)
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3'),
+    # Copie en lecture seule de la base principale, rafraîchie par la commande
+    # refresh_replica (voir blog/replicas.py)
+    'replica': {
+        **sqlite_database(
+            BASE_DIR / 'db.replica.sqlite3',
+            pragmas={'query_only': 1},
+            transaction_mode='DEFERRED',
+        ),
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['blog.replicas.PrimaryReplicaRouter']
+
+# Alias du réplica utilisé par les pages de consultation (None : tout va à la
+# base principale). Activé avec READ_REPLICA=1 une fois le réplica copié.
+READ_REPLICA = 'replica' if os.environ.get('READ_REPLICA') == '1' else None
+READ_REPLICA_APPS = ['articles']
+# Durée pendant laquelle un visiteur qui vient d'écrire lit la base principale
+READ_REPLICA_STICKY_SECONDS = 15
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -106,13 +147,34 @@ AUTH_PASSWORD_VALIDATORS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Génération des variantes d'images en arrière-plan (voir articles/images.py)
+ARTICLES_IMAGE_WORKERS = 2
+ARTICLES_IMAGE_PROCESSING_EAGER = False
+
+# Vues asynchrones (articles/async_views.py) pour la liste, le détail et le
+# like : activées par blog/asgi.py, les déploiements WSGI gardent les vues
+# synchrones. Le rendu Markdown de ces vues passe par un pool de threads borné.
+ARTICLES_ASYNC_VIEWS = os.environ.get('ARTICLES_ASYNC_VIEWS') == '1'
+ARTICLES_MARKDOWN_WORKERS = 2
+
+# Cache partagé par tous les processus de la machine (voir blog/cache.py).
+# BLOG_CACHE_LOCATION désigne un autre fichier (une instance par projet
+# déployé, un chemin temporaire pour un essai...)
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': 'blog.cache.SQLiteCache',
+        'LOCATION': os.environ.get('BLOG_CACHE_LOCATION') or BASE_DIR / 'cache.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+            'MAX_SIZE': 64 * 1024 * 1024,
+            'CULL_FREQUENCY': 4,
+        },
     }
 }
 
+# Les tests n'écrivent pas dans ce cache (voir blog/test_runner.py)
+TEST_RUNNER = 'blog.test_runner.TestRunner'
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
@@ -0,0 +1,199 @@
+"""
+Réglages de production de SQLite et tolérance aux écritures concurrentes.
+
+- `sqlite_database(path)` construit l'entrée de DATABASES : PRAGMA appliqués
+  à chaque connexion (`SQLITE_PRAGMAS`) et transactions en `BEGIN IMMEDIATE`. Le verrou
+  d'écriture est ainsi pris dès le début de la transaction, où le délai
+  d'attente (busy_timeout) s'applique. Une transaction qui ne le prend qu'à sa
+  première écriture peut échouer aussitôt en « database is locked ».
+- `enable_wal()` passe la base en journal WAL (les lectures ne bloquent plus
+  l'écrivain). Ce mode est enregistré dans le fichier : il est activé une
+  fois, après `migrate` (voir articles.signals), et non à chaque connexion,
+  qui réécrirait l'en-tête de la base à chaque commande de gestion.
+- `retry_on_locked` rejoue une écriture (ou une vue qui n'écrit qu'une fois)
+  quand le verrou n'a pas été obtenu dans le délai, avec un délai croissant
+  entre les tentatives.
+- `sqlite_status()` rassemble l'état du journal WAL et des PRAGMA, affiché
+  par la commande `sqlite_health`.
+- `backup_database()` copie une base ouverte avec l'API de sauvegarde de
+  SQLite (réplica en lecture, voir blog.replicas).
+"""
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.db import OperationalError, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA propres à chaque connexion (le mode de journal, lui, est persistant)
+SQLITE_PRAGMAS = {
+    # Sûr avec WAL : seule la dernière transaction peut être perdue en cas de coupure de courant
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,          # ms d'attente du verrou d'écriture
+    'cache_size': -20000,          # ko (valeur négative) : 20 Mo de cache de pages par connexion
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+LOCKED_MESSAGES = ('database is locked', 'database table is locked')
+
+
+def sqlite_database(path, pragmas=None, **options):
+    """Entrée de settings.DATABASES pour le fichier SQLite `path`"""
+    pragmas = {**SQLITE_PRAGMAS, **(pragmas or {})}
+    return {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': path,
+        'OPTIONS': {
+            'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in pragmas.items()),
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': pragmas['busy_timeout'] / 1000,
+            **options,
+        },
+    }
+
+
+def enable_wal(using_connection=None):
+    """
+    Passe la base en journal WAL si elle n'y est pas déjà. Retourne le mode
+    de journal obtenu (« memory » pour une base en mémoire, qui l'ignore).
+    """
+    db = using_connection or connection
+    with db.cursor() as cursor:
+        mode = _pragma(cursor, 'journal_mode')
+        if mode not in ('wal', 'memory'):
+            mode = cursor.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+    return mode
+
+
+def is_locked_error(exc):
+    return isinstance(exc, OperationalError) and any(message in str(exc) for message in LOCKED_MESSAGES)
+
+
+def _backoff(attempt, base_delay):
+    return base_delay * 2 ** attempt * (1 + random.random())
+
+
+def retry_on_locked(func=None, *, attempts=4, base_delay=0.05):
+    """
+    Rejoue `func` (synchrone ou asynchrone) si SQLite reste verrouillé au-delà
+    de busy_timeout. `func` doit écrire dans une seule transaction, sans autre
+    effet de bord : une tentative échouée n'a rien écrit. Pour une vue qui
+    fait autre chose (téléversement, formulaire), n'envelopper que
+    l'écriture. Aucune nouvelle tentative n'est faite à l'intérieur d'une
+    transaction englobante.
+    """
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                for attempt in range(attempts):
+                    try:
+                        return await func(*args, **kwargs)
+                    except OperationalError as exc:
+                        if not _should_retry(exc, attempt, attempts, func):
+                            raise
+                    await asyncio.sleep(_backoff(attempt, base_delay))
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            for attempt in range(attempts):
+                try:
+                    return func(*args, **kwargs)
+                except OperationalError as exc:
+                    if not _should_retry(exc, attempt, attempts, func):
+                        raise
+                time.sleep(_backoff(attempt, base_delay))
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def _should_retry(exc, attempt, attempts, func):
+    if not is_locked_error(exc) or attempt == attempts - 1:
+        return False
+    if transaction.get_connection().in_atomic_block:
+        return False
+    logger.warning("Base verrouillée dans %s, nouvelle tentative (%d/%d)", func.__qualname__, attempt + 2, attempts)
+    return True
+
+
+def _pragma(cursor, name):
+    return cursor.execute(f'PRAGMA {name}').fetchone()[0]
+
+
+def sqlite_status(using_connection=None, checkpoint='PASSIVE'):
+    """
+    État de la base : PRAGMA effectifs, tailles du fichier et du journal WAL,
+    et résultat d'un checkpoint (`checkpoint` : PASSIVE, FULL, RESTART,
+    TRUNCATE ou None pour ne pas en lancer).
+    """
+    db = using_connection or connection
+    path = str(db.settings_dict['NAME'])
+    with db.cursor() as cursor:
+        status = {
+            'path': path,
+            'sqlite_version': db.Database.sqlite_version,
+            **{
+                name: _pragma(cursor, name)
+                for name in (
+                    'journal_mode', 'synchronous', 'busy_timeout', 'cache_size',
+                    'mmap_size', 'page_size', 'page_count', 'freelist_count',
+                    'wal_autocheckpoint',
+                )
+            },
+        }
+        if checkpoint:
+            busy, wal_frames, checkpointed = cursor.execute(
+                f'PRAGMA wal_checkpoint({checkpoint})'
+            ).fetchone()
+            status['checkpoint'] = {
+                'mode': checkpoint,
+                'busy': bool(busy),
+                'wal_frames': wal_frames,
+                'checkpointed_frames': checkpointed,
+            }
+
+    def size(filename):
+        return os.path.getsize(filename) if os.path.exists(filename) else 0
+
+    status['database_bytes'] = size(path)
+    status['wal_bytes'] = size(f'{path}-wal')
+    status['shm_bytes'] = size(f'{path}-shm')
+    return status
+
+
+def backup_database(source_path, target_path, pages=-1, sleep=0.0):
+    """
+    Copie cohérente de `source_path` dans `target_path` avec l'API de
+    sauvegarde, sans arrêter les écrivains de la source. `pages` pages sont
+    copiées par étape (-1 : tout en une étape) avec une pause de `sleep`
+    secondes entre deux étapes ; une écriture dans la source pendant la copie
+    la fait reprendre depuis le début. Les lecteurs de la cible continuent de
+    lire l'ancienne copie jusqu'à la fin de la sauvegarde (journal WAL).
+    """
+    timeout = SQLITE_PRAGMAS['busy_timeout'] / 1000
+    source = sqlite3.connect(source_path, timeout=timeout)
+    try:
+        target = sqlite3.connect(target_path, timeout=timeout)
+        try:
+            # En mode WAL, la cible reste lisible pendant la copie (qui
+            # conserve le mode de journal de la cible)
+            target.execute('PRAGMA journal_mode=WAL')
+            source.backup(target, pages=pages, sleep=sleep)
+            # La copie passe par le journal WAL de la cible : il est reporté
+            # dans la base pour ne pas grossir d'une sauvegarde à l'autre
+            target.execute('PRAGMA wal_checkpoint(PASSIVE)')
+        finally:
+            target.close()
+    finally:
+        source.close()
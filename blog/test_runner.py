@@ -0,0 +1,23 @@
+"""
+Lanceur de tests du projet (`python manage.py test`).
+
+Le cache par défaut (blog.cache) est un fichier partagé par tous les
+processus de la machine : des pages et des versions de portées écrites par
+les tests y masqueraient ensuite les vraies pages. Les tests utilisent donc
+un LocMemCache, propre à chaque processus et vidé à chaque lancement.
+"""
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+TEST_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._test_caches = override_settings(CACHES=TEST_CACHES)
+        self._test_caches.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self._test_caches.disable()
+        super().teardown_test_environment(**kwargs)
@@ -2,9 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
+from articles.feeds import sitemap_index, sitemap_section
+from .instrumentation import stats_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('_stats/', stats_view, name='instrumentation_stats'),
+    path('sitemap.xml', sitemap_index, name='sitemap_index'),
+    path('sitemap-articles-<int:section>.xml', sitemap_section, name='sitemap_section'),
+    path('api/', include('articles.api_urls')),
     path('accounts/', include('users.urls')),
     path('articles/', include('articles.urls')),
     path('', include('articles.urls')),  # Ajoute l'URL racine